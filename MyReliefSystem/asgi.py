@@ -2,6 +2,9 @@
 ASGI config for MyReliefSystem project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through it (rather than wsgi.py) enables the live notification stream
+at /admin-panel/notifications/stream/ (register/sse.py) and, unless
+ASYNC_ADMIN_VIEWS is set otherwise, the async admin views (register/parallel.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +15,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MyReliefSystem.settings')
+# Read by the settings, which get_asgi_application() loads
+os.environ.setdefault('ASYNC_ADMIN_VIEWS', 'True')
 
 application = get_asgi_application()
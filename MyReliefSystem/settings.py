@@ -53,6 +53,7 @@ LOGOUT_REDIRECT_URL = '/login/'
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # <-- enable for static files
+    'register.profiling.ViewProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,6 +82,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'register.context_processors.unread_notifications',
             ],
         },
     },
@@ -107,6 +109,61 @@ else:
         }
     }
 
+# Cache (login throttling, unread notification count)
+# Local memory by default; set DJANGO_CACHE_DIR to share one file cache between worker processes
+CACHE_DIR = os.environ.get("DJANGO_CACHE_DIR")
+if CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Login throttling (see register/throttle.py)
+LOGIN_THROTTLE = {
+    'ENABLED': os.environ.get("LOGIN_THROTTLE_ENABLED", "True").lower() == "true",
+    'WINDOW': int(os.environ.get("LOGIN_THROTTLE_WINDOW", "300")),
+    'IP_LIMIT': int(os.environ.get("LOGIN_THROTTLE_IP_LIMIT", "30")),
+    'USERNAME_LIMIT': int(os.environ.get("LOGIN_THROTTLE_USERNAME_LIMIT", "5")),
+    # Trusted proxies in front of the app. Render puts one there, so it is 1 by default on Render;
+    # with 0 behind a proxy every login comes from the proxy's IP and shares one per-IP limit
+    'NUM_PROXIES': int(os.environ.get(
+        "LOGIN_THROTTLE_NUM_PROXIES", "1" if os.environ.get("RENDER", "") == "true" else "0"
+    )),
+}
+
+# Per-view query counts and timings, shown to staff at /admin-panel/profiling/ (see register/profiling.py)
+VIEW_PROFILING = {
+    'ENABLED': os.environ.get("VIEW_PROFILING_ENABLED", "True").lower() == "true",
+    # Requests kept per process
+    'BUFFER': int(os.environ.get("VIEW_PROFILING_BUFFER", "500")),
+}
+
+# Serve the admin dashboard and analytics pages from async views that run their independent
+# queries concurrently (see register/parallel.py). Off by default: under WSGI every async view
+# pays an event loop per request. MyReliefSystem/asgi.py turns it on for the ASGI server.
+ASYNC_ADMIN_VIEWS = os.environ.get("ASYNC_ADMIN_VIEWS", "False").lower() == "true"
+# Threads (each with its own database connection) those concurrent queries run on, per process
+PARALLEL_QUERY_WORKERS = int(os.environ.get("PARALLEL_QUERY_WORKERS", "4"))
+
+# Live notification badge over Server-Sent Events (see register/sse.py); needs the ASGI server
+NOTIFICATION_STREAM = {
+    'ENABLED': os.environ.get("NOTIFICATION_STREAM_ENABLED", "True").lower() == "true",
+    # Seconds between the per-process checks for new notifications
+    'POLL_INTERVAL': float(os.environ.get("NOTIFICATION_STREAM_POLL_INTERVAL", "2")),
+    # Seconds of silence before a keepalive comment is sent
+    'KEEPALIVE': int(os.environ.get("NOTIFICATION_STREAM_KEEPALIVE", "15")),
+    # Seconds before a stream is closed; the browser reconnects from its Last-Event-ID
+    'MAX_DURATION': int(os.environ.get("NOTIFICATION_STREAM_MAX_DURATION", "300")),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -133,6 +190,12 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# ID proof uploads (see register/utils.py): "supabase" stores them in the bucket, "local" under MEDIA_ROOT.
+# Render's disk is wiped on every deploy, so Supabase is the default whenever it is configured.
+ID_PROOF_STORAGE = os.getenv("ID_PROOF_STORAGE", "supabase" if os.getenv("SUPABASE_URL") else "local")
+ID_PROOF_UPLOAD_WORKERS = int(os.getenv("ID_PROOF_UPLOAD_WORKERS", "2"))
+ID_PROOF_MAX_SIZE = 10 * 1024 * 1024
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -140,10 +203,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # SUPABASE CONFIGURATION
 # ================================
 SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("SUPABASE_ANON_KEY")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_SERVICE_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET")
 SUPABASE_TABLE = os.getenv("SUPABASE_TABLE")
+# "live", or "fake" for the in-memory client in register/fake_supabase.py (offline runs)
+SUPABASE_BACKEND = os.getenv("SUPABASE_BACKEND", "live")
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+# Per-process cache of Register table lookups (get_from_supabase_table)
+SUPABASE_CACHE_SIZE = int(os.getenv("SUPABASE_CACHE_SIZE", "1024"))
+SUPABASE_CACHE_TTL = int(os.getenv("SUPABASE_CACHE_TTL", "60"))
+SUPABASE_CACHE_NEGATIVE_TTL = int(os.getenv("SUPABASE_CACHE_NEGATIVE_TTL", "15"))
+# Queue family head changes for the Register table mirror (pushed by `manage.py sync_supabase_mirror`)
+SUPABASE_MIRROR = os.getenv("SUPABASE_MIRROR", str(bool(SUPABASE_URL))).lower() == "true"
+
+# App log messages (e.g. background ID proof uploads) go to the console, where Render collects them
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"register": {"handlers": ["console"], "level": os.getenv("REGISTER_LOG_LEVEL", "INFO")}},
+}
 
 # CSRF Trusted Origins
 CSRF_TRUSTED_ORIGINS = [o.strip() for o in os.environ.get("DJANGO_CSRF_TRUSTED_ORIGINS", "").split(",") if o.strip()]
@@ -4,17 +4,25 @@ from register import views
 from django.conf import settings
 from django.conf.urls.static import static
 
+# Async dashboard and analytics views gather their queries concurrently (ASYNC_ADMIN_VIEWS)
+if settings.ASYNC_ADMIN_VIEWS:
+    dashboard_view, analytics_view = views.custom_admin_dashboard_async, views.analytics_view_async
+else:
+    dashboard_view, analytics_view = views.custom_admin_dashboard, views.analytics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # Custom admin panel
-    path('admin-panel/dashboard/', views.custom_admin_dashboard, name='admin_dashboard'),
+    path('admin-panel/dashboard/', dashboard_view, name='admin_dashboard'),
     
     # Manage Users
     path('admin-panel/users/', views.manage_users_view, name='manage_users'),
     path('admin-panel/users/update/<int:user_id>/', views.update_user_view, name='update_user'),
     path('admin-panel/users/delete/<int:user_id>/', views.delete_user_view, name='delete_user'),
     path('admin-panel/users/distribute/<int:user_id>/', views.mark_distributed_view, name='mark_distributed'),
+    path('admin-panel/users/history/<int:user_id>/', views.user_distribution_history, name='user_distribution_history'),
+    path('admin-panel/users/distribute/bulk/', views.bulk_distribute_view, name='bulk_distribute'),
     
     # Manage Inventory
     path('admin-panel/inventory/', views.manage_inventory_view, name='manage_inventory'),
@@ -28,6 +36,7 @@ urlpatterns = [
     path('admin-panel/pending/', views.pending_requests_view, name='pending_requests'),
     path('admin-panel/requests/approve/<int:request_id>/', views.approve_request_view, name='approve_request'),
     path('admin-panel/requests/deny/<int:request_id>/', views.deny_request_view, name='deny_request'),
+    path('admin-panel/requests/bulk/', views.bulk_review_requests_view, name='bulk_review_requests'),
     
     # Approved Requests
     path('admin-panel/approved/', views.approved_requests_view, name='approved_requests'),
@@ -38,15 +47,21 @@ urlpatterns = [
     path('relief-request/<int:user_id>/', views.create_relief_request, name='create_relief_request'),
     
     # Analytics
-    path('admin-panel/analytics/', views.analytics_view, name='analytics'),
+    path('admin-panel/analytics/', analytics_view, name='analytics'),
+    path('admin-panel/analytics/series/', views.analytics_series, name='analytics_series'),
     
     # Reports
     path('admin-panel/reports/', views.reports_view, name='reports'),
+    path('admin-panel/export/<str:dataset>/', views.export_data_view, name='export_data'),
+    
+    # Query counts and timings per view (staff only)
+    path('admin-panel/profiling/', views.profiling_view, name='profiling'),
     
     # Notifications
     path('admin-panel/notifications/', views.notifications_view, name='notifications'),
     path('admin-panel/notifications/read/<int:notification_id>/', views.mark_notification_read, name='mark_notification_read'),
     path('admin-panel/notifications/ajax/', views.get_notifications_ajax, name='get_notifications_ajax'),
+    path('admin-panel/notifications/stream/', views.notification_stream, name='notification_stream'),
 
     # Admin login
     path('admin-login/', views.admin_login, name='admin_login'),
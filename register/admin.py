@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import User, Inventory, ReliefDistribution, Notification, ReliefRequest
+from .models import User, Inventory, ReliefDistribution, Notification, ReliefRequest, StatCounter
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'firstname', 'lastname', 'contact', 'role')
+    list_display = ('username', 'firstname', 'lastname', 'contact', 'role', 'date_joined')
     list_filter = ('role',)
     search_fields = ('username', 'firstname', 'lastname', 'contact')
     ordering = ('username',)
@@ -34,4 +34,9 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ['title', 'notification_type', 'is_read', 'created_at']
     list_filter = ['notification_type', 'is_read', 'created_at']
     search_fields = ['title', 'message']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+@admin.register(StatCounter)
+class StatCounterAdmin(admin.ModelAdmin):
+    list_display = ('key', 'value', 'updated_at')
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,14 @@
+from .notifications import get_unread_count
+
+
+def unread_notifications(request):
+    """
+    Adds `unread_notifications` to every template rendered for an admin,
+    so views don't each run their own count query.
+    """
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return {}
+    if getattr(user, 'role', None) != 'Admin' and not user.is_staff:
+        return {}
+    return {'unread_notifications': get_unread_count()}
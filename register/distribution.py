@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    User, Inventory, ReliefDistribution, ReliefRequest, Notification, StatCounter, bump_stat, notify_low_stock
+)
+from .rollups import record_bulk_distribution
+
+
+class InsufficientStock(Exception):
+    """Raised when an item does not have enough quantity left for a distribution."""
+
+
+def take_stock(item_id, quantity):
+    """
+    Decrements an item's quantity with a single conditional UPDATE
+    (... SET quantity = quantity - n WHERE id = ? AND quantity >= n), so two
+    volunteers distributing the same item can never oversell it.
+    Must be called inside a transaction together with the distribution insert.
+
+    Raises:
+        Inventory.DoesNotExist: if the item does not exist
+        InsufficientStock: if the item has less than `quantity` left
+    """
+    updated = Inventory.objects.filter(id=item_id, quantity__gte=quantity).update(
+        quantity=F('quantity') - quantity,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        if not Inventory.objects.filter(id=item_id).exists():
+            raise Inventory.DoesNotExist(f"Inventory item {item_id} does not exist.")
+        raise InsufficientStock("Insufficient inventory quantity.")
+
+    # queryset.update() skips the Inventory signals, so keep the counters in step here
+    bump_stat(StatCounter.TOTAL_INVENTORY, -quantity)
+
+
+def distribute_item(user, item_id, quantity, distributed_by=None, notes=''):
+    """
+    Records one distribution and takes the stock for it in one transaction.
+
+    Returns:
+        ReliefDistribution: the created distribution
+
+    Raises:
+        ValueError: if quantity is not positive
+        Inventory.DoesNotExist / InsufficientStock: see take_stock()
+    """
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1.")
+
+    with transaction.atomic():
+        take_stock(item_id, quantity)
+        distribution = ReliefDistribution.objects.create(
+            user=user,
+            item_id=item_id,
+            quantity_distributed=quantity,
+            distributed_by=distributed_by,
+            notes=notes
+        )
+
+    notify_low_stock(distribution.item)
+    return distribution
+
+
+def distribute_in_bulk(user_ids, item_id, quantity, distributed_by=None, notes='', relief_request_ids=None):
+    """
+    Gives `quantity` of one item to every household in `user_ids` in a single
+    transaction: one stock decrement for the whole batch, one bulk INSERT of the
+    distributions and one summary notification instead of one per household.
+
+    Args:
+        user_ids: userids of the receiving family heads (unknown ids are ignored)
+        item_id: Inventory item being handed out
+        quantity: Quantity per household
+        distributed_by: Admin recording the distribution
+        notes: Notes stored on every distribution
+        relief_request_ids: Approved relief requests being fulfilled; marked as given
+
+    Returns:
+        int: number of households that received the item
+
+    Raises:
+        ValueError: if quantity is not positive or no valid households were given
+        Inventory.DoesNotExist / InsufficientStock: see take_stock()
+    """
+    if quantity < 1:
+        raise ValueError("Quantity must be at least 1.")
+
+    with transaction.atomic():
+        places = dict(
+            (userid, (city, barangay))
+            for userid, city, barangay in User.objects.filter(
+                userid__in=set(user_ids), role='FamilyHead'
+            ).values_list('userid', 'city', 'barangay')
+        )
+        households = list(places)
+        if not households:
+            raise ValueError("No households selected.")
+
+        take_stock(item_id, quantity * len(households))
+        item = Inventory.objects.get(id=item_id)
+
+        # bulk_create skips save(), which normally snapshots the rollup dimensions
+        ReliefDistribution.objects.bulk_create([
+            ReliefDistribution(
+                user_id=userid,
+                item_id=item_id,
+                quantity_distributed=quantity,
+                distributed_by=distributed_by,
+                notes=notes,
+                category=item.category,
+                city=places[userid][0],
+                barangay=places[userid][1]
+            )
+            for userid in households
+        ], batch_size=500)
+        # bulk_create skips the per-row signals (and their notifications)
+        bump_stat(StatCounter.TOTAL_DISTRIBUTIONS, len(households))
+        record_bulk_distribution(places.values(), item.category, quantity, timezone.now())
+
+        if relief_request_ids:
+            ReliefRequest.objects.filter(
+                id__in=relief_request_ids, user_id__in=households, status='approved'
+            ).update(relief_given=True)
+
+        Notification.objects.create(
+            notification_type='distribution',
+            title='Bulk Relief Distribution',
+            message=f'{item.name} distributed to {len(households)} households ({quantity} items each, {quantity * len(households)} total)'
+        )
+
+    notify_low_stock(item)
+    return len(households)
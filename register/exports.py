@@ -0,0 +1,137 @@
+import csv
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+
+from .models import User, ReliefDistribution, ReliefRequest
+
+# Rows fetched per round trip; with PostgreSQL this is the server-side cursor fetch size
+CHUNK_SIZE = 2000
+
+# Output is buffered into chunks of roughly this many bytes before being yielded
+BUFFER_SIZE = 64 * 1024
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+# dataset -> (queryset factory, exported columns); columns are values_list() paths
+DATASETS = {
+    'distributions': (
+        lambda: ReliefDistribution.objects.order_by('id'),
+        [
+            'id', 'distribution_date', 'user_id', 'user__username', 'user__firstname', 'user__lastname',
+            'user__city', 'user__barangay', 'item_id', 'item__name', 'item__category',
+            'quantity_distributed', 'distributed_by__username', 'notes',
+        ],
+    ),
+    'requests': (
+        lambda: ReliefRequest.objects.order_by('id'),
+        [
+            'id', 'request_date', 'user_id', 'user__username', 'user__firstname', 'user__lastname',
+            'user__city', 'user__barangay', 'relief_type', 'status', 'notes',
+            'reviewed_by__username', 'reviewed_date', 'admin_notes', 'relief_given',
+        ],
+    ),
+    'residents': (
+        lambda: User.objects.filter(role='FamilyHead').order_by('userid'),
+        [
+            'userid', 'username', 'firstname', 'middlename', 'lastname',
+            'address', 'city', 'barangay', 'contact', 'is_active',
+        ],
+    ),
+}
+
+# Spreadsheets run a cell that starts with one of these as a formula (CSV injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object that hands back what csv.writer writes instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    """Prefixes a text cell that a spreadsheet would evaluate with ', so it is shown as text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(dataset):
+    """Yields one tuple per row of the dataset, streamed from the database in chunks."""
+    queryset_factory, columns = DATASETS[dataset]
+    return queryset_factory().values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_lines(dataset, export_format='csv'):
+    """Yields the export as text lines (header first for CSV)."""
+    columns = DATASETS[dataset][1]
+    rows = export_rows(dataset)
+
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            # Residents type their names, address and notes; keep them from running as formulas
+            yield writer.writerow([escape_formula(value) for value in row])
+    elif export_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), default=str) + '\n'
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+
+def export_chunks(dataset, export_format='csv', compress=False):
+    """
+    Yields the export as byte chunks of about BUFFER_SIZE, gzip-compressed on
+    the fly when `compress` is set. Memory use does not depend on the row count.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    buffer = []
+    size = 0
+
+    for line in export_lines(dataset, export_format):
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def aexport_chunks(dataset, export_format='csv', compress=False):
+    """
+    export_chunks for ASGI servers. Given a sync iterator, Django's ASGI
+    handler reads it to the end before sending a byte; this pulls one chunk
+    at a time instead, in the request's sync thread (the one that owns the
+    database connection and cursor).
+    """
+    chunks = export_chunks(dataset, export_format, compress)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Closes the database cursor too when the client goes away mid-download
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_filename(dataset, export_format='csv', compress=False):
+    extension = FORMATS[export_format][1]
+    return f"myrelief_{dataset}.{extension}" + ('.gz' if compress else '')
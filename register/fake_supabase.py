@@ -0,0 +1,183 @@
+"""
+In-memory stand-in for the parts of the Supabase client that register/utils.py uses.
+
+Enable it with SUPABASE_BACKEND=fake, or install one directly:
+
+    from register.utils import set_supabase_client
+    set_supabase_client(FakeSupabaseClient(latency=0.05))
+
+Tables are lists of dicts, buckets are dicts of bytes. Errors use the same
+wording as PostgREST/Storage so the callers' duplicate checks behave the same.
+"""
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.row_limit = None
+
+    def select(self, columns='*', **kwargs):
+        self.action = 'select'
+        self.columns = columns
+        return self
+
+    def insert(self, data, **kwargs):
+        self.action = 'insert'
+        self.payload = data if isinstance(data, list) else [data]
+        return self
+
+    def upsert(self, data, on_conflict='', **kwargs):
+        self.action = 'upsert'
+        self.payload = data if isinstance(data, list) else [data]
+        self.on_conflict = on_conflict or self.client.unique_column
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, size):
+        self.row_limit = size
+        return self
+
+    def execute(self):
+        self.client.simulate_round_trip()
+        with self.client.lock:
+            rows = self.client.tables.setdefault(self.table, [])
+            if self.action == 'insert':
+                return FakeResponse(self.client.insert_rows(rows, self.payload))
+            if self.action == 'upsert':
+                return FakeResponse(self.client.upsert_rows(rows, self.payload, self.on_conflict))
+
+            matched = [row for row in rows if all(check(row) for check in self.filters)]
+            if self.row_limit is not None:
+                matched = matched[:self.row_limit]
+            if self.columns != '*':
+                columns = [column.strip() for column in self.columns.split(',')]
+                matched = [{column: row.get(column) for column in columns} for row in matched]
+            return FakeResponse([dict(row) for row in matched])
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def upload(self, path, file, file_options=None):
+        self.client.simulate_round_trip()
+        if isinstance(file, (bytes, bytearray)):
+            content = bytes(file)
+        else:
+            content = b''.join(iter(lambda: file.read(64 * 1024), b''))
+        upsert = str((file_options or {}).get('upsert', 'false')).lower() == 'true'
+        with self.client.lock:
+            objects = self.client.buckets.setdefault(self.name, {})
+            if path in objects and not upsert:
+                raise Exception('The resource already exists')
+            objects[path] = content
+        return FakeResponse([{'Key': f'{self.name}/{path}'}])
+
+    def get_public_url(self, path):
+        return f'https://fake.supabase.local/storage/v1/object/public/{self.name}/{path}'
+
+
+class FakeStorage:
+    def __init__(self, client):
+        self.client = client
+
+    def from_(self, bucket):
+        return FakeBucket(self.client, bucket)
+
+
+class FakeSupabaseClient:
+    """
+    Args:
+        latency: seconds slept per round trip, to make remote latency visible in benchmarks
+        unique_column: column that must be unique in every table (Register.username)
+    """
+
+    def __init__(self, latency=0.0, unique_column='username'):
+        self.latency = latency
+        self.unique_column = unique_column
+        self.tables = {}
+        self.buckets = {}
+        self.round_trips = 0
+        self.failures = []
+        self.rejected = {}
+        self.lock = threading.Lock()
+        self.storage = FakeStorage(self)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def fail_next(self, count=1, error=None):
+        """Makes the next `count` round trips raise `error` (a ConnectionError by default)."""
+        with self.lock:
+            self.failures.extend([error or ConnectionError('Connection refused')] * count)
+
+    def reject(self, column, value, message='invalid input syntax'):
+        """Makes any insert/upsert containing a row with this value fail, like a constraint violation."""
+        self.rejected[(column, value)] = message
+
+    def simulate_round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+            error = self.failures.pop(0) if self.failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if error:
+            raise error
+
+    def check_rejected(self, payload):
+        for row in payload:
+            for (column, value), message in self.rejected.items():
+                if row.get(column) == value:
+                    raise Exception(message)
+
+    def insert_rows(self, rows, payload):
+        self.check_rejected(payload)
+        existing = {row.get(self.unique_column) for row in rows}
+        for row in payload:
+            if row.get(self.unique_column) in existing:
+                raise Exception(
+                    f'duplicate key value violates unique constraint "{self.unique_column}_key"'
+                )
+            existing.add(row.get(self.unique_column))
+        # All-or-nothing, like a single INSERT statement
+        inserted = [dict(row, id=len(rows) + i + 1) for i, row in enumerate(payload)]
+        rows.extend(inserted)
+        return [dict(row) for row in inserted]
+
+    def upsert_rows(self, rows, payload, on_conflict):
+        self.check_rejected(payload)
+        by_key = {row.get(on_conflict): row for row in rows}
+        result = []
+        for row in payload:
+            current = by_key.get(row.get(on_conflict))
+            if current is None:
+                current = dict(row, id=len(rows) + 1)
+                rows.append(current)
+                by_key[row.get(on_conflict)] = current
+            else:
+                current.update(row)
+            result.append(dict(current))
+        return result
@@ -1,4 +1,10 @@
 from django import forms
+from django.conf import settings
+from django.core.validators import FileExtensionValidator
+
+from .models import ReliefRequest
+
+ID_PROOF_EXTENSIONS = ['jpg', 'jpeg', 'png', 'webp', 'pdf']
 
 class RegistrationForm(forms.Form):
     username = forms.CharField(max_length=150, required=True, label="Username")
@@ -13,6 +19,13 @@ class RegistrationForm(forms.Form):
 
     password = forms.CharField(widget=forms.PasswordInput(), required=True, label="Password")
 
+    id_proof = forms.FileField(
+        required=False,
+        label="ID Proof",
+        validators=[FileExtensionValidator(ID_PROOF_EXTENSIONS)],
+        widget=forms.ClearableFileInput(attrs={"accept": ",".join(f".{ext}" for ext in ID_PROOF_EXTENSIONS)}),
+    )
+
     # Custom validation for the contact field (if needed)
     def clean_contact(self):
         contact = self.cleaned_data.get('contact')
@@ -22,6 +35,13 @@ class RegistrationForm(forms.Form):
             raise forms.ValidationError("Contact number is too short.")
         return contact
 
+    def clean_id_proof(self):
+        id_proof = self.cleaned_data.get('id_proof')
+        max_size = getattr(settings, 'ID_PROOF_MAX_SIZE', 10 * 1024 * 1024)
+        if id_proof and id_proof.size > max_size:
+            raise forms.ValidationError(f"ID proof must be {max_size // (1024 * 1024)} MB or smaller.")
+        return id_proof
+
 
 class DashboardForm(forms.Form):
     # Fields for updating user's address and contact number in the dashboard
@@ -38,3 +58,19 @@ class DashboardForm(forms.Form):
         if len(contact) < 8:
             raise forms.ValidationError("Contact number is too short.")
         return contact
+
+
+class PendingRequestFilterForm(forms.Form):
+    # Filters of the pending requests page, also posted with "review all matching"
+    relief_type = forms.ChoiceField(
+        choices=[('', 'All Relief Types')] + ReliefRequest.RELIEF_TYPE_CHOICES, required=False, label="Relief Type"
+    )
+    barangay = forms.CharField(max_length=100, required=False, label="Barangay")
+    date_from = forms.DateField(required=False, input_formats=['%Y-%m-%d'], label="From")
+    date_to = forms.DateField(required=False, input_formats=['%Y-%m-%d'], label="To")
+
+    def error_summary(self):
+        return ' '.join(
+            f"{self.fields[name].label}: {' '.join(errors)}" if name in self.fields else ' '.join(errors)
+            for name, errors in self.errors.items()
+        )
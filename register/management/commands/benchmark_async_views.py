@@ -0,0 +1,124 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from register import views
+from register.models import User
+from register.profiling import percentile
+
+# Both versions of each page side by side; the project URLs are included so templates can reverse names
+PAGES = {
+    'dashboard': (views.custom_admin_dashboard, views.custom_admin_dashboard_async),
+    'analytics': (views.analytics_view, views.analytics_view_async),
+}
+urlpatterns = [
+    *(path(f'benchmark/sync/{page}/', sync_view) for page, (sync_view, _) in PAGES.items()),
+    *(path(f'benchmark/async/{page}/', async_view) for page, (_, async_view) in PAGES.items()),
+    path('', include('MyReliefSystem.urls')),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the sync admin dashboard and analytics views served the WSGI way with their '
+        'async versions served the ASGI way (concurrent queries, see register/parallel.py). '
+        'Use --latency to model a database across the network, where the async views gain.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per page and path')
+        parser.add_argument('--concurrency', type=int, default=10, help='Simultaneous requests in the ASGI load test')
+        parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds added to every query')
+        parser.add_argument('--search', default='', help='Dashboard search term (adds the resident search query)')
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(role='Admin').order_by('userid').first()
+        if admin is None:
+            raise CommandError('Needs an admin; run seed_disaster first')
+        self.repeat = max(1, options['repeat'])
+        self.concurrency = max(1, options['concurrency'])
+        query = f'?search={options["search"]}' if options['search'] else ''
+
+        if options['latency']:
+            self.add_latency(options['latency'] / 1000)
+
+        with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            client.force_login(admin)
+            for page in PAGES:
+                sync_url = f'/benchmark/sync/{page}/{query}'
+                async_url = f'/benchmark/async/{page}/{query}'
+                rows = [
+                    ('sync view, WSGI', self.time_wsgi(client, sync_url), None),
+                    ('sync view, ASGI', *async_to_sync(self.time_asgi)(client, sync_url)),
+                    ('async view, ASGI', *async_to_sync(self.time_asgi)(client, async_url)),
+                ]
+                self.stdout.write(f'\n{page} ({self.repeat} requests each; load test: {self.concurrency} at a time)')
+                for label, timings, load in rows:
+                    line = f'  {label:18s} p50 {statistics.median(timings):8.2f} ms  p95 {percentile(timings, 0.95):8.2f} ms'
+                    if load is not None:
+                        line += f'  {load:8.1f} requests/s under load'
+                    self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nDatabase: {connection.vendor}, {options["latency"]:g} ms added per query'
+        ))
+
+    def add_latency(self, seconds):
+        def slow_down(execute, sql, params, many, context):
+            time.sleep(seconds)
+            return execute(sql, params, many, context)
+
+        def install(connection, **kwargs):
+            # Also sent when a closed connection reconnects, which keeps its wrappers
+            if slow_down not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_down)
+
+        # This thread's connection, and the ones worker threads open later
+        install(connection)
+        connection_created.connect(install, weak=False)
+
+    def fetch(self, client, url):
+        response = client.get(url, secure=True)
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+
+    def time_wsgi(self, client, url):
+        self.fetch(client, url)
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            self.fetch(client, url)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    async def time_asgi(self, sync_client, url):
+        """Sequential timings, then requests per second with `concurrency` requests in flight."""
+        client = AsyncClient()
+        client.cookies = sync_client.cookies
+
+        async def fetch():
+            response = await client.get(url, secure=True)
+            if response.status_code != 200:
+                raise CommandError(f'{url} answered {response.status_code}')
+
+        await fetch()
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            await fetch()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for _ in range(self.repeat):
+            await asyncio.gather(*(fetch() for _ in range(self.concurrency)))
+        load = self.repeat * self.concurrency / (time.perf_counter() - started)
+        return timings, load
@@ -0,0 +1,88 @@
+import os
+import time
+import tracemalloc
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+
+from register import utils
+
+
+class SlowLocalStorage(utils.LocalStorage):
+    """Local storage with a fixed delay standing in for the remote round trips."""
+    latency = 0.0
+
+    def save(self, file_name, path, content_type):
+        time.sleep(self.latency)
+        return super().save(file_name, path, content_type)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the request-thread cost of storing an ID proof: the old read-everything, '
+        'synchronous upload vs the chunked spool + background upload. Uses local storage.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=20, help='Size of the generated upload')
+        parser.add_argument('--latency-ms', type=int, default=500, help='Simulated storage round trip')
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * 1024 * 1024
+        SlowLocalStorage.latency = options['latency_ms'] / 1000
+        storage = SlowLocalStorage(bucket='id_proof_benchmark')
+        stored = []
+
+        # What Django hands the view for anything over FILE_UPLOAD_MAX_MEMORY_SIZE
+        upload = TemporaryUploadedFile('proof.jpg', 'image/jpeg', size, None)
+        block = os.urandom(1024 * 1024)
+        for _ in range(size // len(block)):
+            upload.write(block)
+        upload.seek(0)
+
+        def legacy():
+            # The old upload_to_supabase: whole file in memory, then a blocking upload
+            upload.seek(0)
+            file_bytes = upload.read()
+            path = utils.spool_upload(upload)  # stands in for sending file_bytes
+            try:
+                stored.append(storage.save(utils.id_proof_file_name(upload, 'bench'), path, upload.content_type))
+            finally:
+                os.unlink(path)
+            del file_bytes
+
+        def streamed():
+            upload.seek(0)
+            path = utils.spool_upload(upload)
+            future = utils._get_upload_executor().submit(
+                lambda: stored.append(storage.save(utils.id_proof_file_name(upload, 'bench'), path, upload.content_type))
+            )
+            return path, future
+
+        legacy_ms, legacy_peak, _ = self.measure(legacy)
+        streamed_ms, streamed_peak, (path, future) = self.measure(streamed)
+        future.result()
+        os.unlink(path)
+        upload.close()
+
+        for url in stored:
+            name = url.rsplit('/', 1)[-1]
+            os.unlink(os.path.join(utils.settings.MEDIA_ROOT, storage.bucket, name))
+        try:
+            os.rmdir(os.path.join(utils.settings.MEDIA_ROOT, storage.bucket))
+        except OSError:
+            pass
+
+        self.stdout.write(f'{options["size_mb"]} MB upload, {options["latency_ms"]} ms storage latency')
+        self.stdout.write(f'read + synchronous upload: {legacy_ms:8.1f} ms in the request, peak {legacy_peak / 1024 / 1024:6.1f} MB')
+        self.stdout.write(f'spool + background upload: {streamed_ms:8.1f} ms in the request, peak {streamed_peak / 1024 / 1024:6.1f} MB')
+        self.stdout.write(self.style.SUCCESS('Done (benchmark files removed)'))
+
+    def measure(self, func):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak, result
@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from register.models import User
+from register.throttle import STATS_KEYS, _key, get_setting, throttle_stats
+
+# A private cache for the run, so the real one (shared with the app when file-based) is left alone
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-login-throttle',
+    }
+}
+USERNAME = 'throttle_bench'
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate a password-guessing attack on /login/ and compare the CPU spent '
+        'with and without login throttling. The scratch user is rolled back; the throttle '
+        'counters go to a private in-memory cache and are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200, help='Bad-password POSTs per run')
+        parser.add_argument('--ips', type=int, default=1, help='Distinct client IPs the attempts rotate through')
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        ips = max(1, options['ips'])
+
+        with transaction.atomic():
+            User.objects.create_user(
+                username=USERNAME, password='correct-horse-battery',
+                firstname='Throttle', lastname='Bench', contact='09000000000',
+            )
+
+            throttle = {
+                name: get_setting(name)
+                for name in ('WINDOW', 'IP_LIMIT', 'USERNAME_LIMIT', 'NUM_PROXIES')
+            }
+            results = {}
+            started = time.time()
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                for enabled in (False, True):
+                    # The test client sends Host: testserver
+                    with override_settings(
+                        LOGIN_THROTTLE={**throttle, 'ENABLED': enabled},
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                    ):
+                        results[enabled] = self.attack(attempts, ips)
+                stats = throttle_stats()
+                cache.delete_many(self.created_keys(ips, throttle['WINDOW'], started, time.time()))
+            transaction.set_rollback(True)
+
+        for enabled, (cpu, wall, codes) in results.items():
+            label = 'throttled  ' if enabled else 'unthrottled'
+            summary = ', '.join(f'{count}x {code}' for code, count in sorted(codes.items()))
+            self.stdout.write(
+                f'{label}: {cpu:.2f}s CPU, {wall:.2f}s wall, '
+                f'{cpu / attempts * 1000:.1f} ms CPU per attempt ({summary})'
+            )
+        if results[True][0]:
+            self.stdout.write(f'CPU saved: {results[False][0] / results[True][0]:.1f}x')
+        self.stdout.write(f'Throttle counters: {stats}')
+        self.stdout.write(self.style.SUCCESS('Done (scratch user rolled back)'))
+
+    def attack(self, attempts, ips):
+        client = Client()
+        codes = {}
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        for i in range(attempts):
+            response = client.post(
+                '/login/',
+                {'username': USERNAME, 'password': f'guess-{i}'},
+                REMOTE_ADDR=self.ip(i % ips),
+            )
+            codes[response.status_code] = codes.get(response.status_code, 0) + 1
+        return time.process_time() - cpu_start, time.perf_counter() - wall_start, codes
+
+    def ip(self, index):
+        return f'10.0.{index // 256}.{index % 256}'
+
+    def created_keys(self, ips, window, started, finished):
+        """The throttle counters the attack can have written: its IPs and username in every window it touched."""
+        identities = [('ip', self.ip(index)) for index in range(ips)] + [('username', USERNAME)]
+        windows = range(int(started // window), int(finished // window) + 1)
+        return [_key(scope, identity, index) for scope, identity in identities for index in windows] + [
+            f'login_throttle:stats:{name}' for name in STATS_KEYS
+        ]
@@ -0,0 +1,78 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from register.models import Inventory, Notification, notify_low_stock
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the low stock alert check (old message substring scan vs keyed upsert) '
+        'against a large Notification table. All seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Filler notifications to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per method')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            item = Inventory.objects.create(name='Benchmark Item', category='Others', quantity=5, created_at=timezone.now())
+            self.stdout.write(f'Seeding {rows} notifications...')
+            self.seed(rows)
+
+            def legacy_check():
+                # What check_inventory_stock did before alerts were keyed by item
+                exists = Notification.objects.filter(
+                    notification_type='low_stock',
+                    message__contains=item.name,
+                    is_read=False
+                ).exists()
+                if not exists:
+                    Notification.objects.create(
+                        notification_type='low_stock',
+                        title='Low Stock Alert',
+                        message=f'Inventory item "{item.name}" is running low. Only {item.quantity} items remaining.'
+                    )
+
+            legacy_ms = self.time_it(legacy_check, repeat)
+            keyed_ms = self.time_it(lambda: notify_low_stock(item), repeat)
+
+            alerts = Notification.objects.filter(inventory_item=item, is_read=False).count()
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'message__contains scan: {legacy_ms:.2f} ms per check')
+        self.stdout.write(f'keyed upsert:           {keyed_ms:.2f} ms per check')
+        if keyed_ms:
+            self.stdout.write(f'Speedup: {legacy_ms / keyed_ms:.1f}x')
+        self.stdout.write(self.style.SUCCESS(f'Unread alerts for the item after {repeat} checks: {alerts} (rolled back)'))
+
+    def seed(self, rows, batch_size=10_000):
+        types = ['distribution', 'relief_request', 'low_stock', 'update']
+        created = 0
+        while created < rows:
+            size = min(batch_size, rows - created)
+            Notification.objects.bulk_create([
+                Notification(
+                    notification_type=types[(created + i) % len(types)],
+                    title='Filler',
+                    message=f'Filler notification {created + i} about some other item or household',
+                    is_read=(created + i) % 3 != 0,
+                )
+                for i in range(size)
+            ])
+            created += size
+
+    def time_it(self, check, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            check()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from register.models import User
+from register.search import backend_name, legacy_search_filter, search_users
+
+
+class Command(BaseCommand):
+    help = 'Compare the indexed resident search against the old icontains Q-chain on the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*', help='Search terms to time (defaults to a few samples from the data)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per term and method')
+        parser.add_argument('--limit', type=int, default=50, help='Rows fetched per query, like one page of results')
+
+    def handle(self, *args, **options):
+        terms = options['terms'] or self.sample_terms()
+        if not terms:
+            self.stdout.write(self.style.WARNING('No family heads found; seed some data or pass terms explicitly'))
+            return
+
+        families = User.objects.filter(role='FamilyHead')
+        self.stdout.write(f'Backend: {backend_name()}, family heads: {families.count()}')
+
+        for term in terms:
+            legacy = families.filter(legacy_search_filter(term)).order_by('-userid')
+            indexed = search_users(families, term).order_by('-search_rank', '-userid')
+
+            legacy_ms, legacy_rows = self.time_query(legacy, options['repeat'], options['limit'])
+            indexed_ms, indexed_rows = self.time_query(indexed, options['repeat'], options['limit'])
+
+            speedup = legacy_ms / indexed_ms if indexed_ms else float('inf')
+            self.stdout.write(
+                f'{term!r}: Q-chain {legacy_ms:.2f} ms ({legacy_rows} rows) | '
+                f'index {indexed_ms:.2f} ms ({indexed_rows} rows) | {speedup:.1f}x'
+            )
+
+    def sample_terms(self):
+        sample = User.objects.filter(role='FamilyHead').order_by('?').values('lastname', 'contact', 'address').first()
+        if not sample:
+            return []
+        terms = [sample['lastname'], sample['contact'][-4:]]
+        address_words = [word for word in sample['address'].split() if len(word) >= 3]
+        if address_words:
+            terms.append(address_words[0])
+        return list(dict.fromkeys(term for term in terms if term))
+
+    def time_query(self, queryset, repeat, limit):
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = len(list(queryset[:limit]))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), rows
@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from register import utils
+from register.fake_supabase import FakeSupabaseClient
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a lookup-heavy verification workload against the in-memory Supabase client '
+        'with simulated latency: uncached, cached, and cached batch (get_many) lookups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Rows in the fake Register table')
+        parser.add_argument('--lookups', type=int, default=1000, help='Lookups replayed')
+        parser.add_argument('--unknown', type=float, default=0.2, help='Share of lookups for usernames not in the table')
+        parser.add_argument('--latency-ms', type=int, default=20, help='Simulated round trip')
+
+    def handle(self, *args, **options):
+        fake = FakeSupabaseClient(latency=options['latency_ms'] / 1000)
+        fake.tables[utils.SUPABASE_TABLE] = [
+            {'id': i, 'username': f'resident{i}', 'address': 'Somewhere', 'contact': f'09{i:09d}'}
+            for i in range(options['users'])
+        ]
+        utils.set_supabase_client(fake)
+
+        rng = random.Random(42)
+        workload = [
+            f'unknown{rng.randrange(options["users"])}' if rng.random() < options['unknown']
+            else f'resident{int(rng.paretovariate(1.2)) % options["users"]}'
+            for _ in range(options['lookups'])
+        ]
+
+        def uncached():
+            for username in workload:
+                utils.supabase_row_cache.clear()
+                utils.get_from_supabase_table(username)
+
+        def cached():
+            for username in workload:
+                utils.get_from_supabase_table(username)
+
+        def batched():
+            for start in range(0, len(workload), 50):
+                utils.get_many_from_supabase_table(workload[start:start + 50])
+
+        self.stdout.write(f'{len(workload)} lookups, {len(set(workload))} distinct usernames, {options["latency_ms"]} ms round trip')
+        for label, run in (('uncached', uncached), ('cached', cached), ('cached get_many, 50 per call', batched)):
+            utils.supabase_row_cache.clear()
+            before = fake.round_trips
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            stats = utils.supabase_cache_stats()
+            self.stdout.write(
+                f'{label:30s} {elapsed:7.2f}s  {fake.round_trips - before:5d} round trips  '
+                f'hit rate {stats["hit_rate"]:.0%} (negative hits {stats["negative_hits"]})'
+            )
+
+        utils.set_supabase_client(None)
+        self.stdout.write(self.style.SUCCESS('Done'))
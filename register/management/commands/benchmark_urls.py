@@ -0,0 +1,221 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils import timezone
+
+from register.exports import DATASETS
+from register.models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from register.notifications import invalidate_unread_count
+from register.profiling import RequestProfile, percentile
+
+# Who makes the request; everything else is requested by an admin
+ANONYMOUS = {'home', 'login', 'logout', 'register', 'register_success', 'admin_login', 'view_only_dashboard'}
+RESIDENT = {'dashboard', 'create_relief_request'}
+
+# Endpoints that only act on POST, with the form data the pages send
+POST_DATA = {
+    'approve_request': {'relief_given': 'on'},
+    'deny_request': {'admin_notes': 'Benchmark'},
+    'bulk_review_requests': {'action': 'approve', 'scope': 'filter'},
+    'mark_relief_given': {},
+    'mark_relief_not_given': {},
+    'mark_notification_read': {},
+    'create_relief_request': {'relief_type': 'Food', 'notes': 'Benchmark'},
+}
+
+DEFAULT_OUTPUT_DIR = os.path.join(settings.BASE_DIR, 'benchmark-results')
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every named URL in the project through the test client and record p50/p95 '
+        'latency and query counts to a JSON file. Each request runs in a transaction that is '
+        'rolled back, so pages that write (approve, delete, ...) leave the data as it was.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Only these URL names')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per URL')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per URL first (fills caches)')
+        parser.add_argument('--output', help=f'JSON file to write (default: {DEFAULT_OUTPUT_DIR}/urls-<time>.json)')
+        parser.add_argument('--compare', help='Earlier JSON result to print changes against')
+
+    def handle(self, *args, **options):
+        samples = self.sample_objects()
+        urls = self.collect_urls(samples, options['names'])
+        if not urls:
+            raise CommandError('No URLs to benchmark')
+
+        clients = {
+            'admin': Client(),
+            'resident': Client(),
+            'anonymous': Client(),
+        }
+        clients['admin'].force_login(samples['admin'])
+        session = clients['resident'].session
+        session['user'] = {'userid': samples['resident'].userid, 'role': samples['resident'].role}
+        session.save()
+
+        results = []
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, url, who, method, data in urls:
+                result = self.benchmark(clients[who], url, method, data, options['warmup'], max(1, options['repeat']))
+                result.update({'name': name, 'url': url, 'method': method, 'as': who})
+                results.append(result)
+                self.stdout.write(
+                    f'{method:4s} {url:50s} {result["status"]:3d}  p50 {result["p50_ms"]:8.2f} ms  '
+                    f'p95 {result["p95_ms"]:8.2f} ms  {result["queries"]:3d} queries'
+                )
+        # Writes were rolled back, but the cached unread count may have been refreshed mid-request
+        invalidate_unread_count()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'git_commit': self.git_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'repeat': options['repeat'],
+            'rows': {
+                model.__name__: model.objects.count()
+                for model in (User, Inventory, ReliefDistribution, ReliefRequest, Notification)
+            },
+            'results': results,
+        }
+
+        output = options['output'] or os.path.join(
+            DEFAULT_OUTPUT_DIR, f'urls-{timezone.now().strftime("%Y%m%d-%H%M%S")}.json'
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} URLs benchmarked; results written to {output}'))
+
+    def sample_objects(self):
+        """The rows the parameterised URLs point at: the busiest household, a pending request, ..."""
+        admin = User.objects.filter(role='Admin').order_by('userid').first()
+        busiest = (
+            ReliefDistribution.objects.values('user_id').order_by()
+            .annotate(total=Count('id')).order_by('-total').first()
+        )
+        resident = (
+            User.objects.get(userid=busiest['user_id']) if busiest
+            else User.objects.filter(role='FamilyHead').order_by('userid').first()
+        )
+        if admin is None or resident is None:
+            raise CommandError('Needs at least one admin and one family head; run seed_disaster first')
+
+        relief_request = (
+            ReliefRequest.objects.filter(status='pending').order_by('-request_date').first()
+            or ReliefRequest.objects.order_by('-request_date').first()
+        )
+        item = Inventory.objects.order_by('id').first()
+        notification = Notification.objects.order_by('-created_at').first()
+        return {
+            'admin': admin,
+            'resident': resident,
+            'user_id': resident.userid,
+            'item_id': item.id if item else 0,
+            'request_id': relief_request.id if relief_request else 0,
+            'notification_id': notification.id if notification else 0,
+        }
+
+    def collect_urls(self, samples, names):
+        """(name, url, who, method, data) for every named URL pattern outside the Django admin."""
+        urls = []
+        for pattern in get_resolver().url_patterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue  # the Django admin site and static/media routes
+            if names and pattern.name not in names:
+                continue
+            who = 'anonymous' if pattern.name in ANONYMOUS else 'resident' if pattern.name in RESIDENT else 'admin'
+            method = 'POST' if pattern.name in POST_DATA else 'GET'
+            data = POST_DATA.get(pattern.name, {})
+
+            kwarg_names = list(pattern.pattern.converters)
+            if kwarg_names == ['dataset']:
+                # One entry per export
+                for dataset in DATASETS:
+                    urls.append((pattern.name, reverse(pattern.name, kwargs={'dataset': dataset}), who, method, data))
+                continue
+            kwargs = {kwarg: samples[kwarg] for kwarg in kwarg_names}
+            urls.append((pattern.name, reverse(pattern.name, kwargs=kwargs), who, method, data))
+        return urls
+
+    def benchmark(self, client, url, method, data, warmup, repeat):
+        timings = []
+        db_timings = []
+        query_counts = []
+        status = None
+        for run in range(warmup + repeat):
+            # Counted by an execute wrapper: unlike the debug query log it has no 9000-query cap
+            profile = RequestProfile()
+            with transaction.atomic(), connection.execute_wrapper(profile):
+                started = time.perf_counter()
+                if method == 'POST':
+                    response = client.post(url, data, secure=True)
+                else:
+                    response = client.get(url, secure=True)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            status = response.status_code
+            if run >= warmup:
+                timings.append(elapsed * 1000)
+                db_timings.append(profile.db_time * 1000)
+                query_counts.append(profile.queries)
+        return {
+            'status': status,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'max_ms': round(max(timings), 2),
+            'db_p50_ms': round(statistics.median(db_timings), 2),
+            'queries': int(statistics.median(query_counts)),
+            'max_queries': max(query_counts),
+        }
+
+    def compare(self, path, results):
+        try:
+            with open(path) as handle:
+                previous = {(row['method'], row['url']): row for row in json.load(handle)['results']}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        self.stdout.write(f'\nChanges against {path}:')
+        for row in results:
+            before = previous.get((row['method'], row['url']))
+            if before is None:
+                self.stdout.write(f'{row["method"]:4s} {row["url"]:50s} (new)')
+                continue
+            change = (row['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+            line = (
+                f'{row["method"]:4s} {row["url"]:50s} p50 {before["p50_ms"]:8.2f} -> {row["p50_ms"]:8.2f} ms '
+                f'({change:+.0f}%)  queries {before["queries"]} -> {row["queries"]}'
+            )
+            if change > 20 or row['queries'] > before['queries']:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
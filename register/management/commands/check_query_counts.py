@@ -0,0 +1,240 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_databases, teardown_databases
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from register.models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from register.notifications import invalidate_unread_count
+from register.profiling import recent_profiles
+
+
+def admin_views(resident, item):
+    """(url name, args) of every admin page and admin JSON endpoint that answers a GET."""
+    return [
+        ('admin_dashboard', ()),
+        ('manage_users', ()),
+        ('user_distribution_history', (resident.userid,)),
+        ('update_user', (resident.userid,)),
+        ('mark_distributed', (resident.userid,)),
+        ('bulk_distribute', ()),
+        ('manage_inventory', ()),
+        ('update_inventory', (item.id,)),
+        ('view_distributions', ()),
+        ('pending_requests', ()),
+        ('approved_requests', ()),
+        ('analytics', ()),
+        ('analytics_series', ()),
+        ('reports', ()),
+        ('export_data', ('distributions',)),
+        ('export_data', ('requests',)),
+        ('export_data', ('residents',)),
+        ('notifications', ()),
+        ('get_notifications_ajax', ()),
+        ('profiling', ()),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Guard against N+1 queries: request every admin view with a few rows of data and "
+        "again with more rows, and fail if any view's query count grows with the row count. "
+        "All seeded rows are rolled back. Async views (ASYNC_ADMIN_VIEWS=True) are counted a second "
+        "time on a throwaway test database, outside a transaction, where their reads run concurrently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*', help='Only check these URL names')
+        parser.add_argument('--small', type=int, default=3, help='Rows of each kind in the first pass')
+        parser.add_argument('--large', type=int, default=15, help='Rows of each kind in the second pass (within one page)')
+        parser.add_argument('--skip-concurrent', action='store_true',
+                            help='Skip the async views pass (it creates a test database, which needs CREATEDB on PostgreSQL)')
+
+    def handle(self, *args, **options):
+        if options['large'] <= options['small']:
+            raise CommandError('--large must be more than --small')
+
+        client = Client()
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=['testserver']):
+            views, small, large = self.count_all(client, options, self.count_queries)
+            cascades = [('delete item (cascade)', ()), ('delete family head (cascade)', ())]
+            cascade_small = dict(zip(cascades, self.count_cascade_deletes(options['small'])))
+            cascade_large = dict(zip(cascades, self.count_cascade_deletes(options['large'])))
+            transaction.set_rollback(True)
+        # The cached unread count may include the rolled-back notifications
+        invalidate_unread_count()
+
+        failures = self.report(views, small, large, options)
+        failures += self.report(cascades, cascade_small, cascade_large, options)
+
+        # Inside the transaction above gather_queries() runs one query at a time on the request's connection
+        concurrent = [view for view in views if iscoroutinefunction(resolve(reverse(view[0], args=view[1])).func)]
+        if concurrent and not options['skip_concurrent']:
+            self.stdout.write('\nAsync views, outside a transaction (test database, counted by the view profiler):')
+            old_config = setup_databases(
+                verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set(),
+            )
+            try:
+                with override_settings(ALLOWED_HOSTS=['testserver'], VIEW_PROFILING={**settings.VIEW_PROFILING, 'ENABLED': True}):
+                    names = {view[0] for view in concurrent}
+                    _, concurrent_small, concurrent_large = self.count_all(
+                        Client(), {**options, 'views': names}, self.profile_queries,
+                    )
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                invalidate_unread_count()
+            failures += self.report(list(concurrent_small), concurrent_small, concurrent_large, options)
+            for view in concurrent_small:
+                # Same view, same rows: the worker threads' queries must be counted too
+                if view in small and concurrent_small[view] != small[view]:
+                    label = self.label(view)
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(
+                        f'FAIL {label}: {concurrent_small[view]} queries counted concurrently, {small[view]} one by one'
+                    ))
+
+        if failures:
+            raise CommandError(f'Query counts grow with the number of rows, or go uncounted, in: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS(f'{len(views)} views run a constant number of queries (rolled back)'))
+
+    def count_all(self, client, options, count):
+        """Query counts of every view with `small` and then `large` rows of each kind."""
+        admin = User.objects.create(
+            username='querycheck-admin', firstname='Query', lastname='Check', contact='0',
+            password='!', role='Admin',
+        )
+        resident = User.objects.create(
+            username='querycheck-resident', firstname='Query', lastname='Resident', contact='0',
+            password='!', city='Cebu City', barangay='Lahug',
+        )
+        item = Inventory.objects.create(name='Query check item', category='Food', quantity=100, created_at=timezone.now())
+        client.force_login(admin)
+
+        views = admin_views(resident, item)
+        if options['views']:
+            views = [view for view in views if view[0] in options['views']]
+
+        self.seed(0, options['small'], admin, resident)
+        small = {view: count(client, *view) for view in views}
+        self.seed(options['small'], options['large'], admin, resident)
+        large = {view: count(client, *view) for view in views}
+        return views, small, large
+
+    def label(self, view):
+        return view[0] + ''.join(f' {arg}' for arg in view[1])
+
+    def report(self, views, small, large, options):
+        failures = []
+        for view in views:
+            label = self.label(view)
+            line = f'{label:40s} {small[view]:4d} queries with {options["small"]:3d} rows, {large[view]:4d} with {options["large"]:3d}'
+            if large[view] > small[view]:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'FAIL {line}'))
+            else:
+                self.stdout.write(f'ok   {line}')
+        return failures
+
+    def count_queries(self, client, name, args):
+        url = reverse(name, args=args)
+        # The first request fills the per-process caches (stats, unread count); count the second
+        self.fetch(client, url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.fetch(client, url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+        return len(queries)
+
+    def profile_queries(self, client, name, args):
+        """Like count_queries, but read from the view profiler, which also counts worker threads."""
+        url = reverse(name, args=args)
+        self.fetch(client, url)
+        response = self.fetch(client, url)
+        if response.status_code != 200:
+            raise CommandError(f'{url} answered {response.status_code}')
+        return recent_profiles()[0]['queries']
+
+    def fetch(self, client, url):
+        response = client.get(url, secure=True)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def count_cascade_deletes(self, rows):
+        """
+        Queries to delete an item distributed to `rows` households, and a family
+        head with `rows` distributions and requests: the cascaded rows' counters
+        and rollups must be updated per group, not per row.
+        """
+        now = timezone.now()
+        households = User.objects.bulk_create([
+            User(username=f'cascadecheck{rows}-{i}', firstname='Cascade', lastname='Check', contact='0', password='!',
+                 city='Cebu City', barangay=f'Barangay {i}')
+            for i in range(rows)
+        ])
+        item, other_item = (
+            Inventory.objects.create(name=f'Cascade check item {rows}-{i}', category='Food', quantity=100, created_at=now)
+            for i in range(2)
+        )
+        distributions = [
+            *(ReliefDistribution(user=household, item=item, quantity_distributed=1) for household in households),
+            *(ReliefDistribution(user=households[0], item=other_item, quantity_distributed=1) for _ in range(rows)),
+        ]
+        requests = [
+            ReliefRequest(user=households[0], relief_type=relief_type, status=status, reviewed_date=None if status == 'pending' else now)
+            for relief_type, status in zip(['Food', 'Shelter', 'Medicine'] * rows, ['pending', 'approved', 'denied'] * rows)
+        ][:rows]
+        for row in (*distributions, *requests):
+            # bulk_create skips save(), which normally snapshots the rollup dimensions
+            row.set_rollup_dimensions()
+        ReliefDistribution.objects.bulk_create(distributions)
+        ReliefRequest.objects.bulk_create(requests)
+
+        counts = []
+        for instance in (item, households[0]):
+            with CaptureQueriesContext(connection) as queries:
+                instance.delete()
+            counts.append(len(queries))
+        return counts
+
+    def seed(self, start, end, admin, resident):
+        """Rows start..end-1 of each kind: family heads with a pending and an approved request, distributions, notifications."""
+        now = timezone.now()
+        family_heads = [
+            User(
+                username=f'querycheck{i}', firstname='Query', lastname=f'Check{i}', address=f'{i} Test St',
+                city=f'City {i}', barangay=f'Barangay {i}', contact=f'09{i:09d}', password='!',
+            )
+            for i in range(start, end)
+        ]
+        for user in family_heads:
+            # bulk_create skips save(), which normally fills the search column
+            user.search_text = user.build_search_text()
+        User.objects.bulk_create(family_heads)
+
+        requests = [
+            request
+            for user in family_heads
+            for request in (
+                ReliefRequest(user=user, relief_type='Food', status='pending'),
+                ReliefRequest(user=user, relief_type='Shelter', status='approved', reviewed_by=admin, reviewed_date=now),
+            )
+        ]
+        distributions = [
+            ReliefDistribution(user=user, item=Inventory.objects.create(
+                name=f'Query check item {user.pk}', category='Medicine', quantity=5, created_at=now,
+            ), quantity_distributed=1, distributed_by=admin)
+            for user in (*family_heads, *[resident] * (end - start))
+        ]
+        for row in (*requests, *distributions):
+            # bulk_create skips save(), which normally snapshots the rollup dimensions
+            row.set_rollup_dimensions()
+        ReliefRequest.objects.bulk_create(requests)
+        ReliefDistribution.objects.bulk_create(distributions)
+        Notification.objects.bulk_create([
+            Notification(notification_type='relief_request', title='Query check', message='Query check', related_user=user)
+            for user in family_heads
+        ])
@@ -0,0 +1,163 @@
+import random
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from register.models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from register.pagination import encode_cursor, keyset_page_query
+from register.queries import (
+    approved_request_list, family_head_places, filter_distributions, filter_family_heads, household_distributions,
+    household_requests, latest_notifications, low_stock_items, pending_request_list, recent_family_heads,
+    registered_since, undelivered_requests_in_barangay, unread_notifications, users_with_contact,
+)
+from register.reviews import filter_pending_requests
+
+# Tables seeded below; a full scan of any of them is a regression
+SEEDED_TABLES = [model._meta.db_table for model in (User, Inventory, ReliefDistribution, ReliefRequest, Notification)]
+
+BARANGAYS = ['Lahug', 'Talamban', 'Banilad', 'Guadalupe', 'Mabolo', 'Apas', 'Kasambagan', 'Capitol Site']
+CITIES = ['Cebu City', 'Mandaue City', 'Lapu-Lapu City']
+
+
+def view_queries(resident, contact):
+    """The main query of each view (named after the view), from the same helpers the views use."""
+    since = timezone.now() - timedelta(days=30)
+    users, ordering = filter_family_heads({})
+    next_cursor = encode_cursor([resident.userid])
+    search = {'search': resident.lastname}
+    ranked, rank_ordering = filter_family_heads(search)
+    ranked_page = list(keyset_page_query(ranked, rank_ordering, page_size=1))
+    ranked_cursor = encode_cursor([getattr(ranked_page[0], field) for field in rank_ordering]) if ranked_page else None
+    return [
+        ('admin_dashboard: recent family heads', recent_family_heads()[:10]),
+        ('manage_users: first page', keyset_page_query(users, ordering)),
+        ('manage_users: next page', keyset_page_query(users, ordering, next_cursor)),
+        ('manage_users: search, first page', keyset_page_query(ranked, rank_ordering)),
+        ('manage_users: search, next page', keyset_page_query(ranked, rank_ordering, ranked_cursor)),
+        ('manage_users: city dropdown', family_head_places('city')),
+        ('register: duplicate contact', users_with_contact(contact)),
+        ('reports: new registrations', registered_since(since).order_by('-date_joined')[:20]),
+        ('dashboard: own requests', household_requests(resident)),
+        ('dashboard: own pending request', household_requests(resident).filter(status='pending')[:1]),
+        ('pending_requests: list', pending_request_list({})),
+        ('stats: pending count', filter_pending_requests({}).order_by().values('id')),
+        ('approved_requests: list', approved_request_list()[:50]),
+        ('bulk_distribute: barangay mode', undelivered_requests_in_barangay(resident.barangay).values_list('id', 'user_id')),
+        ('notifications: list', latest_notifications()[:50]),
+        ('notifications: unread dropdown', unread_notifications()[:10]),
+        ('notifications: unread count', unread_notifications().order_by().values('id')),
+        ('reports: low stock', low_stock_items()),
+        ('view_distributions: first page', keyset_page_query(filter_distributions({}), ['distribution_date', 'id'])),
+        ('user_detail: distributions', household_distributions(resident)),
+        ('user_distribution_history: first page', keyset_page_query(
+            household_distributions(resident.userid).select_related('distributed_by'), ['distribution_date', 'id']
+        )),
+    ]
+
+
+def sequential_scans(plan):
+    """Tables the plan reads in full (SQLite `SCAN table` / PostgreSQL `Seq Scan on table`)."""
+    if connection.vendor == 'postgresql':
+        found = re.findall(r'Seq Scan on (\w+)', plan)
+    else:
+        # "SCAN t USING [COVERING] INDEX i" walks an index in order and stops at the LIMIT; only a bare SCAN reads the table
+        found = re.findall(r'\bSCAN (\w+)(?! USING)(?:\s|$)', plan)
+    return sorted(set(table for table in found if table in SEEDED_TABLES))
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large data set, EXPLAIN the main query of each view and fail if any of "
+        "them falls back to a sequential scan. All seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20_000, help='Family heads to seed')
+        parser.add_argument('--per-user', type=int, default=3, help='Requests, distributions and notifications per family head')
+        parser.add_argument('--show-plans', action='store_true', help='Print every plan, not only the failing ones')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f'Query plans are only checked on SQLite and PostgreSQL, not {connection.vendor}')
+
+        failures = []
+        with transaction.atomic():
+            self.stdout.write(f'Seeding {options["users"]} family heads...')
+            resident, contact = self.seed(options['users'], options['per_user'])
+            self.analyze()
+
+            for name, queryset in view_queries(resident, contact):
+                plan = queryset.explain()
+                scans = sequential_scans(plan)
+                if scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'FAIL {name}: sequential scan of {", ".join(scans)}'))
+                else:
+                    self.stdout.write(f'ok   {name}')
+                if scans or options['show_plans']:
+                    self.stdout.write('       ' + plan.replace('\n', '\n       '))
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} quer{"y" if len(failures) == 1 else "ies"} fell back to a sequential scan')
+        self.stdout.write(self.style.SUCCESS('All view queries use an index (rolled back)'))
+
+    def seed(self, users, per_user, batch_size=5000):
+        rng = random.Random(42)
+        now = timezone.now()
+
+        family_heads = []
+        for i in range(users):
+            user = User(
+                username=f'plancheck{i}', firstname='Plan', lastname=f'Check{i}', address=f'{i} Test St',
+                city=rng.choice(CITIES), barangay=rng.choice(BARANGAYS), contact=f'09{i:09d}', password='!',
+                date_joined=now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+            )
+            user.search_text = user.build_search_text()
+            family_heads.append(user)
+        User.objects.bulk_create(family_heads, batch_size=batch_size)
+        user_ids = list(User.objects.filter(username__startswith='plancheck').values_list('userid', flat=True))
+
+        items = Inventory.objects.bulk_create([
+            Inventory(name=f'Plan check item {i}', category=rng.choice(Inventory.CATEGORY_CHOICES)[0],
+                      quantity=rng.choice([rng.randrange(11), *[rng.randrange(50, 5000)] * 19]), created_at=now)
+            for i in range(2000)
+        ])
+
+        rows = users * per_user
+        # Mostly settled history: a few pending, a few approved but not handed out yet, few unread
+        requests = []
+        for _ in range(rows):
+            status = rng.choices(['pending', 'approved', 'denied'], [2, 80, 18])[0]
+            requests.append(ReliefRequest(
+                user_id=rng.choice(user_ids), relief_type=rng.choice(ReliefRequest.RELIEF_TYPE_CHOICES)[0],
+                status=status, reviewed_date=None if status == 'pending' else now - timedelta(hours=rng.randrange(20_000)),
+                relief_given=status == 'approved' and rng.random() < 0.9,
+            ))
+        ReliefRequest.objects.bulk_create(requests, batch_size=batch_size)
+
+        ReliefDistribution.objects.bulk_create([
+            ReliefDistribution(user_id=rng.choice(user_ids), item=rng.choice(items), quantity_distributed=1)
+            for _ in range(rows)
+        ], batch_size=batch_size)
+
+        Notification.objects.bulk_create([
+            Notification(notification_type='distribution', title='Plan check', message='Plan check',
+                         is_read=rng.random() > 0.01)
+            for _ in range(rows)
+        ], batch_size=batch_size)
+
+        resident = User.objects.get(userid=user_ids[len(user_ids) // 2])
+        return resident, resident.contact
+
+    def analyze(self):
+        # Fresh planner statistics, as a long-running database would have
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for table in SEEDED_TABLES:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+            else:
+                cursor.execute('ANALYZE')
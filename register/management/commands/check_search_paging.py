@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from register.models import User
+from register.pagination import keyset_paginate
+from register.search import backend_name, search_users
+
+TERM = 'pagecheck'
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that ranked search results page without gaps or repeats when ranks tie: walking '
+        'manage_users-style keyset pages must give the same rows as one ordered query. Meant for '
+        'PostgreSQL, where the trigram rank is a real; other backends run it as a sanity check. '
+        'Seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=60, help='Matching family heads to seed')
+        parser.add_argument('--page-size', type=int, default=7, help='Rows per page (small, so pages end inside ties)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'Backend {backend_name()}: the real-typed rank this guards against is PostgreSQL-only'
+            ))
+
+        with transaction.atomic():
+            # Two rank groups, every row in a group tied: an exact word match and a longer word containing it
+            residents = [
+                User(username=f'pagecheck{i}', firstname='Page', lastname=TERM if i % 2 else f'{TERM}ers',
+                     address=f'{i} Test St', city='Cebu City', barangay='Lahug', contact=f'08{i:09d}', password='!')
+                for i in range(options['rows'])
+            ]
+            for user in residents:
+                user.search_text = user.build_search_text()
+            User.objects.bulk_create(residents)
+
+            users = search_users(User.objects.filter(role='FamilyHead'), TERM)
+            ordering = ['search_rank', 'userid']
+            expected = list(users.order_by('-search_rank', '-userid').values_list('userid', flat=True))
+            ranks = set(users.values_list('search_rank', flat=True))
+
+            paged, cursor, pages = [], None, 0
+            while True:
+                rows, has_more, cursor = keyset_paginate(users, ordering, cursor, page_size=options['page_size'])
+                paged += [user.userid for user in rows]
+                pages += 1
+                if not has_more or pages > len(expected):
+                    break
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{len(expected)} matches in {len(ranks)} distinct ranks, {pages} pages of {options["page_size"]}'
+        )
+        if len(expected) < options['rows'] or len(ranks) >= len(expected):
+            raise CommandError('The seeded rows did not produce tied ranks; nothing was checked')
+        if paged != expected:
+            repeated = len(paged) - len(set(paged))
+            missing = len(set(expected) - set(paged))
+            raise CommandError(
+                f'Keyset pages differ from the ordered results: {missing} rows skipped, {repeated} repeated'
+            )
+        self.stdout.write(self.style.SUCCESS('Every page continued exactly after the previous one (rolled back)'))
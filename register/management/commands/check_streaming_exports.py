@@ -0,0 +1,83 @@
+import warnings
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncRequestFactory, RequestFactory
+
+from register import exports, views
+from register.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Check that the data exports stream: served both the WSGI and the ASGI way, the first '
+        'chunk must go out before the export has read all of its rows. Seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=3000, help='Family heads to seed (enough for several chunks)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            admin = User.objects.create(
+                username='streamcheck-admin', firstname='Stream', lastname='Check', contact='0',
+                password='!', role='Admin',
+            )
+            residents = [
+                User(username=f'streamcheck{i}', firstname='Stream', lastname=f'Check{i}', address=f'{i} Test St',
+                     city='Cebu City', barangay='Lahug', contact=f'09{i:09d}', password='!')
+                for i in range(options['rows'])
+            ]
+            for user in residents:
+                user.search_text = user.build_search_text()
+            User.objects.bulk_create(residents)
+            total = User.objects.filter(role='FamilyHead').count()
+
+            failures = []
+            for label, factory in (('WSGI', RequestFactory()), ('ASGI', AsyncRequestFactory())):
+                request = factory.get('/admin-panel/export/residents/')
+                request.user = admin
+                arrivals, caught = self.stream(request, asgi=label == 'ASGI')
+                line = f'{label}: first chunk after {arrivals[0]:,} of {total:,} rows, {len(arrivals)} chunks'
+                if arrivals[0] >= total or len(arrivals) < 2 or caught:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'FAIL {line}' + ''.join(f'; {w}' for w in caught)))
+                else:
+                    self.stdout.write(f'ok   {line}')
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'Exports are buffered instead of streamed under: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Exports stream under WSGI and ASGI (rolled back)'))
+
+    def stream(self, request, asgi):
+        """Rows read when each chunk arrived, and the warnings raised, for one export request."""
+        read = [0]
+        arrivals = []
+        export_lines = exports.export_lines
+
+        def counting_lines(*args, **kwargs):
+            for line in export_lines(*args, **kwargs):
+                read[0] += 1
+                yield line
+
+        with mock.patch.object(exports, 'export_lines', counting_lines), warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            response = views.export_data_view(request, 'residents')
+            if asgi:
+                # What the ASGI handler does with a streaming response
+                async def consume():
+                    async for _ in response:
+                        arrivals.append(read[0])
+                # Called from this thread, the chunks are read here too, inside the seeding transaction
+                async_to_sync(consume)()
+            else:
+                for _ in response.streaming_content:
+                    arrivals.append(read[0])
+        if not arrivals:
+            raise CommandError('The export sent nothing')
+        # The CSV header counts as a line
+        return [arrival - 1 for arrival in arrivals], [str(w.message) for w in caught]
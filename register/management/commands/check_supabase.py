@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from register import utils
+from register.fake_supabase import FakeSupabaseClient
+
+
+class Command(BaseCommand):
+    help = 'Make a few lookups against the Supabase Register table and print per-call latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Lookups to time')
+        parser.add_argument('--fake', action='store_true', help='Use the in-memory client (no network)')
+        parser.add_argument('--fake-latency-ms', type=int, default=50, help='Simulated round trip for --fake')
+
+    def handle(self, *args, **options):
+        if options['fake']:
+            utils.set_supabase_client(FakeSupabaseClient(latency=options['fake_latency_ms'] / 1000))
+
+        try:
+            client = utils.get_supabase()
+        except utils.SupabaseNotConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(f'Client: {type(client).__module__}.{type(client).__name__}')
+
+        for _ in range(options['repeat']):
+            try:
+                with utils.supabase_call('table.select') as client:
+                    client.table(utils.SUPABASE_TABLE).select('username').limit(1).execute()
+            except Exception as e:
+                self.stderr.write(f'Lookup failed: {e}')
+
+        for operation, stats in utils.supabase_metrics().items():
+            self.stdout.write(
+                f'{operation}: {stats["calls"]} calls, {stats["errors"]} errors, '
+                f'avg {stats["avg_ms"]} ms, p50 {stats["p50_ms"]} ms, '
+                f'p95 {stats["p95_ms"]} ms, max {stats["max_ms"]} ms'
+            )
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from register.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Turn queued outbox events into admin notifications, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new events')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the outbox is empty (with --loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+
+        try:
+            while True:
+                processed = drain_outbox(batch_size)
+                total += processed
+                if processed:
+                    self.stdout.write(f'Delivered {processed} event(s)')
+                if processed < batch_size:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f'Outbox drained ({total} event(s))'))
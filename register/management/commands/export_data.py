@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from register.exports import DATASETS, FORMATS, export_chunks, export_filename
+
+
+class Command(BaseCommand):
+    help = 'Stream a full table export (distributions, requests or residents) as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip')
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write ("-" for stdout). Defaults to myrelief_<dataset>.<format>[.gz]'
+        )
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        export_format = options['export_format']
+        compress = options['gzip']
+        output = options['output'] or export_filename(dataset, export_format, compress)
+
+        written = 0
+        if output == '-':
+            for chunk in export_chunks(dataset, export_format, compress):
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(output, 'wb') as f:
+            for chunk in export_chunks(dataset, export_format, compress):
+                f.write(chunk)
+                written += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} bytes to {output}'))
@@ -0,0 +1,172 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from register.forms import RegistrationForm
+from register.models import User, StatCounter, bump_stat, queue_supabase_sync
+from register.views import validate_name, validate_contact
+
+FIELDS = ['username', 'firstname', 'lastname', 'middlename', 'address', 'city', 'barangay', 'contact', 'password']
+
+
+def _init_worker():
+    # Needed when worker processes are spawned rather than forked
+    if not django.apps.apps.ready:
+        django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Bulk-register family heads from a CSV or JSONL file (same validation as the registration form)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=f'CSV with a header row or JSONL; fields: {", ".join(FIELDS)}')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], dest='input_format', help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows validated, hashed and inserted together')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes used for password hashing')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; nothing is written')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['input_format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        batch_size = options['batch_size']
+        self.workers = max(1, options['workers'])
+
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+
+        self.imported = 0
+        self.rejected = 0
+        self.hash_seconds = 0.0
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            batch = []
+            for line_number, row in self.read_rows(path, input_format):
+                batch.append((line_number, row))
+                if len(batch) >= batch_size:
+                    self.import_batch(batch, pool, options['dry_run'])
+                    batch = []
+            if batch:
+                self.import_batch(batch, pool, options['dry_run'])
+
+        elapsed = time.perf_counter() - started
+        rate = self.imported / elapsed if elapsed else 0
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(
+            f'{verb} {self.imported} residents, rejected {self.rejected}, '
+            f'in {elapsed:.1f}s ({rate:.0f} residents/s; {self.hash_seconds:.1f}s hashing '
+            f'on {self.workers} workers)'
+        )
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def read_rows(self, path, input_format):
+        with open(path, newline='', encoding='utf-8') as f:
+            if input_format == 'csv':
+                for line_number, row in enumerate(csv.DictReader(f), start=2):
+                    yield line_number, row
+            else:
+                for line_number, line in enumerate(f, start=1):
+                    if line.strip():
+                        try:
+                            yield line_number, json.loads(line)
+                        except json.JSONDecodeError as e:
+                            self.reject(line_number, f'invalid JSON ({e})')
+
+    def reject(self, line_number, reason):
+        self.rejected += 1
+        self.stderr.write(f'Line {line_number}: {reason}')
+
+    def validate(self, line_number, row):
+        """Same checks as register_view, minus the per-row database lookups."""
+        form = RegistrationForm({field: (row.get(field) or '') for field in FIELDS})
+        if not form.is_valid():
+            errors = '; '.join(f'{field}: {" ".join(messages)}' for field, messages in form.errors.items())
+            self.reject(line_number, errors)
+            return None
+
+        data = form.cleaned_data
+        if not validate_contact(data['contact']):
+            self.reject(line_number, 'The contact number must be exactly 11 digits.')
+            return None
+
+        for field in ('firstname', 'lastname', 'middlename'):
+            if not validate_name(data.get(field) or ''):
+                self.reject(line_number, f'The {field} contains invalid characters. Only letters and spaces are allowed.')
+                return None
+
+        return data
+
+    def import_batch(self, batch, pool, dry_run):
+        valid = []
+        for line_number, row in batch:
+            data = self.validate(line_number, row)
+            if data:
+                valid.append((line_number, data))
+
+        # One set-based lookup per batch for both uniqueness checks
+        usernames = {data['username'] for _, data in valid}
+        contacts = {data['contact'] for _, data in valid}
+        taken_usernames = set()
+        taken_contacts = set()
+        for username, contact in User.objects.filter(
+            Q(username__in=usernames) | Q(contact__in=contacts)
+        ).values_list('username', 'contact'):
+            taken_usernames.add(username)
+            taken_contacts.add(contact)
+
+        accepted = []
+        for line_number, data in valid:
+            if data['username'] in taken_usernames:
+                self.reject(line_number, 'This username is already taken.')
+            elif data['contact'] in taken_contacts:
+                self.reject(line_number, 'This contact number is already registered.')
+            else:
+                # Later rows in the same file may not reuse these either
+                taken_usernames.add(data['username'])
+                taken_contacts.add(data['contact'])
+                accepted.append(data)
+
+        if not accepted:
+            return
+        if dry_run:
+            self.imported += len(accepted)
+            return
+
+        # PBKDF2 is CPU bound: spread it across processes
+        started = time.perf_counter()
+        chunksize = max(1, len(accepted) // (self.workers * 4))
+        hashes = list(pool.map(make_password, [data['password'] for data in accepted], chunksize=chunksize))
+        self.hash_seconds += time.perf_counter() - started
+
+        users = []
+        for data, password_hash in zip(accepted, hashes):
+            user = User(
+                username=data['username'],
+                firstname=data['firstname'],
+                lastname=data['lastname'],
+                middlename=data.get('middlename', ''),
+                address=data['address'],
+                city=data['city'],
+                barangay=data['barangay'],
+                contact=data['contact'],
+                password=password_hash,
+                role='FamilyHead',
+            )
+            # bulk_create skips save(), which normally fills the search column
+            user.search_text = user.build_search_text()
+            users.append(user)
+
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            bump_stat(StatCounter.TOTAL_FAMILIES, len(users))
+            queue_supabase_sync([user.pk for user in users])
+
+        self.imported += len(users)
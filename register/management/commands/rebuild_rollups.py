@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from register.rollups import METRICS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily analytics rollups from the distribution and request tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD); default: all history')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD); default: today')
+        parser.add_argument('--metric', action='append', choices=METRICS, dest='metrics', help='Only these metrics (repeatable)')
+
+    def handle(self, *args, **options):
+        start = self.parse_day(options['start'], '--start')
+        end = self.parse_day(options['end'], '--end')
+        if start and end and start > end:
+            raise CommandError('--start must not be after --end')
+
+        started = time.perf_counter()
+        written = rebuild_rollups(start=start, end=end, metrics=options['metrics'])
+        elapsed = time.perf_counter() - started
+
+        for metric, rows in written.items():
+            self.stdout.write(f'{metric}: {rows} rollup rows')
+        self.stdout.write(self.style.SUCCESS(f'Rollups rebuilt in {elapsed:.2f}s'))
+
+    def parse_day(self, value, option):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'{option} must be a date (YYYY-MM-DD)')
+        return day
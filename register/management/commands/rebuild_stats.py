@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from register.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard stat counters from the source tables'
+
+    def handle(self, *args, **options):
+        for key, (old, new) in rebuild_stats().items():
+            if old is None:
+                self.stdout.write(f'{key}: created with {new}')
+            elif old != new:
+                self.stdout.write(self.style.WARNING(f'{key}: {old} -> {new} (drift corrected)'))
+            else:
+                self.stdout.write(f'{key}: {new} (ok)')
+
+        self.stdout.write(self.style.SUCCESS('Stat counters rebuilt'))
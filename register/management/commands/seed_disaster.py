@@ -0,0 +1,252 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from register.models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from register.notifications import invalidate_unread_count
+from register.rollups import rebuild_rollups
+from register.stats import rebuild_stats
+
+CITIES = {
+    'Cebu City': [
+        'Lahug', 'Talamban', 'Banilad', 'Guadalupe', 'Mabolo', 'Apas', 'Kasambagan', 'Capitol Site',
+        'Pasil', 'Ermita', 'Tisa', 'Labangon', 'Punta Princesa', 'Inayawan', 'Pardo', 'Basak San Nicolas',
+    ],
+    'Mandaue City': [
+        'Subangdaku', 'Tipolo', 'Bakilid', 'Banilad', 'Cabancalan', 'Canduman', 'Centro', 'Guizo',
+        'Ibabao-Estancia', 'Looc',
+    ],
+    'Lapu-Lapu City': ['Basak', 'Gun-ob', 'Marigondon', 'Pajo', 'Pusok', 'Agus', 'Babag', 'Mactan'],
+    'Talisay City': ['Bulacao', 'Tabunok', 'Lawaan I', 'Dumlog', 'San Roque', 'Cansojong'],
+}
+
+FIRST_NAMES = [
+    'Maria', 'Jose', 'Juan', 'Ana', 'Mark', 'Angel', 'Jerome', 'Kristine', 'John Paul', 'Marites',
+    'Rowena', 'Ramon', 'Liza', 'Noel', 'Grace', 'Ricardo', 'Jocelyn', 'Dennis', 'Cristina', 'Romeo',
+]
+LAST_NAMES = [
+    'Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Villanueva', 'Ramos', 'Flores',
+    'Cabahug', 'Ybanez', 'Alcoseba', 'Tan', 'Gonzales', 'Lim', 'Abellana', 'Sarmiento', 'Pacquiao',
+]
+STREETS = ['Rizal', 'Mabini', 'Bonifacio', 'Osmena', 'Magallanes', 'Colon', 'Gorordo', 'Escario']
+
+ITEMS = {
+    'Food': ['Rice (5kg)', 'Canned Sardines', 'Instant Noodles', 'Bottled Water', 'Corned Beef', 'Biscuits'],
+    'Clothing': ['T-Shirt', 'Blanket', 'Slippers', 'Shorts'],
+    'Medicine': ['Paracetamol', 'Oral Rehydration Salts', 'Amoxicillin', 'First Aid Kit'],
+    'Hygiene': ['Hygiene Kit', 'Soap', 'Toothpaste', 'Sanitary Pads', 'Diapers'],
+    'Shelter': ['Tarpaulin', 'Tent', 'Sleeping Mat', 'Rope'],
+    'Others': ['Flashlight', 'Water Container', 'Solar Lamp'],
+}
+# Relief that goes out most in the first weeks of a typhoon response
+CATEGORY_WEIGHTS = {'Food': 50, 'Hygiene': 15, 'Medicine': 12, 'Shelter': 10, 'Clothing': 8, 'Others': 5}
+
+
+@contextmanager
+def backdated(*fields):
+    """Lets bulk_create store the given auto_now_add fields as set instead of "now"."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with a synthetic disaster response: family heads concentrated in the '
+        'hardest-hit barangays, and requests, distributions and notifications peaking in the first '
+        'days and tapering off. Uses bulk_create; run it on an empty or throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--households', type=int, default=10_000, help='Family heads to register')
+        parser.add_argument('--distributions', type=int, default=50_000, help='Relief distributions to record')
+        parser.add_argument('--requests', type=int, default=20_000, help='Relief requests to file')
+        parser.add_argument('--notifications', type=int, default=10_000, help='Admin notifications to create')
+        parser.add_argument('--days', type=int, default=60, help='Days since the disaster struck')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument('--prefix', default='household', help='Username prefix for the seeded family heads')
+        parser.add_argument('--password', default='relief-seed', help='Password shared by every seeded family head')
+        parser.add_argument('--seed', type=int, default=2013, help='Random seed (same seed, same data)')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f'Family heads named {options["prefix"]}* already exist; pick another --prefix')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            self.admin = self.get_admin()
+            self.step('inventory items', self.seed_inventory)
+            self.step('family heads', self.seed_households, options['households'], options['prefix'], options['password'])
+            self.step('relief requests', self.seed_requests, options['requests'])
+            self.step('distributions', self.seed_distributions, options['distributions'])
+            self.step('notifications', self.seed_notifications, options['notifications'])
+            # bulk_create skips the signals that keep these current
+            self.step('stat counters', lambda: len(rebuild_stats()))
+            self.step('analytics rollups', lambda: sum(rebuild_rollups().values()))
+        invalidate_unread_count()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {time.perf_counter() - started:.1f}s. Family heads log in with password "{options["password"]}". '
+            f'They are not queued for the Supabase mirror.'
+        ))
+
+    def step(self, label, function, *args):
+        started = time.perf_counter()
+        rows = function(*args)
+        elapsed = time.perf_counter() - started
+        rate = f', {rows / elapsed:,.0f} rows/s' if elapsed and rows >= self.batch_size else ''
+        self.stdout.write(f'{label}: {rows:,} rows in {elapsed:.1f}s{rate}')
+
+    def get_admin(self):
+        admin = User.objects.filter(role='Admin').order_by('userid').first()
+        if admin is None:
+            admin = User(username='disaster-admin', firstname='Relief', lastname='Coordinator', address='City Hall',
+                         contact='00000000000', role='Admin')
+            admin.set_unusable_password()
+            admin.save()
+        return admin
+
+    def in_batches(self, total, make_row):
+        for offset in range(0, total, self.batch_size):
+            yield [make_row(offset + index) for index in range(min(self.batch_size, total - offset))]
+
+    def disaster_time(self, not_before, mean_days):
+        """
+        Activity peaks right after landfall and decays, over a steady trickle
+        that lasts until today; never before `not_before` or after now.
+        """
+        if self.rng.random() < 0.2:
+            moment = self.start + (self.now - self.start) * self.rng.random()
+        else:
+            moment = self.start + timedelta(days=self.rng.expovariate(1 / mean_days))
+        return min(max(moment, not_before), self.now)
+
+    def seed_inventory(self):
+        self.items = []
+        self.item_weights = []
+        for category, names in ITEMS.items():
+            for name in names:
+                # A few items are nearly used up, which feeds the low stock report
+                quantity = self.rng.randrange(11) if self.rng.random() < 0.15 else self.rng.randrange(200, 20_000)
+                self.items.append(Inventory(name=name, category=category, quantity=quantity,
+                                            created_at=self.start, updated_at=self.now))
+                self.item_weights.append(CATEGORY_WEIGHTS[category] / len(names))
+        Inventory.objects.bulk_create(self.items)
+        return len(self.items)
+
+    def seed_households(self, count, prefix, password):
+        rng = self.rng
+        places = [(city, barangay) for city, barangays in CITIES.items() for barangay in barangays]
+        rng.shuffle(places)
+        # Zipf-like: the first few barangays in the shuffled list were hit hardest
+        place_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(places))]
+        password_hash = make_password(password)
+
+        def make_household(index):
+            city, barangay = rng.choices(places, place_weights)[0]
+            if rng.random() < 0.1:
+                # Registered before the disaster
+                joined = self.start - timedelta(days=rng.uniform(1, 730))
+            else:
+                joined = self.disaster_time(self.start, mean_days=4)
+            user = User(
+                username=f'{prefix}{index}', firstname=rng.choice(FIRST_NAMES), lastname=rng.choice(LAST_NAMES),
+                address=f'{rng.randrange(1, 999)} {rng.choice(STREETS)} St., Purok {rng.randrange(1, 8)}',
+                city=city, barangay=barangay, contact=f'09{rng.randrange(10**9):09d}', password=password_hash,
+                role='FamilyHead', date_joined=joined,
+            )
+            # bulk_create skips save(), which normally fills the search column
+            user.search_text = user.build_search_text()
+            return user
+
+        self.households = []
+        for batch in self.in_batches(count, make_household):
+            User.objects.bulk_create(batch)
+            self.households.extend((user.pk, user.date_joined, user.city, user.barangay) for user in batch)
+        return len(self.households)
+
+    def seed_requests(self, count):
+        rng = self.rng
+        pending = set()
+        request_date = ReliefRequest._meta.get_field('request_date')
+
+        def make_request(index):
+            user_id, joined, city, barangay = rng.choice(self.households)
+            requested = self.disaster_time(joined, mean_days=6)
+            age = self.now - requested
+            # Recent requests are still waiting; older ones have mostly been reviewed. One pending per household.
+            if user_id not in pending and rng.random() < (0.8 if age < timedelta(days=2) else 0.05):
+                pending.add(user_id)
+                status = 'pending'
+            else:
+                status = rng.choices(['approved', 'denied'], [82, 18])[0]
+            reviewed = None if status == 'pending' else min(requested + timedelta(hours=rng.expovariate(1 / 12)), self.now)
+            return ReliefRequest(
+                user_id=user_id, relief_type=rng.choices(list(CATEGORY_WEIGHTS), list(CATEGORY_WEIGHTS.values()))[0],
+                notes='Family affected by flooding; house partially damaged.', status=status, request_date=requested,
+                reviewed_by=None if status == 'pending' else self.admin, reviewed_date=reviewed,
+                relief_given=status == 'approved' and rng.random() < 0.75, city=city, barangay=barangay,
+            )
+
+        with backdated(request_date):
+            for batch in self.in_batches(count, make_request):
+                ReliefRequest.objects.bulk_create(batch)
+        return count
+
+    def seed_distributions(self, count):
+        rng = self.rng
+        distribution_date = ReliefDistribution._meta.get_field('distribution_date')
+
+        def make_distribution(index):
+            user_id, joined, city, barangay = rng.choice(self.households)
+            item = rng.choices(self.items, self.item_weights)[0]
+            return ReliefDistribution(
+                user_id=user_id, item=item, quantity_distributed=rng.choice([1, 1, 1, 2, 2, 3, 5]),
+                distribution_date=self.disaster_time(joined, mean_days=8), distributed_by=self.admin,
+                category=item.category, city=city, barangay=barangay,
+            )
+
+        with backdated(distribution_date):
+            for batch in self.in_batches(count, make_distribution):
+                ReliefDistribution.objects.bulk_create(batch)
+        return count
+
+    def seed_notifications(self, count):
+        rng = self.rng
+        created_at = Notification._meta.get_field('created_at')
+        kinds = [
+            ('distribution', 'Relief Distribution', 'Relief goods distributed'),
+            ('relief_request', 'New Relief Request', 'A family head filed a relief request'),
+            ('new_user', 'New User Registration', 'A new family head registered'),
+            ('update', 'System Update', 'Relief operations update'),
+        ]
+
+        def make_notification(index):
+            kind, title, message = rng.choices(kinds, [45, 35, 15, 5])[0]
+            created = self.disaster_time(self.start, mean_days=6)
+            user_id = rng.choice(self.households)[0] if kind != 'update' else None
+            return Notification(
+                notification_type=kind, title=title, message=message, created_at=created, related_user_id=user_id,
+                # Admins keep up, except with the last day or so
+                is_read=self.now - created > timedelta(days=1) or rng.random() < 0.5,
+            )
+
+        with backdated(created_at):
+            for batch in self.in_batches(count, make_notification):
+                Notification.objects.bulk_create(batch)
+        return count
@@ -0,0 +1,93 @@
+import threading
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, DatabaseError
+
+from register.distribution import distribute_item, InsufficientStock
+from register.models import User, Inventory, ReliefDistribution, Notification, OutboxEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer distribute_item() from many threads against one scratch inventory item '
+        'and verify the stock is never oversold'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent volunteers')
+        parser.add_argument('--attempts', type=int, default=25, help='Distributions attempted per thread')
+        parser.add_argument('--stock', type=int, default=100, help='Starting quantity of the scratch item')
+        parser.add_argument('--quantity', type=int, default=1, help='Quantity per distribution')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch item, household and records')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        attempts = options['attempts']
+        stock = options['stock']
+        quantity = options['quantity']
+
+        tag = f"stress-{uuid.uuid4().hex[:8]}"
+        item = Inventory.objects.create(name=tag, category='Others', quantity=stock)
+        household = User.objects.create_user(
+            username=tag, firstname='Stress', lastname='Test', password=None,
+            address='Stress test', contact='00000000000', role='FamilyHead'
+        )
+
+        results = {'ok': 0, 'insufficient': 0, 'errors': 0}
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def volunteer():
+            try:
+                start.wait()
+                for _ in range(attempts):
+                    try:
+                        distribute_item(household, item.id, quantity, notes=tag)
+                        outcome = 'ok'
+                    except InsufficientStock:
+                        outcome = 'insufficient'
+                    except DatabaseError:
+                        # e.g. SQLite "database is locked"; the transaction rolled back as a whole
+                        outcome = 'errors'
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=volunteer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        item.refresh_from_db()
+        distributed = ReliefDistribution.objects.filter(item=item).count()
+        expected_left = stock - results['ok'] * quantity
+
+        self.stdout.write(
+            f"{threads} threads x {attempts} attempts: {results['ok']} distributed, "
+            f"{results['insufficient']} rejected for stock, {results['errors']} database errors"
+        )
+        self.stdout.write(f"Stock: started {stock}, left {item.quantity}, expected {expected_left}")
+
+        problems = []
+        if distributed != results['ok']:
+            problems.append(f"{distributed} distribution rows for {results['ok']} successful calls")
+        if item.quantity != expected_left:
+            problems.append(f"lost update: quantity {item.quantity}, expected {expected_left}")
+        if results['ok'] * quantity > stock:
+            problems.append(f"oversold: {results['ok'] * quantity} given out of {stock}")
+
+        if not options['keep']:
+            OutboxEvent.objects.filter(
+                event_type='distribution',
+                object_id__in=ReliefDistribution.objects.filter(item=item).values('id')
+            ).delete()
+            Notification.objects.filter(message__contains=tag).delete()
+            household.delete()
+            item.delete()
+
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('No oversell or lost updates'))
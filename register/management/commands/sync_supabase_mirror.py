@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from register import utils
+from register.fake_supabase import FakeSupabaseClient
+from register.models import User, queue_supabase_sync
+from register.mirror import mirror_status, sync_supabase_mirror
+
+
+class Command(BaseCommand):
+    help = 'Push queued family heads to the Supabase Register table in batched upserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Users per upsert request')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new changes')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when nothing is due (with --loop)')
+        parser.add_argument('--status', action='store_true', help='Only print the queue depth and lag')
+        parser.add_argument('--fake', action='store_true', help='Push to the in-memory client (no network)')
+        parser.add_argument('--requeue-all', action='store_true', help='Queue every family head first (initial backfill)')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.print_status()
+            return
+
+        if options['fake']:
+            utils.set_supabase_client(FakeSupabaseClient())
+
+        if options['requeue_all']:
+            if not settings.SUPABASE_MIRROR:
+                raise CommandError('SUPABASE_MIRROR is off; nothing would be queued')
+            user_ids = list(User.objects.filter(role='FamilyHead').values_list('userid', flat=True))
+            for start in range(0, len(user_ids), 1000):
+                queue_supabase_sync(user_ids[start:start + 1000])
+            self.stdout.write(f'Queued {len(user_ids)} family head(s)')
+
+        batch_size = options['batch_size']
+        total_written = 0
+
+        try:
+            while True:
+                claimed, written = sync_supabase_mirror(batch_size)
+                total_written += written
+                if claimed:
+                    self.stdout.write(f'Pushed {written} of {claimed} user(s)')
+                    if written < claimed:
+                        self.print_status()
+                if claimed < batch_size:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.print_status()
+        self.stdout.write(self.style.SUCCESS(f'Mirror sync finished ({total_written} user(s) written)'))
+
+    def print_status(self):
+        status = mirror_status()
+        self.stdout.write(
+            f'Queued: {status["queued"]}, failing: {status["failing"]}, lag: {status["lag_seconds"]}s'
+        )
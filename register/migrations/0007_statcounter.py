@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:14
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def seed_stat_counters(apps, schema_editor):
+    User = apps.get_model('register', 'User')
+    Inventory = apps.get_model('register', 'Inventory')
+    ReliefDistribution = apps.get_model('register', 'ReliefDistribution')
+    ReliefRequest = apps.get_model('register', 'ReliefRequest')
+    StatCounter = apps.get_model('register', 'StatCounter')
+
+    values = {
+        'total_families': User.objects.filter(role='FamilyHead').count(),
+        'total_inventory': Inventory.objects.aggregate(total=Sum('quantity'))['total'] or 0,
+        'total_distributions': ReliefDistribution.objects.count(),
+        'pending_requests': ReliefRequest.objects.filter(status='pending').count(),
+    }
+    StatCounter.objects.bulk_create([StatCounter(key=key, value=value) for key, value in values.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0006_reliefrequest_relief_given'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('key', models.CharField(choices=[('total_families', 'Total Family Heads'), ('total_inventory', 'Total Inventory Quantity'), ('total_distributions', 'Total Distributions'), ('pending_requests', 'Pending Relief Requests')], max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Stat Counters',
+            },
+        ),
+        migrations.RunPython(seed_stat_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0007_statcounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reliefdistribution',
+            index=models.Index(fields=['-distribution_date', '-id'], name='dist_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefdistribution',
+            index=models.Index(fields=['item', '-distribution_date', '-id'], name='dist_item_date_id_idx'),
+        ),
+    ]
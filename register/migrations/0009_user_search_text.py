@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:17
+
+from django.db import migrations, models
+
+SEARCH_FIELDS = ('username', 'firstname', 'middlename', 'lastname', 'contact', 'address')
+
+# The search index as of this migration (register/search.py builds the same one). Copied rather
+# than imported so that later changes to the app cannot change what this migration does.
+SQLITE_INSTALL_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS register_user_search USING fts5(
+        search_text, content='register_user', content_rowid='userid', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_ai AFTER INSERT ON register_user BEGIN
+        INSERT INTO register_user_search(rowid, search_text) VALUES (new.userid, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_ad AFTER DELETE ON register_user BEGIN
+        INSERT INTO register_user_search(register_user_search, rowid, search_text) VALUES ('delete', old.userid, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_au AFTER UPDATE OF search_text ON register_user BEGIN
+        INSERT INTO register_user_search(register_user_search, rowid, search_text) VALUES ('delete', old.userid, old.search_text);
+        INSERT INTO register_user_search(rowid, search_text) VALUES (new.userid, new.search_text);
+    END""",
+    "INSERT INTO register_user_search(register_user_search) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS register_user_search_ai",
+    "DROP TRIGGER IF EXISTS register_user_search_ad",
+    "DROP TRIGGER IF EXISTS register_user_search_au",
+    "DROP TABLE IF EXISTS register_user_search",
+]
+
+POSTGRES_INSTALL_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS register_user_search_trgm_idx ON register_user USING gin (search_text gin_trgm_ops)",
+]
+POSTGRES_UNINSTALL_SQL = ["DROP INDEX IF EXISTS register_user_search_trgm_idx"]
+
+
+def backfill_search_text(apps, schema_editor):
+    User = apps.get_model('register', 'User')
+    users = list(User.objects.only('userid', *SEARCH_FIELDS))
+    for user in users:
+        user.search_text = ' '.join(str(getattr(user, field) or '') for field in SEARCH_FIELDS).lower()
+    User.objects.bulk_update(users, ['search_text'], batch_size=1000)
+
+
+def _run(schema_editor, sqlite, postgres):
+    # Other backends have no index and search with LIKE
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': sqlite, 'postgresql': postgres}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    _run(schema_editor, SQLITE_INSTALL_SQL, POSTGRES_INSTALL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    _run(schema_editor, SQLITE_UNINSTALL_SQL, POSTGRES_UNINSTALL_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0008_distribution_log_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
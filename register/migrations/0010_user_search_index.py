@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0009_user_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchIndex',
+            fields=[
+                ('user', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('search_text', models.TextField()),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'register_user_search',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:22
+
+import django.db.models.deletion
+import re
+
+from django.db import migrations, models
+
+LOW_STOCK_MESSAGE = re.compile(r'^Inventory item "(?P<name>.*)" is running low\.')
+
+
+def link_low_stock_alerts(apps, schema_editor):
+    """Attach existing unread low stock alerts to their item, parsed from the message."""
+    Inventory = apps.get_model('register', 'Inventory')
+    Notification = apps.get_model('register', 'Notification')
+
+    item_ids = {}
+    for item_id, name in Inventory.objects.order_by('id').values_list('id', 'name'):
+        item_ids.setdefault(name, item_id)
+
+    linked = set()
+    alerts = Notification.objects.filter(notification_type='low_stock', is_read=False).order_by('-created_at')
+    for alert in alerts.only('id', 'message'):
+        match = LOW_STOCK_MESSAGE.match(alert.message)
+        item_id = item_ids.get(match.group('name')) if match else None
+        # Only the newest unread alert per item can be linked (unique constraint)
+        if item_id and item_id not in linked:
+            Notification.objects.filter(id=alert.id).update(inventory_item_id=item_id)
+            linked.add(item_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0010_user_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='inventory_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_alerts', to='register.inventory'),
+        ),
+        migrations.RunPython(link_low_stock_alerts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('notification_type', 'low_stock')), fields=('inventory_item',), name='unique_unread_low_stock_alert'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0011_low_stock_alert_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('distribution', 'Relief Distribution'), ('relief_request', 'Relief Request')], max_length=20)),
+                ('object_id', models.BigIntegerField(help_text='Primary key of the ReliefDistribution or ReliefRequest')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0012_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='id_proof',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0013_user_id_proof'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupabaseSyncItem',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='supabase_sync', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('queued_at', models.DateTimeField(help_text='First change not yet in Supabase (the mirror lag is measured from here)')),
+                ('changed_at', models.DateTimeField(help_text='Latest change; a push only clears the row if no change arrived after it was claimed')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_attempt_at', 'queued_at'], name='supabase_sync_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:52
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    """
+    One rollup row per metric, day (project time zone), category, city and
+    barangay, from the existing distributions and requests. A copy of what
+    register.rollups.rebuild_rollups() did at this migration; approvals and
+    denials count on the day they were reviewed.
+    """
+    DailyRollup = apps.get_model('register', 'DailyRollup')
+    ReliefDistribution = apps.get_model('register', 'ReliefDistribution')
+    ReliefRequest = apps.get_model('register', 'ReliefRequest')
+
+    reviewed = ReliefRequest.objects.filter(reviewed_date__isnull=False)
+    sources = {
+        'distribution': (ReliefDistribution.objects.all(), 'distribution_date', F('item__category'), Sum('quantity_distributed')),
+        'request': (ReliefRequest.objects.all(), 'request_date', F('relief_type'), Value(0)),
+        'approval': (reviewed.filter(status='approved'), 'reviewed_date', F('relief_type'), Value(0)),
+        'denial': (reviewed.filter(status='denied'), 'reviewed_date', F('relief_type'), Value(0)),
+    }
+    for metric, (queryset, date_field, category, quantity) in sources.items():
+        rows = queryset.annotate(
+            rollup_day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()),
+            category=category,
+            city=F('user__city'),
+            barangay=F('user__barangay'),
+        ).values('rollup_day', 'category', 'city', 'barangay').annotate(
+            count=Count('id'), quantity=quantity,
+        ).order_by()
+        DailyRollup.objects.bulk_create([
+            DailyRollup(
+                metric=metric, day=row['rollup_day'], category=row['category'],
+                city=row['city'], barangay=row['barangay'],
+                count=row['count'], quantity=row['quantity'] or 0,
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0014_supabase_sync_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('distribution', 'Relief Distributions'), ('request', 'Relief Requests'), ('approval', 'Approved Requests'), ('denial', 'Denied Requests')], max_length=20)),
+                ('day', models.DateField()),
+                ('category', models.CharField(help_text='Item category, or the relief type for requests', max_length=20)),
+                ('city', models.CharField(max_length=100)),
+                ('barangay', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('quantity', models.BigIntegerField(default=0, help_text='Items handed out (distributions only)')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'day', 'category', 'city', 'barangay'), name='unique_daily_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:54
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Min
+
+# The SQLite search index from 0009_user_search_text, copied rather than imported from the app.
+# The table rebuild below keeps the FTS table but drops its triggers; IF NOT EXISTS skips what survived.
+SQLITE_REINSTALL_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS register_user_search USING fts5(
+        search_text, content='register_user', content_rowid='userid', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_ai AFTER INSERT ON register_user BEGIN
+        INSERT INTO register_user_search(rowid, search_text) VALUES (new.userid, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_ad AFTER DELETE ON register_user BEGIN
+        INSERT INTO register_user_search(register_user_search, rowid, search_text) VALUES ('delete', old.userid, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS register_user_search_au AFTER UPDATE OF search_text ON register_user BEGIN
+        INSERT INTO register_user_search(register_user_search, rowid, search_text) VALUES ('delete', old.userid, old.search_text);
+        INSERT INTO register_user_search(rowid, search_text) VALUES (new.userid, new.search_text);
+    END""",
+    "INSERT INTO register_user_search(register_user_search) VALUES ('rebuild')",
+]
+
+
+def backfill_date_joined(apps, schema_editor):
+    """
+    Existing accounts have no registration time, so use the earliest thing we
+    know about each one: last login, first request, distribution or
+    notification. User ids only grow, so an account also registered no later
+    than any account created after it; carrying the minimum down from the
+    newest id fills in accounts with no activity of their own. Accounts newer
+    than all recorded activity stay null (unknown) rather than "just now".
+    """
+    User = apps.get_model('register', 'User')
+    ReliefRequest = apps.get_model('register', 'ReliefRequest')
+    ReliefDistribution = apps.get_model('register', 'ReliefDistribution')
+    Notification = apps.get_model('register', 'Notification')
+
+    evidence = {}
+
+    def merge(rows):
+        for user_id, when in rows:
+            if user_id is not None and when is not None and (user_id not in evidence or when < evidence[user_id]):
+                evidence[user_id] = when
+
+    merge(User.objects.values_list('userid', 'last_login'))
+    merge(ReliefRequest.objects.values('user').annotate(first=Min('request_date')).values_list('user', 'first'))
+    merge(ReliefDistribution.objects.values('user').annotate(first=Min('distribution_date')).values_list('user', 'first'))
+    merge(
+        Notification.objects.exclude(related_user=None)
+        .values('related_user').annotate(first=Min('created_at')).values_list('related_user', 'first')
+    )
+
+    users = list(User.objects.only('userid').order_by('-userid'))
+    earliest = None
+    for user in users:
+        when = evidence.get(user.userid)
+        if when is not None and (earliest is None or when < earliest):
+            earliest = when
+        user.date_joined = earliest
+    User.objects.bulk_update(users, ['date_joined'], batch_size=1000)
+
+
+def reinstall_search_index(apps, schema_editor):
+    # Adding a column with a default rebuilds the table on SQLite, which drops the search triggers;
+    # the PostgreSQL trigram index survives the ALTER TABLE
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQLITE_REINSTALL_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('register', '0015_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='date_joined',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'date_joined'], name='user_role_joined_idx'),
+        ),
+        migrations.RunPython(backfill_date_joined, migrations.RunPython.noop),
+        migrations.RunPython(reinstall_search_index, migrations.RunPython.noop),
+    ]
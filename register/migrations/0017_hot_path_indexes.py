@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('register', '0016_user_date_joined'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['quantity'], name='inventory_quantity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at'], name='notif_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at'], name='notif_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['status', '-request_date'], name='req_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['status', '-reviewed_date'], name='req_status_reviewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reliefrequest',
+            index=models.Index(fields=['user', 'status', '-request_date'], name='req_user_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'userid'], name='user_role_userid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'city', 'barangay'], name='user_role_place_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['contact'], name='user_contact_idx'),
+        ),
+    ]
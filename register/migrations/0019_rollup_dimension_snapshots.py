@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:04
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def snapshot_dimensions(apps, schema_editor):
+    """
+    Fills the new columns from the current item category and household place,
+    then rebuilds the rollups from them (a copy of what
+    register.rollups.rebuild_rollups() does at this migration), which also
+    clears drift left by households moved or items recategorised before.
+    """
+    User = apps.get_model('register', 'User')
+    Inventory = apps.get_model('register', 'Inventory')
+    ReliefDistribution = apps.get_model('register', 'ReliefDistribution')
+    ReliefRequest = apps.get_model('register', 'ReliefRequest')
+    DailyRollup = apps.get_model('register', 'DailyRollup')
+
+    def user_field(name):
+        return Subquery(User.objects.filter(pk=OuterRef('user_id')).values(name)[:1])
+
+    ReliefDistribution.objects.update(
+        category=Subquery(Inventory.objects.filter(pk=OuterRef('item_id')).values('category')[:1]),
+        city=user_field('city'),
+        barangay=user_field('barangay'),
+    )
+    ReliefRequest.objects.update(city=user_field('city'), barangay=user_field('barangay'))
+
+    reviewed = ReliefRequest.objects.filter(reviewed_date__isnull=False)
+    sources = {
+        'distribution': (ReliefDistribution.objects.all(), 'distribution_date', {}, Sum('quantity_distributed')),
+        'request': (ReliefRequest.objects.all(), 'request_date', {'category': F('relief_type')}, Value(0)),
+        'approval': (reviewed.filter(status='approved'), 'reviewed_date', {'category': F('relief_type')}, Value(0)),
+        'denial': (reviewed.filter(status='denied'), 'reviewed_date', {'category': F('relief_type')}, Value(0)),
+    }
+    DailyRollup.objects.all().delete()
+    for metric, (queryset, date_field, dimensions, quantity) in sources.items():
+        rows = queryset.annotate(
+            rollup_day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()),
+            **dimensions,
+        ).values('rollup_day', 'category', 'city', 'barangay').annotate(
+            count=Count('id'), quantity=quantity,
+        ).order_by()
+        DailyRollup.objects.bulk_create([
+            DailyRollup(
+                metric=metric, day=row['rollup_day'], category=row['category'],
+                city=row['city'], barangay=row['barangay'],
+                count=row['count'], quantity=row['quantity'] or 0,
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('register', '0018_daily_rollup_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reliefdistribution',
+            name='barangay',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='reliefdistribution',
+            name='category',
+            field=models.CharField(default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='reliefdistribution',
+            name='city',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='reliefrequest',
+            name='barangay',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='reliefrequest',
+            name='city',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(snapshot_dimensions, migrations.RunPython.noop),
+    ]
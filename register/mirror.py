@@ -0,0 +1,130 @@
+"""
+Pushes queued family heads to the Supabase Register table.
+
+Changes are queued as SupabaseSyncItem rows (see queue_supabase_sync in
+models.py). Each batch is claimed with a short lease, sent as one multi-row
+upsert on username and then cleared; failures are retried with exponential
+backoff and full jitter. A batch rejected by the API is split in half until
+the offending rows are isolated, so one bad row cannot hold back the rest.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .models import User, SupabaseSyncItem, SUPABASE_MIRROR_FIELDS
+from .utils import SUPABASE_TABLE, SupabaseNotConfigured, invalidate_supabase_user, supabase_call
+
+# A claimed batch is left alone by other workers for this long
+LEASE = timedelta(minutes=5)
+
+BACKOFF_BASE = 5       # seconds before the first retry (upper bound)
+BACKOFF_MAX = 15 * 60  # retry delay cap
+
+
+def backoff_delay(attempts):
+    """Full jitter: a random delay up to BACKOFF_BASE * 2^(attempts - 1), capped at BACKOFF_MAX."""
+    return timedelta(seconds=random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))))
+
+
+def mirror_row(user):
+    # The Django password hash is sent as-is; nothing is re-hashed
+    return {field: getattr(user, field) for field in SUPABASE_MIRROR_FIELDS}
+
+
+def is_transient(error):
+    """Network trouble (retry the whole batch later) as opposed to the API rejecting the data."""
+    if isinstance(error, (OSError, TimeoutError, SupabaseNotConfigured)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+def push_rows(rows):
+    """
+    Upserts the rows in one request.
+
+    Returns:
+        dict: username -> error message for the rows that were not written
+    """
+    if not rows:
+        return {}
+    try:
+        with supabase_call("table.upsert") as client:
+            client.table(SUPABASE_TABLE).upsert(rows, on_conflict="username").execute()
+        invalidate_supabase_user(*(row['username'] for row in rows))
+        return {}
+    except Exception as e:
+        if len(rows) == 1 or is_transient(e):
+            return {row['username']: str(e) for row in rows}
+        middle = len(rows) // 2
+        return {**push_rows(rows[:middle]), **push_rows(rows[middle:])}
+
+
+def claim_batch(batch_size):
+    """Leases up to `batch_size` due items; returns (user ids, claim time)."""
+    now = timezone.now()
+    with transaction.atomic():
+        user_ids = list(
+            SupabaseSyncItem.objects.select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'queued_at')
+            .values_list('user_id', flat=True)[:batch_size]
+        )
+        if user_ids:
+            SupabaseSyncItem.objects.filter(user_id__in=user_ids).update(next_attempt_at=now + LEASE)
+    return user_ids, now
+
+
+def sync_supabase_mirror(batch_size=500):
+    """
+    Pushes one batch of queued users to Supabase.
+
+    Returns:
+        tuple: (users claimed, users written)
+    """
+    user_ids, claimed_at = claim_batch(batch_size)
+    if not user_ids:
+        return 0, 0
+
+    # Read after claiming: anything changed before the claim is in this push
+    users = User.objects.only(*SUPABASE_MIRROR_FIELDS).in_bulk(user_ids)
+    rows = [mirror_row(users[user_id]) for user_id in user_ids if user_id in users]
+    errors = push_rows(rows)
+
+    now = timezone.now()
+    written = [user.pk for user in users.values() if user.username not in errors]
+    with transaction.atomic():
+        # Cleared only if nothing changed since the claim; otherwise due again right away
+        SupabaseSyncItem.objects.filter(user_id__in=written, changed_at__lte=claimed_at).delete()
+        SupabaseSyncItem.objects.filter(user_id__in=written).update(
+            attempts=0, next_attempt_at=now, last_error='', queued_at=claimed_at
+        )
+
+        failed = list(SupabaseSyncItem.objects.filter(user_id__in=[
+            user.pk for user in users.values() if user.username in errors
+        ]))
+        for item in failed:
+            item.attempts += 1
+            item.next_attempt_at = now + backoff_delay(item.attempts)
+            item.last_error = errors[users[item.user_id].username][:1000]
+        SupabaseSyncItem.objects.bulk_update(failed, ['attempts', 'next_attempt_at', 'last_error'])
+
+    return len(user_ids), len(written)
+
+
+def mirror_status():
+    """Queue depth, failing rows and lag (seconds since the oldest change not yet in Supabase)."""
+    summary = SupabaseSyncItem.objects.aggregate(
+        queued=Count('pk'),
+        failing=Count('pk', filter=Q(attempts__gt=0)),
+        oldest=Min('queued_at'),
+    )
+    oldest = summary.pop('oldest')
+    summary['lag_seconds'] = round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0.0
+    return summary
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
@@ -47,8 +49,21 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     
+    # URL of the uploaded ID proof; filled in by the background upload after registration
+    id_proof = models.CharField(max_length=500, blank=True, null=True)
+    
+    # When the account was created; null for accounts older than this column with no recorded activity
+    date_joined = models.DateTimeField(default=timezone.now, null=True, blank=True, editable=False)
+    
+    # Lowercased copy of the searchable fields, indexed by the search backend (see register/search.py).
+    # On SQLite, a migration that rebuilds this table (most field changes) drops the FTS triggers and
+    # must re-create them, like 0016_user_date_joined does.
+    search_text = models.TextField(blank=True, default='', editable=False)
+    
     objects = CustomUserManager()
     
+    SEARCH_FIELDS = ('username', 'firstname', 'middlename', 'lastname', 'contact', 'address')
+    
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['firstname', 'lastname']
     
@@ -56,10 +71,45 @@ class User(AbstractBaseUser, PermissionsMixin):
         # Automatically set is_staff based on role
         if self.role == 'Admin':
             self.is_staff = True
+        
+        # Keep the search column in sync with the fields it is built from
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
         super().save(*args, **kwargs)
     
+    def build_search_text(self):
+        return ' '.join(str(getattr(self, field) or '') for field in self.SEARCH_FIELDS).lower()
+    
     def __str__(self):
         return f"{self.firstname} {self.lastname} ({self.username})"
+    
+    class Meta:
+        indexes = [
+            # New-registration reports: role filter plus a date_joined range (or newest first)
+            models.Index(fields=['role', 'date_joined'], name='user_role_joined_idx'),
+            # Family head lists, newest first / keyset pages on userid
+            models.Index(fields=['role', 'userid'], name='user_role_userid_idx'),
+            # City / barangay dropdowns (covering) and place filters
+            models.Index(fields=['role', 'city', 'barangay'], name='user_role_place_idx'),
+            # Duplicate contact check at registration
+            models.Index(fields=['contact'], name='user_contact_idx'),
+        ]
+
+
+class UserSearchIndex(models.Model):
+    """
+    SQLite FTS5 index over User.search_text, created and kept in sync by
+    triggers (see register/search.py). Not managed by Django; unused on PostgreSQL.
+    """
+    user = models.OneToOneField(User, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_index')
+    search_text = models.TextField()
+    rank = models.FloatField()
+    
+    class Meta:
+        managed = False
+        db_table = 'register_user_search'
 
 
 class Inventory(models.Model):
@@ -84,6 +134,10 @@ class Inventory(models.Model):
     class Meta:
         verbose_name_plural = "Inventory Items"
         ordering = ['-created_at']
+        indexes = [
+            # Low stock report and in-stock item lists
+            models.Index(fields=['quantity'], name='inventory_quantity_idx'),
+        ]
 
 
 class ReliefDistribution(models.Model):
@@ -94,12 +148,33 @@ class ReliefDistribution(models.Model):
     distributed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='distributed_items')
     notes = models.TextField(blank=True, null=True)
     
+    # The item's category and the household's place when the relief was given, which the analytics
+    # rollups count it under (see register/rollups.py); later edits to the item or the user do not move it.
+    category = models.CharField(max_length=20, default='', editable=False)
+    city = models.CharField(max_length=100, default='', editable=False)
+    barangay = models.CharField(max_length=100, default='', editable=False)
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_rollup_dimensions()
+        super().save(*args, **kwargs)
+    
+    def set_rollup_dimensions(self):
+        self.category = self.item.category
+        self.city, self.barangay = self.user.city, self.user.barangay
+    
     def __str__(self):
         return f"{self.user.username} - {self.item.name} ({self.quantity_distributed})"
     
     class Meta:
         verbose_name_plural = "Relief Distributions"
         ordering = ['-distribution_date']
+        indexes = [
+            # Keyset pagination and date-range filters on the distribution log
+            models.Index(fields=['-distribution_date', '-id'], name='dist_date_id_idx'),
+            # Category filter (resolved to item ids) combined with the same ordering
+            models.Index(fields=['item', '-distribution_date', '-id'], name='dist_item_date_id_idx'),
+        ]
 
 
 class ReliefRequest(models.Model):
@@ -128,12 +203,33 @@ class ReliefRequest(models.Model):
     admin_notes = models.TextField(blank=True, null=True)
     relief_given = models.BooleanField(default=False, help_text='Whether the relief has been physically given to the user')
     
+    # The household's place when the request was filed, which the analytics rollups count it
+    # (and its review) under; moving the household later does not move it.
+    city = models.CharField(max_length=100, default='', editable=False)
+    barangay = models.CharField(max_length=100, default='', editable=False)
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_rollup_dimensions()
+        super().save(*args, **kwargs)
+    
+    def set_rollup_dimensions(self):
+        self.city, self.barangay = self.user.city, self.user.barangay
+    
     def __str__(self):
         return f"{self.user.username} - {self.relief_type} ({self.status})"
     
     class Meta:
         verbose_name_plural = "Relief Requests"
         ordering = ['-request_date']
+        indexes = [
+            # Pending requests page and counts, newest first
+            models.Index(fields=['status', '-request_date'], name='req_status_date_idx'),
+            # Approved requests page, most recently reviewed first
+            models.Index(fields=['status', '-reviewed_date'], name='req_status_reviewed_idx'),
+            # A resident's own requests and their pending one
+            models.Index(fields=['user', 'status', '-request_date'], name='req_user_status_date_idx'),
+        ]
 
 
 class Notification(models.Model):
@@ -151,12 +247,158 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     related_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
+    # Set on low stock alerts; at most one unread alert per item (see constraint below)
+    inventory_item = models.ForeignKey(Inventory, on_delete=models.CASCADE, null=True, blank=True, related_name='stock_alerts')
     
     def __str__(self):
         return f"{self.title} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Notification list, newest first
+            models.Index(fields=['-created_at'], name='notif_created_idx'),
+            # Unread badge count and dropdown; only the (few) unread rows are indexed
+            models.Index(fields=['-created_at'], condition=models.Q(is_read=False), name='notif_unread_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['inventory_item'],
+                condition=models.Q(notification_type='low_stock', is_read=False),
+                name='unique_unread_low_stock_alert',
+            ),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """
+    Pending notification side effect, written in the same transaction as the
+    record that caused it and turned into a Notification by `manage.py drain_outbox`.
+    """
+    EVENT_TYPES = [
+        ('distribution', 'Relief Distribution'),
+        ('relief_request', 'Relief Request'),
+    ]
+    
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    object_id = models.BigIntegerField(help_text='Primary key of the ReliefDistribution or ReliefRequest')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.event_type} #{self.object_id}"
+    
+    class Meta:
+        ordering = ['id']
+
+
+class StatCounter(models.Model):
+    """
+    Running totals shown on the admin dashboard and analytics pages.
+    Kept up to date by the signals below and rebuilt by `manage.py rebuild_stats`.
+    """
+    TOTAL_FAMILIES = 'total_families'
+    TOTAL_INVENTORY = 'total_inventory'
+    TOTAL_DISTRIBUTIONS = 'total_distributions'
+    PENDING_REQUESTS = 'pending_requests'
+
+    KEY_CHOICES = [
+        (TOTAL_FAMILIES, 'Total Family Heads'),
+        (TOTAL_INVENTORY, 'Total Inventory Quantity'),
+        (TOTAL_DISTRIBUTIONS, 'Total Distributions'),
+        (PENDING_REQUESTS, 'Pending Relief Requests'),
+    ]
+
+    key = models.CharField(max_length=50, primary_key=True, choices=KEY_CHOICES)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+    class Meta:
+        verbose_name_plural = "Stat Counters"
+
+
+class DailyRollup(models.Model):
+    """
+    Per-day totals behind the analytics charts, one row per metric, day and
+    category/city/barangay combination. Kept up to date by the signals below
+    (and register/rollups.py for bulk paths), rebuilt by `manage.py rebuild_rollups`.
+    """
+    METRIC_CHOICES = [
+        ('distribution', 'Relief Distributions'),
+        ('request', 'Relief Requests'),
+        ('approval', 'Approved Requests'),
+        ('denial', 'Denied Requests'),
+    ]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    day = models.DateField()
+    category = models.CharField(max_length=20, help_text='Item category, or the relief type for requests')
+    city = models.CharField(max_length=100)
+    barangay = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+    quantity = models.BigIntegerField(default=0, help_text='Items handed out (distributions only)')
+    # Set on every write (see add_to_rollup); its maximum versions the analytics series for ETags
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.metric} {self.day} {self.category}/{self.city}/{self.barangay}: {self.count}"
+
+    class Meta:
+        constraints = [
+            # Also the index for "metric over a date range" queries
+            models.UniqueConstraint(fields=['metric', 'day', 'category', 'city', 'barangay'], name='unique_daily_rollup'),
+        ]
+
+
+class SupabaseSyncItem(models.Model):
+    """
+    A family head whose row in the Supabase Register table is out of date.
+    One row per user however often it changes; pushed in batches by
+    `manage.py sync_supabase_mirror` (see register/mirror.py).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='supabase_sync')
+    queued_at = models.DateTimeField(help_text='First change not yet in Supabase (the mirror lag is measured from here)')
+    changed_at = models.DateTimeField(help_text='Latest change; a push only clears the row if no change arrived after it was claimed')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"sync {self.user_id} (attempts: {self.attempts})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'queued_at'], name='supabase_sync_due_idx'),
+        ]
+
+
+# User fields copied to the Supabase Register table
+SUPABASE_MIRROR_FIELDS = ('username', 'password', 'address', 'contact', 'id_proof')
+
+
+def queue_supabase_sync(user_ids):
+    """
+    Queues family heads for the Supabase mirror (no-op when it is disabled).
+    Re-queuing a user who is already waiting only moves its changed_at.
+    Also called directly after bulk_create()/update() on users.
+    """
+    if not user_ids or not getattr(settings, 'SUPABASE_MIRROR', False):
+        return
+    now = timezone.now()
+    SupabaseSyncItem.objects.bulk_create(
+        [SupabaseSyncItem(user_id=user_id, queued_at=now, changed_at=now, next_attempt_at=now) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['changed_at'],
+    )
+
+
+def bump_stat(key, delta):
+    """Atomically add `delta` to a StatCounter row (no-op for a zero delta)."""
+    if delta:
+        StatCounter.objects.filter(key=key).update(value=F('value') + delta, updated_at=timezone.now())
 
 
 # DO NOT create notification when new user registers
@@ -166,41 +408,191 @@ class Notification(models.Model):
 # Signal to create notification when inventory is low
 @receiver(post_save, sender=Inventory)
 def check_inventory_stock(sender, instance, **kwargs):
-    if instance.quantity <= 10 and instance.quantity > 0:
-        # Check if notification already exists for this item
-        existing = Notification.objects.filter(
-            notification_type='low_stock',
-            message__contains=instance.name,
-            is_read=False
-        ).exists()
-        
-        if not existing:
-            Notification.objects.create(
+    notify_low_stock(instance)
+
+
+def notify_low_stock(item):
+    """Creates a low stock alert for the item unless an unread one already exists.
+    Also called directly after stock changes made with queryset.update()."""
+    if item.quantity <= 10 and item.quantity > 0:
+        # One INSERT ... ON CONFLICT DO NOTHING against the partial unique index
+        # on unread alerts, instead of scanning messages for the item name
+        Notification.objects.bulk_create([
+            Notification(
                 notification_type='low_stock',
                 title='Low Stock Alert',
-                message=f'Inventory item "{instance.name}" is running low. Only {instance.quantity} items remaining.'
+                message=f'Inventory item "{item.name}" is running low. Only {item.quantity} items remaining.',
+                inventory_item=item,
             )
+        ], ignore_conflicts=True)
+        
+        # bulk_create skips post_save, so invalidate the unread count here
+        from .notifications import invalidate_unread_count
+        invalidate_unread_count()
 
 
-# Signal to create notification when distribution happens
+# Signal to queue a notification when distribution happens
+# (only ids are stored; the outbox worker loads item/user in bulk)
 @receiver(post_save, sender=ReliefDistribution)
 def create_distribution_notification(sender, instance, created, **kwargs):
     if created:
-        Notification.objects.create(
-            notification_type='distribution',
-            title='Relief Distribution',
-            message=f'{instance.item.name} distributed to {instance.user.firstname} {instance.user.lastname} ({instance.quantity_distributed} items)',
-            related_user=instance.user
-        )
+        OutboxEvent.objects.create(event_type='distribution', object_id=instance.pk)
 
 
-# Signal to create notification when relief request is made
+# Signal to queue a notification when relief request is made
 @receiver(post_save, sender=ReliefRequest)
 def create_relief_request_notification(sender, instance, created, **kwargs):
     if created:
-        Notification.objects.create(
-            notification_type='relief_request',
-            title='New Relief Request',
-            message=f'{instance.user.firstname} {instance.user.lastname} requested {instance.relief_type} relief',
-            related_user=instance.user
-        )
+        OutboxEvent.objects.create(event_type='relief_request', object_id=instance.pk)
+
+
+# Invalidate the cached unread notification count on any change
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_count(sender, instance, **kwargs):
+    from .notifications import invalidate_unread_count
+    invalidate_unread_count()
+
+
+# Queue family heads for the Supabase mirror when a mirrored field may have changed
+@receiver(post_save, sender=User)
+def queue_user_for_supabase(sender, instance, update_fields=None, **kwargs):
+    if instance.role != 'FamilyHead':
+        return
+    if update_fields is not None and not set(update_fields) & set(SUPABASE_MIRROR_FIELDS):
+        # e.g. last_login updates
+        return
+    queue_supabase_sync([instance.pk])
+
+
+# ---------------- STAT COUNTER SIGNALS ----------------
+# Remember the previously saved values so post_save can apply the difference.
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Inventory)
+@receiver(pre_save, sender=ReliefRequest)
+def remember_previous_values(sender, instance, update_fields=None, **kwargs):
+    # The first field is the tracked one (instance._previous); the rest ride along in the same query
+    fields = {User: ('role',), Inventory: ('quantity',), ReliefRequest: ('status', 'reviewed_date')}[sender]
+    instance._previous = None
+    instance._previous_values = {}
+    if update_fields is not None and fields[0] not in update_fields:
+        # e.g. last_login updates: the tracked field cannot change, skip the lookup
+        instance._previous = getattr(instance, fields[0])
+    elif instance.pk and not instance._state.adding:
+        row = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+        if row:
+            instance._previous_values = dict(zip(fields, row))
+            instance._previous = row[0]
+
+
+@receiver(post_save, sender=User)
+def update_family_count_on_save(sender, instance, created, **kwargs):
+    was_family = not created and getattr(instance, '_previous', None) == 'FamilyHead'
+    is_family = instance.role == 'FamilyHead'
+    bump_stat(StatCounter.TOTAL_FAMILIES, int(is_family) - int(was_family))
+
+
+@receiver(post_delete, sender=User)
+def update_family_count_on_delete(sender, instance, **kwargs):
+    if instance.role == 'FamilyHead':
+        bump_stat(StatCounter.TOTAL_FAMILIES, -1)
+
+
+@receiver(post_save, sender=Inventory)
+def update_inventory_total_on_save(sender, instance, created, **kwargs):
+    previous = 0 if created else (getattr(instance, '_previous', None) or 0)
+    bump_stat(StatCounter.TOTAL_INVENTORY, instance.quantity - previous)
+
+
+@receiver(post_delete, sender=Inventory)
+def update_inventory_total_on_delete(sender, instance, **kwargs):
+    bump_stat(StatCounter.TOTAL_INVENTORY, -instance.quantity)
+
+
+@receiver(post_save, sender=ReliefDistribution)
+def update_distribution_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        bump_stat(StatCounter.TOTAL_DISTRIBUTIONS, 1)
+
+
+@receiver(post_delete, sender=ReliefDistribution)
+def update_distribution_count_on_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with_parent(origin):
+        bump_stat(StatCounter.TOTAL_DISTRIBUTIONS, -1)
+
+
+@receiver(post_save, sender=ReliefRequest)
+def update_pending_count_on_save(sender, instance, created, **kwargs):
+    was_pending = not created and getattr(instance, '_previous', None) == 'pending'
+    is_pending = instance.status == 'pending'
+    bump_stat(StatCounter.PENDING_REQUESTS, int(is_pending) - int(was_pending))
+
+
+@receiver(post_delete, sender=ReliefRequest)
+def update_pending_count_on_delete(sender, instance, origin=None, **kwargs):
+    if instance.status == 'pending' and not deleted_with_parent(origin):
+        bump_stat(StatCounter.PENDING_REQUESTS, -1)
+
+
+# ---------------- DAILY ROLLUP SIGNALS ----------------
+@receiver(post_save, sender=ReliefDistribution)
+def rollup_distribution_on_save(sender, instance, created, **kwargs):
+    if created:
+        from .rollups import record_distribution
+        record_distribution(instance, 1)
+
+
+@receiver(post_delete, sender=ReliefDistribution)
+def rollup_distribution_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with_parent(origin):
+        return
+    from .rollups import record_distribution
+    record_distribution(instance, -1)
+
+
+@receiver(post_save, sender=ReliefRequest)
+def rollup_request_on_save(sender, instance, created, **kwargs):
+    from .rollups import record_request, record_review
+    if created:
+        record_request(instance, 1)
+    previous = getattr(instance, '_previous_values', {})
+    if not created and previous.get('status', instance.status) != instance.status:
+        # Move the review from the old outcome (and its day) to the new one
+        record_review(instance, previous['status'], previous.get('reviewed_date'), -1)
+    if created or previous.get('status', instance.status) != instance.status:
+        record_review(instance, instance.status, instance.reviewed_date, 1)
+
+
+@receiver(post_delete, sender=ReliefRequest)
+def rollup_request_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with_parent(origin):
+        return
+    from .rollups import record_request, record_review
+    record_request(instance, -1)
+    record_review(instance, instance.status, instance.reviewed_date, -1)
+
+
+# ---------------- CASCADE DELETES ----------------
+# Deleting an Inventory item or a User also deletes its distributions (and a user's
+# requests). Their counters and rollups are updated here with grouped queries before
+# the rows go; the per-row receivers above skip rows deleted this way.
+def deleted_with_parent(origin):
+    """True when a delete started from an Inventory item or User (instance or queryset)."""
+    model = origin.model if isinstance(origin, models.QuerySet) else type(origin)
+    return model in (Inventory, User)
+
+
+@receiver(pre_delete, sender=Inventory)
+def account_for_item_cascade(sender, instance, **kwargs):
+    from .rollups import remove_from_rollups
+    removed = remove_from_rollups(['distribution'], item=instance)
+    bump_stat(StatCounter.TOTAL_DISTRIBUTIONS, -removed['distribution'])
+
+
+@receiver(pre_delete, sender=User)
+def account_for_user_cascade(sender, instance, **kwargs):
+    from .rollups import METRICS, remove_from_rollups
+    removed = remove_from_rollups(METRICS, user=instance)
+    bump_stat(StatCounter.TOTAL_DISTRIBUTIONS, -removed['distribution'])
+    if removed['request']:
+        bump_stat(StatCounter.PENDING_REQUESTS, -ReliefRequest.objects.filter(user=instance, status='pending').count())
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import Notification
+
+UNREAD_COUNT_CACHE_KEY = 'notifications:unread_count'
+
+# Upper bound on staleness for processes that did not see the write themselves
+# (with the default per-process LocMemCache, invalidation only reaches the local process)
+UNREAD_COUNT_TTL = 30
+
+
+def get_unread_count():
+    """Number of unread notifications, served from the cache when possible."""
+    return cache.get_or_set(
+        UNREAD_COUNT_CACHE_KEY,
+        lambda: Notification.objects.filter(is_read=False).count(),
+        UNREAD_COUNT_TTL,
+    )
+
+
+def invalidate_unread_count():
+    cache.delete(UNREAD_COUNT_CACHE_KEY)
+
+
+def notifications_version():
+    """
+    Changes when a notification is created or the unread count changes: the
+    newest id (an index lookup) and the cached unread count.
+    """
+    latest = Notification.objects.aggregate(latest=Max('id'))['latest'] or 0
+    return f'{latest}-{get_unread_count()}'
@@ -0,0 +1,62 @@
+from django.db import transaction
+
+from .models import OutboxEvent, Notification, ReliefDistribution, ReliefRequest
+from .notifications import invalidate_unread_count
+
+
+def distribution_notification(distribution):
+    return Notification(
+        notification_type='distribution',
+        title='Relief Distribution',
+        message=f'{distribution.item.name} distributed to {distribution.user.firstname} {distribution.user.lastname} ({distribution.quantity_distributed} items)',
+        related_user=distribution.user
+    )
+
+
+def relief_request_notification(relief_request):
+    return Notification(
+        notification_type='relief_request',
+        title='New Relief Request',
+        message=f'{relief_request.user.firstname} {relief_request.user.lastname} requested {relief_request.relief_type} relief',
+        related_user=relief_request.user
+    )
+
+
+def drain_outbox(batch_size=500):
+    """
+    Turns up to `batch_size` queued outbox events into Notifications.
+
+    Each batch is one transaction: lock the oldest events (skipping rows another
+    worker holds, where the database supports it), load their distributions and
+    requests with select_related, bulk_create the notifications and delete the
+    events. Events whose record was deleted in the meantime are dropped.
+
+    Returns:
+        int: number of events consumed
+    """
+    with transaction.atomic():
+        events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        if not events:
+            return 0
+
+        ids_by_type = {'distribution': [], 'relief_request': []}
+        for event in events:
+            ids_by_type.setdefault(event.event_type, []).append(event.object_id)
+
+        distributions = ReliefDistribution.objects.select_related('item', 'user').in_bulk(ids_by_type['distribution'])
+        relief_requests = ReliefRequest.objects.select_related('user').in_bulk(ids_by_type['relief_request'])
+
+        notifications = []
+        for event in events:
+            if event.event_type == 'distribution' and event.object_id in distributions:
+                notifications.append(distribution_notification(distributions[event.object_id]))
+            elif event.event_type == 'relief_request' and event.object_id in relief_requests:
+                notifications.append(relief_request_notification(relief_requests[event.object_id]))
+
+        Notification.objects.bulk_create(notifications)
+        OutboxEvent.objects.filter(id__in=[event.id for event in events]).delete()
+
+    # bulk_create skips post_save, so invalidate the unread count here
+    if notifications:
+        invalidate_unread_count()
+    return len(events)
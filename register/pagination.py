@@ -0,0 +1,107 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(values):
+    """Encodes the ordering values of the last row on a page into an opaque URL-safe token."""
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields=None):
+    """
+    Decodes a token from encode_cursor(). Returns None for a missing or malformed cursor.
+
+    With `fields` (the model fields of the ordering), every value is also
+    converted with the field's to_python() and validated, so a tampered cursor
+    is treated as no cursor (the first page) instead of failing in the query.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list):
+        return None
+    if fields is None:
+        return values
+    if len(values) != len(fields):
+        return None
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+        for field, value in zip(fields, values):
+            if value is None:
+                return None
+            field.run_validators(value)
+    except (ValidationError, ValueError, TypeError, OverflowError):
+        return None
+    return values
+
+
+def ordering_fields(queryset, ordering):
+    """The model field (or annotation output field) behind each ordering name."""
+    fields = []
+    for name in ordering:
+        if name in queryset.query.annotations:
+            fields.append(queryset.query.annotations[name].output_field)
+            continue
+        try:
+            fields.append(queryset.model._meta.get_field(name))
+        except FieldDoesNotExist:
+            raise ValueError(f"Cannot paginate on unknown field '{name}'")
+    return fields
+
+
+def keyset_page_query(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """
+    The query keyset_paginate() runs for one page (page_size + 1 rows), unevaluated,
+    so it can also be EXPLAINed (see check_query_plans).
+    """
+    queryset = queryset.order_by(*[f'-{field}' for field in ordering])
+
+    values = decode_cursor(cursor, ordering_fields(queryset, ordering))
+    if values is not None:
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+        condition = Q()
+        for index, field in enumerate(ordering):
+            equal_prefix = {ordering[i]: values[i] for i in range(index)}
+            condition |= Q(**equal_prefix, **{f'{field}__lt': values[index]})
+        queryset = queryset.filter(condition)
+
+    return queryset[:page_size + 1]
+
+
+def keyset_paginate(queryset, ordering, cursor=None, page_size=PAGE_SIZE):
+    """
+    Keyset (cursor) pagination, newest first.
+
+    Orders the queryset by the given fields descending and returns the rows
+    that come after the cursor, so every page is a single indexed range scan
+    instead of an OFFSET that grows with the page number. One extra row is
+    fetched to tell whether another page exists, so no COUNT(*) is needed.
+
+    Args:
+        queryset: QuerySet to paginate
+        ordering: Field names, most significant first. The last one must be unique (e.g. the pk).
+        cursor: Token returned as next_cursor by the previous page, or None for the first page
+        page_size: Rows per page
+
+    Returns:
+        tuple: (rows, has_more, next_cursor)
+    """
+    rows = list(keyset_page_query(queryset, ordering, cursor, page_size))
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([getattr(rows[-1], field) for field in ordering])
+
+    return rows, has_more, next_cursor
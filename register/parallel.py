@@ -0,0 +1,71 @@
+"""
+Independent read queries run at the same time, for the async admin views.
+
+Django's async ORM (aget, acount, ...) hands every query to the single
+thread-sensitive worker, so asyncio.gather() over ORM calls still runs them
+one after another. gather_queries() runs each callable in its own worker
+thread, on that thread's own database connection, so a page waits for its
+slowest query instead of the sum of all of them. That pays off when the
+database is across a network (Supabase); on a local SQLite file the thread
+hops cost more than they save (see `manage.py benchmark_async_views`).
+
+The callables run on a small dedicated pool of PARALLEL_QUERY_WORKERS
+threads (not the event loop's default executor, which grows to dozens of
+threads), so each process holds at most that many extra persistent
+connections; each is reused until CONN_MAX_AGE like a request thread's.
+
+The worker threads inherit the request's context, so the view profiler
+(register/profiling.py) counts their queries with the request's.
+
+Worker connections cannot see uncommitted writes, so inside a transaction
+(e.g. the rolled-back requests of check_query_counts and benchmark_urls) the
+callables run one by one on the request's own connection instead.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PARALLEL_QUERY_WORKERS', 4), thread_name_prefix='parallel-query'
+            )
+        return _executor
+
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+def _run_in_worker(function):
+    # What the request_started handler does for request threads: drop a
+    # connection that is broken or older than CONN_MAX_AGE before using it
+    close_old_connections()
+    return function()
+
+
+async def gather_queries(**calls):
+    """
+    Runs each keyword's zero-argument callable (all reads) concurrently.
+
+    Returns:
+        dict: keyword -> the callable's result
+    """
+    if await sync_to_async(_in_transaction)():
+        return {name: await sync_to_async(function)() for name, function in calls.items()}
+
+    results = await asyncio.gather(*(
+        sync_to_async(_run_in_worker, thread_sensitive=False, executor=_get_executor())(function)
+        for function in calls.values()
+    ))
+    return dict(zip(calls, results))
@@ -0,0 +1,200 @@
+"""
+Per-view SQL query counts and timings.
+
+ViewProfilingMiddleware records, for every request that resolves to a view,
+the number of SQL queries, the time spent in the database, the time spent
+rendering templates (and the queries fired from inside templates, the usual
+source of N+1s) and the total time. The last VIEW_PROFILING['BUFFER']
+requests are kept in a per-process ring buffer, summarised on the staff-only
+profiling page (see profiling_view).
+
+Queries are counted by an execute wrapper installed on every database
+connection, so this works with DEBUG off and costs one function call per
+query. The wrapper counts into the profile of the current context, which
+asgiref carries into sync_to_async threads: queries that async views run
+in worker threads (register/parallel.py) are counted with the request's.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from django.utils import timezone
+
+_current_profile = ContextVar('view_profile', default=None)
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=settings.VIEW_PROFILING['BUFFER'])
+
+
+class RequestProfile:
+    """Counters for one request; also the execute wrapper that feeds them."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_queries = 0
+        self.render_depth = 0
+        # Worker threads of one request count at the same time
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.db_time += elapsed
+                self.queries += 1
+                if self.render_depth:
+                    self.render_queries += 1
+
+
+def _profile_query(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    # connection_created is also sent on reconnects, which keep their wrappers
+    if _profile_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_query)
+
+
+_original_render = Template._render
+
+
+def _profiled_render(self, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return _original_render(self, context)
+    # Included/extended templates render inside the outer one; only the outermost is timed
+    profile.render_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile.render_depth -= 1
+        if not profile.render_depth:
+            profile.render_time += time.perf_counter() - start
+
+
+class ViewProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        Template._render = _profiled_render
+        connection_created.connect(_install, dispatch_uid='view_profiling')
+        # Connections opened before this middleware was loaded
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.VIEW_PROFILING['ENABLED']:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.record_request(request, response, profile, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.VIEW_PROFILING['ENABLED']:
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.record_request(request, response, profile, time.perf_counter() - start)
+        return response
+
+    def record_request(self, request, response, profile, total_time):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            record({
+                'view': match.view_name,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': profile.queries,
+                'render_queries': profile.render_queries,
+                'db_ms': round(profile.db_time * 1000, 2),
+                'render_ms': round(profile.render_time * 1000, 2),
+                'total_ms': round(total_time * 1000, 2),
+                'at': timezone.now(),
+            })
+
+
+def record(entry):
+    with _lock:
+        _buffer.append(entry)
+
+
+def recent_profiles():
+    """Recorded requests, newest first."""
+    with _lock:
+        entries = list(_buffer)
+    entries.reverse()
+    return entries
+
+
+def clear_profiles():
+    with _lock:
+        _buffer.clear()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list (fraction 0.95 -> p95); shared with the benchmark commands."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize_profiles(entries=None):
+    """Per-view aggregates over the buffer, the most queries per request first."""
+    by_view = {}
+    for entry in recent_profiles() if entries is None else entries:
+        by_view.setdefault(entry['view'], []).append(entry)
+
+    summary = []
+    for view, rows in by_view.items():
+        queries = [row['queries'] for row in rows]
+        total_ms = [row['total_ms'] for row in rows]
+        summary.append({
+            'view': view,
+            'requests': len(rows),
+            'avg_queries': round(statistics.fmean(queries), 1),
+            'max_queries': max(queries),
+            'max_render_queries': max(row['render_queries'] for row in rows),
+            'avg_db_ms': round(statistics.fmean(row['db_ms'] for row in rows), 2),
+            'avg_render_ms': round(statistics.fmean(row['render_ms'] for row in rows), 2),
+            'p50_ms': percentile(total_ms, 0.5),
+            'p95_ms': percentile(total_ms, 0.95),
+        })
+    summary.sort(key=lambda row: (-row['max_queries'], row['view']))
+    return summary
@@ -0,0 +1,170 @@
+"""
+The main queryset of each page, built in one place for the views and for
+`manage.py check_query_plans`, which EXPLAINs these same querysets so the
+check cannot drift from what the pages run. Views add the slice or the
+keyset page they show. Filters take the request's GET params (a QueryDict
+or dict), like filter_pending_requests in reviews.py.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from .reviews import filter_pending_requests
+from .search import matching_user_ids, search_users
+
+
+def optional_date(value):
+    """A YYYY-MM-DD filter value as a date, or None when it is blank or not a real date (2020-13-45)."""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+# ---------------- FAMILY HEADS ----------------
+def family_heads():
+    return User.objects.filter(role='FamilyHead')
+
+
+def recent_family_heads(search_query=''):
+    """Admin dashboard list: best search matches first, otherwise newest first."""
+    users = family_heads()
+    if search_query:
+        # Building the search query may itself query, so callers run this inside their query callable
+        return search_users(users, search_query).order_by('-search_rank', '-userid')
+    return users.order_by('-userid')
+
+
+def filter_family_heads(params):
+    """
+    Manage users list narrowed by the search, city and barangay filters, with
+    each row's distribution count.
+
+    Returns:
+        tuple: (queryset, keyset ordering) - ranked by search_rank when searching, newest first otherwise
+    """
+    search_query = params.get('search', '')
+    city_filter = params.get('city', '')
+    barangay_filter = params.get('barangay', '')
+
+    users = family_heads()
+
+    # Search results are ranked (best match first); the plain list is newest first
+    ordering = ['userid']
+    if search_query:
+        users = search_users(users, search_query)
+        ordering = ['search_rank', 'userid']
+
+    if city_filter:
+        users = users.filter(city__iexact=city_filter)
+
+    if barangay_filter:
+        users = users.filter(barangay__iexact=barangay_filter)
+
+    # Per-row distribution count as a correlated subquery, evaluated only for the rows on the page
+    distribution_count = ReliefDistribution.objects.filter(user=OuterRef('pk')).order_by().values('user').annotate(
+        total=Count('id')
+    ).values('total')
+    users = users.annotate(distribution_count=Coalesce(Subquery(distribution_count), 0))
+
+    return users, ordering
+
+
+def family_head_places(field):
+    """Distinct non-empty values of `field` ('city' or 'barangay') among family heads, for the filter dropdowns."""
+    return family_heads().exclude(**{f'{field}__isnull': True}).exclude(**{field: ''}).values_list(
+        field, flat=True
+    ).distinct()
+
+
+def users_with_contact(contact):
+    return User.objects.filter(contact=contact)
+
+
+def registered_since(since):
+    """Family heads registered at or after `since` (the user_role_joined_idx range)."""
+    return family_heads().filter(date_joined__gte=since)
+
+
+# ---------------- RESIDENT DASHBOARD ----------------
+def household_distributions(user):
+    return ReliefDistribution.objects.filter(user=user).select_related('item')
+
+
+def household_requests(user):
+    return ReliefRequest.objects.filter(user=user).order_by('-request_date')
+
+
+# ---------------- RELIEF REQUESTS ----------------
+def pending_request_list(params):
+    return filter_pending_requests(params).select_related('user').order_by('-request_date')
+
+
+def approved_request_list():
+    # The template shows the resident and the reviewer on every row
+    return ReliefRequest.objects.filter(status='approved').select_related(
+        'user', 'reviewed_by'
+    ).order_by('-reviewed_date')
+
+
+def undelivered_requests_in_barangay(barangay):
+    """Approved requests in the barangay that have not been given relief yet."""
+    return ReliefRequest.objects.filter(status='approved', relief_given=False, user__barangay__iexact=barangay)
+
+
+# ---------------- DISTRIBUTIONS ----------------
+def filter_distributions(params):
+    """
+    Distribution log narrowed by the search, category and date filters of the
+    distributions page, for keyset pages on (distribution_date, id).
+    """
+    search_query = params.get('search', '')
+    category_filter = params.get('category', '')
+    date_from = optional_date(params.get('date_from', ''))
+    date_to = optional_date(params.get('date_to', ''))
+
+    distributions = ReliefDistribution.objects.select_related('user', 'item', 'distributed_by')
+
+    if search_query:
+        distributions = distributions.filter(
+            Q(user_id__in=matching_user_ids(search_query)) |
+            Q(item__name__icontains=search_query)
+        )
+
+    if category_filter:
+        # Resolve the (small) set of item ids first so the (item, distribution_date, id) index is used
+        distributions = distributions.filter(
+            item_id__in=Inventory.objects.filter(category=category_filter).values('id')
+        )
+
+    # Date range as half-open bounds on the indexed distribution_date column
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        distributions = distributions.filter(distribution_date__gte=start)
+    if date_to:
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        distributions = distributions.filter(distribution_date__lt=end)
+
+    return distributions
+
+
+def recent_distributions():
+    return ReliefDistribution.objects.select_related('user', 'item').order_by('-distribution_date')
+
+
+def low_stock_items():
+    return Inventory.objects.filter(quantity__lte=10).order_by('quantity')
+
+
+# ---------------- NOTIFICATIONS ----------------
+def latest_notifications():
+    return Notification.objects.order_by('-created_at')
+
+
+def unread_notifications():
+    """Newest first, on the partial notif_unread_idx index."""
+    return Notification.objects.filter(is_read=False).order_by('-created_at')
@@ -0,0 +1,79 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .forms import PendingRequestFilterForm
+from .models import ReliefRequest, StatCounter, bump_stat
+from .rollups import record_bulk_review
+
+
+def filter_pending_requests(params):
+    """
+    Pending relief requests narrowed by the filters on the pending requests page
+    (relief_type, barangay, date_from, date_to). `params` is a QueryDict or dict.
+
+    Raises:
+        ValueError: if a filter is invalid (e.g. date_from=2026-02-30); it is
+            never dropped, since that would widen what a bulk review touches
+    """
+    form = PendingRequestFilterForm(params)
+    if not form.is_valid():
+        raise ValueError(f"Invalid filters. {form.error_summary()}")
+
+    requests = ReliefRequest.objects.filter(status='pending')
+
+    relief_type = form.cleaned_data['relief_type']
+    barangay = form.cleaned_data['barangay']
+    date_from = form.cleaned_data['date_from']
+    date_to = form.cleaned_data['date_to']
+
+    if relief_type:
+        requests = requests.filter(relief_type=relief_type)
+    if barangay:
+        requests = requests.filter(user__barangay__iexact=barangay)
+    if date_from:
+        requests = requests.filter(request_date__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        requests = requests.filter(
+            request_date__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+        )
+
+    return requests
+
+
+def review_requests(requests, action, reviewed_by, admin_notes='', relief_given=False):
+    """
+    Approves or denies many pending relief requests with a single
+    UPDATE ... WHERE id IN (...) AND status = 'pending'.
+
+    Args:
+        requests: ReliefRequest queryset selecting the requests to review
+        action: 'approve' or 'deny'
+        reviewed_by: Admin doing the review
+        admin_notes: Stored on denied requests
+        relief_given: Stored on approved requests
+
+    Returns:
+        int: number of requests that were still pending and got reviewed
+    """
+    if action == 'approve':
+        changes = {'status': 'approved', 'relief_given': relief_given}
+    elif action == 'deny':
+        changes = {'status': 'denied', 'admin_notes': admin_notes}
+    else:
+        raise ValueError("Action must be 'approve' or 'deny'.")
+
+    reviewed_date = timezone.now()
+    with transaction.atomic():
+        updated = requests.filter(status='pending').update(
+            reviewed_by=reviewed_by,
+            reviewed_date=reviewed_date,
+            **changes
+        )
+
+        # queryset.update() skips the ReliefRequest signals, so keep the counter and rollups in step here
+        bump_stat(StatCounter.PENDING_REQUESTS, -updated)
+        if updated:
+            record_bulk_review(changes['status'], reviewed_by, reviewed_date)
+    return updated
@@ -0,0 +1,274 @@
+"""
+Daily rollups behind the analytics charts (the DailyRollup table).
+
+Every distribution, request and review adds to one row keyed by metric, day,
+category, city and barangay, so a year-long trend reads a few thousand rollup
+rows instead of scanning the distribution and request tables. Days are in the
+project time zone. A request counts under its relief type; an approval or
+denial counts on the day it was reviewed. Every row counts under the category
+and place snapshotted on it when it was created (ReliefDistribution.category,
+city and barangay; ReliefRequest.city and barangay), so editing an item or
+moving a household later neither leaves the rollups behind nor disagrees
+with rebuild_rollups().
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyRollup, ReliefDistribution, ReliefRequest
+
+METRICS = [metric for metric, _ in DailyRollup.METRIC_CHOICES]
+DIMENSIONS = ('category', 'city', 'barangay')
+
+# Review outcome -> metric
+REVIEW_METRICS = {'approved': 'approval', 'denied': 'denial'}
+
+MAX_SERIES_DAYS = 366
+
+# Rollup rows per upsert statement (8 parameters each)
+UPSERT_BATCH_SIZE = 500
+
+
+def add_to_rollup(metric, day, category, city, barangay, count, quantity=0):
+    """Adds to one rollup row, creating it on first use. Safe under concurrent writers."""
+    if not count and not quantity:
+        return
+    key = {'metric': metric, 'day': day, 'category': category, 'city': city, 'barangay': barangay}
+    # update() skips auto_now
+    changes = {'count': F('count') + count, 'quantity': F('quantity') + quantity, 'updated_at': timezone.now()}
+    if DailyRollup.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            DailyRollup.objects.create(count=count, quantity=quantity, **key)
+    except IntegrityError:
+        # Another writer created the row first
+        DailyRollup.objects.filter(**key).update(**changes)
+
+
+def add_many_to_rollups(metric, totals):
+    """
+    `totals` maps (day, category, city, barangay) -> (count, quantity).
+    One INSERT ... ON CONFLICT DO UPDATE per UPSERT_BATCH_SIZE rows, adding to
+    existing rows (bulk_create(update_conflicts=True) can only overwrite them).
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    rows = [
+        (metric, connection.ops.adapt_datefield_value(day), category, city, barangay, count, quantity, now)
+        for (day, category, city, barangay), (count, quantity) in totals.items()
+        if count or quantity
+    ]
+    if not rows:
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(DailyRollup._meta.db_table)
+    columns = ['metric', 'day', 'category', 'city', 'barangay', 'count', 'quantity', 'updated_at']
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[offset:offset + UPSERT_BATCH_SIZE]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) VALUES {placeholders} "
+                f"ON CONFLICT ({', '.join(quote(column) for column in columns[:5])}) DO UPDATE SET "
+                f"{quote('count')} = {table}.{quote('count')} + excluded.{quote('count')}, "
+                f"{quote('quantity')} = {table}.{quote('quantity')} + excluded.{quote('quantity')}, "
+                f"{quote('updated_at')} = excluded.{quote('updated_at')}",
+                [value for row in batch for value in row],
+            )
+
+
+def record_distribution(distribution, sign):
+    add_to_rollup(
+        'distribution', timezone.localdate(distribution.distribution_date),
+        distribution.category, distribution.city, distribution.barangay,
+        sign, sign * distribution.quantity_distributed,
+    )
+
+
+def record_request(relief_request, sign):
+    add_to_rollup(
+        'request', timezone.localdate(relief_request.request_date),
+        relief_request.relief_type, relief_request.city, relief_request.barangay, sign,
+    )
+
+
+def record_review(relief_request, status, reviewed_date, sign):
+    metric = REVIEW_METRICS.get(status)
+    if metric is None or reviewed_date is None:
+        return
+    add_to_rollup(
+        metric, timezone.localdate(reviewed_date),
+        relief_request.relief_type, relief_request.city, relief_request.barangay, sign,
+    )
+
+
+def record_bulk_distribution(household_places, category, quantity, when):
+    """
+    Rollup update for distribute_in_bulk (bulk_create skips the signals).
+    `household_places` is one (city, barangay) pair per household served.
+    """
+    day = timezone.localdate(when)
+    households = Counter(household_places)
+    add_many_to_rollups('distribution', {
+        (day, category, city, barangay): (count, count * quantity)
+        for (city, barangay), count in households.items()
+    })
+
+
+def record_bulk_review(status, reviewed_by, reviewed_date):
+    """
+    Rollup update for review_requests (queryset.update() skips the signals).
+    The batch is found by the exact reviewed_date/reviewed_by it was stamped with.
+    """
+    metric = REVIEW_METRICS[status]
+    day = timezone.localdate(reviewed_date)
+    groups = ReliefRequest.objects.filter(
+        status=status, reviewed_by=reviewed_by, reviewed_date=reviewed_date
+    ).values('relief_type', 'city', 'barangay').annotate(total=Count('id'))
+    add_many_to_rollups(metric, {
+        (day, group['relief_type'], group['city'], group['barangay']): (group['total'], 0)
+        for group in groups
+    })
+
+
+def remove_from_rollups(metrics, **within):
+    """
+    Subtracts the source rows matching `within` (item=... or user=...) from
+    the rollups of `metrics`, with one grouped query and one upsert per
+    metric. Used before a cascading delete removes those rows, instead of
+    a receiver call per row.
+
+    Returns:
+        dict: metric -> number of source rows subtracted
+    """
+    removed = {}
+    for metric in metrics:
+        rows = list(_source_rows(metric, None, None, within))
+        add_many_to_rollups(metric, {
+            (row['rollup_day'], row['category'], row['city'], row['barangay']): (-row['count'], -(row['quantity'] or 0))
+            for row in rows
+        })
+        removed[metric] = sum(row['count'] for row in rows)
+    return removed
+
+
+def _source_rows(metric, start, end, within=None):
+    """GROUP BY over the source tables: the rollup rows for one metric (optionally only rows matching `within`)."""
+    if metric == 'distribution':
+        queryset, date_field = ReliefDistribution.objects.all(), 'distribution_date'
+        dimensions = {}
+        totals = {'count': Count('id'), 'quantity': Sum('quantity_distributed')}
+    else:
+        date_field = {'request': 'request_date', 'approval': 'reviewed_date', 'denial': 'reviewed_date'}[metric]
+        queryset = ReliefRequest.objects.all()
+        if metric != 'request':
+            status = {value: key for key, value in REVIEW_METRICS.items()}[metric]
+            queryset = queryset.filter(status=status, reviewed_date__isnull=False)
+        dimensions = {'category': F('relief_type')}
+        totals = {'count': Count('id'), 'quantity': Value(0)}
+
+    if within:
+        queryset = queryset.filter(**within)
+    queryset = queryset.annotate(
+        rollup_day=TruncDate(date_field, tzinfo=timezone.get_current_timezone()),
+        **dimensions,
+    )
+    if start:
+        queryset = queryset.filter(rollup_day__gte=start)
+    if end:
+        queryset = queryset.filter(rollup_day__lte=end)
+
+    return queryset.values('rollup_day', 'category', 'city', 'barangay').annotate(**totals).order_by()
+
+
+def rebuild_rollups(start=None, end=None, metrics=None):
+    """
+    Recomputes the rollups for days in [start, end] (all days when omitted)
+    from the source tables, replacing what is stored.
+
+    Returns:
+        dict: metric -> number of rollup rows written
+    """
+    written = {}
+    with transaction.atomic():
+        for metric in metrics or METRICS:
+            stored = DailyRollup.objects.filter(metric=metric)
+            if start:
+                stored = stored.filter(day__gte=start)
+            if end:
+                stored = stored.filter(day__lte=end)
+            stored.delete()
+
+            rows = [
+                DailyRollup(
+                    metric=metric, day=row['rollup_day'], category=row['category'],
+                    city=row['city'], barangay=row['barangay'],
+                    count=row['count'], quantity=row['quantity'] or 0,
+                )
+                for row in _source_rows(metric, start, end).iterator(chunk_size=2000)
+            ]
+            DailyRollup.objects.bulk_create(rows, batch_size=1000)
+            written[metric] = len(rows)
+    return written
+
+
+def time_series(metric, start, end, group_by=None, filters=None, value='count'):
+    """
+    Daily totals of one metric between two dates (inclusive), zero-filled.
+
+    Args:
+        metric: one of METRICS
+        start, end: dates
+        group_by: None or one of DIMENSIONS; one series per value
+        filters: optional {dimension: value} to narrow the rows
+        value: 'count' or 'quantity'
+
+    Returns:
+        dict: {'labels': [ISO dates], 'series': [{'name', 'data', 'total'}]}
+    """
+    rows = DailyRollup.objects.filter(metric=metric, day__gte=start, day__lte=end)
+    for dimension, wanted in (filters or {}).items():
+        rows = rows.filter(**{dimension: wanted})
+
+    group_fields = ['day', group_by] if group_by else ['day']
+    totals = rows.values(*group_fields).annotate(total=Sum(value)).order_by()
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    index = {day: position for position, day in enumerate(days)}
+    series = {}
+    for row in totals:
+        name = row[group_by] if group_by else 'Total'
+        data = series.setdefault(name, [0] * len(days))
+        data[index[row['day']]] += row['total'] or 0
+
+    if not group_by and not series:
+        series['Total'] = [0] * len(days)
+
+    return {
+        'labels': [day.isoformat() for day in days],
+        'series': [
+            {'name': name, 'data': data, 'total': sum(data)}
+            for name, data in sorted(series.items(), key=lambda item: -sum(item[1]))
+        ],
+    }
+
+
+def totals_by(metric, dimension):
+    """All-time totals of one metric per category/city/barangay, from the rollups."""
+    return list(
+        DailyRollup.objects.filter(metric=metric)
+        .values(dimension).annotate(total=Sum('count')).order_by(dimension)
+    )
+
+
+def rollups_version():
+    """
+    Time of the latest rollup write (an index lookup), for conditional GETs
+    of the analytics series. A rebuild that only removes rows is not seen.
+    """
+    return DailyRollup.objects.aggregate(latest=Max('updated_at'))['latest']
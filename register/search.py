@@ -0,0 +1,130 @@
+"""
+Resident search backed by a maintained index on User.search_text.
+
+- PostgreSQL: pg_trgm GIN index, so LIKE '%term%' is an index scan; ranked by trigram word similarity.
+- SQLite: FTS5 table with the trigram tokenizer, kept in sync by triggers; ranked by bm25.
+- Anything else (or terms too short for trigrams): LIKE on search_text, unranked.
+
+The index, FTS table and triggers are created by migration 0009_user_search_text,
+which carries its own copy of the DDL. On SQLite, a migration that rebuilds
+register_user (most AddField/AlterField on User) drops the triggers and must
+re-create them the same way (see 0016_user_date_joined).
+"""
+from django.db import connection
+from django.db.models import F, FloatField, Lookup, Q, Value
+from django.db.models.functions import Cast
+
+from .models import User, UserSearchIndex
+
+FTS_TABLE = UserSearchIndex._meta.db_table
+
+# Trigram indexes cannot match anything shorter than three characters
+MIN_INDEXED_TERM = 3
+
+_fts_available = None
+
+
+class Match(Lookup):
+    """`search_text__match=...` -> FTS5 `search_text MATCH ...` on UserSearchIndex."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+UserSearchIndex._meta.get_field('search_text').register_lookup(Match)
+
+
+def backend_name():
+    if connection.vendor == 'postgresql':
+        return 'postgres-trigram'
+    if connection.vendor == 'sqlite' and _sqlite_fts_available():
+        return 'sqlite-fts5'
+    return 'like'
+
+
+def _sqlite_fts_available():
+    global _fts_available
+    if _fts_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available = cursor.fetchone() is not None
+    return _fts_available
+
+
+def _words(term):
+    return [word for word in term.lower().split() if word]
+
+
+def _fts_match(words):
+    # Every word as a quoted phrase; FTS5 ANDs adjacent phrases
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def _like_filter(words):
+    condition = Q()
+    for word in words:
+        condition &= Q(search_text__contains=word)
+    return condition
+
+
+def matching_user_ids(term):
+    """
+    Returns a subquery of userids matching the search term, for use as
+    `user_id__in=` / `userid__in=` on other querysets (no ranking).
+    """
+    words = _words(term)
+    if not words:
+        return User.objects.values('userid')
+
+    if backend_name() == 'sqlite-fts5' and min(len(word) for word in words) >= MIN_INDEXED_TERM:
+        return UserSearchIndex.objects.filter(search_text__match=_fts_match(words)).values('user_id')
+
+    return User.objects.filter(_like_filter(words)).values('userid')
+
+
+def search_users(queryset, term):
+    """
+    Filters a User queryset down to the rows matching the search term and
+    annotates each with `search_rank` (higher is a better match).
+
+    Every whitespace-separated word must appear somewhere in the user's
+    username, names, contact or address.
+    """
+    words = _words(term)
+    if not words:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = backend_name()
+
+    if backend == 'postgres-trigram':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        # word_similarity() returns real; as double precision the rank keeps its exact value
+        # through a keyset cursor, so a page ending inside a tie continues from the right row
+        return queryset.filter(_like_filter(words)).annotate(
+            search_rank=Cast(TrigramWordSimilarity(' '.join(words), 'search_text'), FloatField())
+        )
+
+    if backend == 'sqlite-fts5' and min(len(word) for word in words) >= MIN_INDEXED_TERM:
+        # Joins the FTS table on rowid; its rank (bm25) is lower for better matches, so negate it
+        return queryset.filter(search_index__search_text__match=_fts_match(words)).annotate(
+            search_rank=-F('search_index__rank')
+        )
+
+    return queryset.filter(_like_filter(words)).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def legacy_search_filter(term):
+    """The OR-ed icontains chain the admin views used before the search index; kept for benchmarking."""
+    return (
+        Q(username__icontains=term) |
+        Q(firstname__icontains=term) |
+        Q(lastname__icontains=term) |
+        Q(contact__icontains=term) |
+        Q(address__icontains=term)
+    )
@@ -0,0 +1,236 @@
+"""
+Server-Sent Events stream of new admin notifications (see notification_stream in views.py).
+
+One watcher per process checks the newest Notification id and the unread
+count every NOTIFICATION_STREAM['POLL_INTERVAL'] seconds (two indexed
+queries) and wakes every open stream when either changes, so 50 open admin
+tabs cost one check per interval instead of 50 polls. New rows are read
+once into a short backlog that all streams send from. A client resuming
+from a Last-Event-ID first catches up from the database on the
+notifications since then that are still unread (what get_notifications_ajax
+lists), so ones read meanwhile are not replayed. The watcher only runs while
+at least one stream is open; a failed check is logged and retried, backing
+off up to MAX_BACKOFF seconds, while the streams stay open.
+
+Streams need the ASGI entry point (MyReliefSystem/asgi.py): under WSGI
+each open stream would hold a worker, so the view refuses and pages keep
+polling get_notifications_ajax.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+BACKLOG = 200
+
+# Longest wait between checks while the database keeps failing (seconds)
+MAX_BACKOFF = 60
+
+# A client further behind than this only gets the latest ones
+CATCH_UP_LIMIT = 50
+
+# Reconnect delay the browser is told to use (milliseconds)
+RETRY_MS = 3000
+
+
+def serialize_notification(notification):
+    # Same shape as get_notifications_ajax
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.notification_type,
+        'created_at': notification.created_at.strftime('%Y-%m-%d %H:%M'),
+    }
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def parse_cursor(value):
+    """Last-Event-ID (a Notification id) -> int, or None when missing or malformed."""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+class NotificationWatcher:
+    def __init__(self, loop):
+        self.loop = loop
+        self.last_id = None
+        self.unread = None
+        self.backlog = deque(maxlen=BACKLOG)
+        # The backlog holds every notification with complete_after < id <= last_id
+        self.complete_after = None
+        self.subscribers = 0
+        self.task = None
+        self._change = loop.create_future()
+
+    async def subscribe(self):
+        """
+        Counts a stream in (before anything can fail) and starts watching.
+        Call it inside the try whose finally calls unsubscribe().
+        """
+        self.subscribers += 1
+        if self.last_id is None:
+            await self.check()
+        if self.task is None:
+            self.task = self.loop.create_task(self.run())
+
+    def unsubscribe(self):
+        self.subscribers -= 1
+
+    def next_change(self):
+        """A future resolved the next time new notifications arrive or the unread count changes."""
+        return self._change
+
+    async def run(self):
+        interval = settings.NOTIFICATION_STREAM['POLL_INTERVAL']
+        failures = 0
+        try:
+            while self.subscribers > 0:
+                await asyncio.sleep(min(interval * 2 ** failures, max(interval, MAX_BACKOFF)))
+                try:
+                    await self.check()
+                except Exception:
+                    # One failed check must not stop change detection for every open stream
+                    failures = min(failures + 1, 10)
+                    logger.exception('Notification stream check failed (%d in a row)', failures)
+                    await sync_to_async(close_old_connections)()
+                else:
+                    failures = 0
+        finally:
+            # Nobody is listening: start afresh from the next subscriber rather than catch up on the gap
+            self.task = None
+            self.last_id = self.complete_after = None
+            self.backlog.clear()
+
+    async def check(self):
+        last_id = (await Notification.objects.aaggregate(last=Max('id')))['last'] or 0
+        unread = await Notification.objects.filter(is_read=False).acount()
+
+        if self.last_id is None:
+            self.last_id = self.complete_after = last_id
+            self.unread = unread
+            return
+
+        changed = unread != self.unread
+        self.unread = unread
+        if last_id > self.last_id:
+            rows = [
+                serialize_notification(notification) async for notification in
+                Notification.objects.filter(id__gt=self.last_id, id__lte=last_id).order_by('-id')[:BACKLOG]
+            ]
+            rows.reverse()
+            if len(rows) == BACKLOG:
+                self.backlog.clear()
+                self.complete_after = rows[0]['id'] - 1
+            for row in rows:
+                if len(self.backlog) == BACKLOG:
+                    self.complete_after = self.backlog[0]['id']
+                self.backlog.append(row)
+            self.last_id = last_id
+            changed = True
+
+        if changed:
+            self._change.set_result(None)
+            self._change = self.loop.create_future()
+
+    async def since(self, cursor):
+        """Notifications after `cursor`, oldest first (the live part of a stream)."""
+        if cursor >= self.last_id:
+            return []
+        if cursor >= self.complete_after:
+            return [row for row in self.backlog if row['id'] > cursor]
+        latest = [
+            serialize_notification(notification) async for notification in
+            Notification.objects.filter(id__gt=cursor, id__lte=self.last_id).order_by('-id')[:CATCH_UP_LIMIT]
+        ]
+        latest.reverse()
+        return latest
+
+
+async def unread_between(cursor, last_id):
+    """Unread notifications with cursor < id <= last_id, oldest first (at most CATCH_UP_LIMIT, the latest)."""
+    if cursor >= last_id:
+        return []
+    latest = [
+        serialize_notification(notification) async for notification in
+        Notification.objects.filter(id__gt=cursor, id__lte=last_id, is_read=False).order_by('-id')[:CATCH_UP_LIMIT]
+    ]
+    latest.reverse()
+    return latest
+
+
+_watchers = {}
+
+
+def get_watcher():
+    """The watcher for the running event loop (one per ASGI worker process)."""
+    loop = asyncio.get_running_loop()
+    watcher = _watchers.get(loop)
+    if watcher is None:
+        _watchers.clear()
+        watcher = _watchers[loop] = NotificationWatcher(loop)
+    return watcher
+
+
+async def notification_events(cursor=None):
+    """
+    The event stream: `notification` events (with the Notification id as the
+    event id, so browsers resume from it) and `unread` events with the count.
+    Ends after NOTIFICATION_STREAM['MAX_DURATION'] seconds; EventSource then
+    reconnects with Last-Event-ID and nothing is lost.
+    """
+    options = settings.NOTIFICATION_STREAM
+    watcher = get_watcher()
+    try:
+        await watcher.subscribe()
+        yield f'retry: {RETRY_MS}\n\n'
+        if cursor is not None:
+            # Catching up after a reconnect: only what is still unread, like the dropdown
+            caught_up_to = watcher.last_id
+            for row in await unread_between(cursor, caught_up_to):
+                yield format_event('notification', row, event_id=row['id'])
+                cursor = row['id']
+            if cursor < caught_up_to:
+                # An id-only message fires no event but moves the browser's Last-Event-ID past the read ones
+                yield f'id: {caught_up_to}\n\n'
+            cursor = caught_up_to
+        else:
+            cursor = watcher.last_id
+        sent_unread = None
+        deadline = watcher.loop.time() + options['MAX_DURATION']
+
+        while True:
+            for row in await watcher.since(cursor):
+                yield format_event('notification', row, event_id=row['id'])
+                cursor = row['id']
+            if watcher.unread != sent_unread:
+                sent_unread = watcher.unread
+                yield format_event('unread', {'count': sent_unread})
+
+            remaining = deadline - watcher.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(asyncio.shield(watcher.next_change()), min(options['KEEPALIVE'], remaining))
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+    finally:
+        watcher.unsubscribe()
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import User, Inventory, ReliefDistribution, ReliefRequest, StatCounter
+
+
+def compute_stats():
+    """
+    Computes every dashboard counter from the source tables (full scans).
+    Only used to seed or reconcile the StatCounter table.
+    """
+    return {
+        StatCounter.TOTAL_FAMILIES: User.objects.filter(role='FamilyHead').count(),
+        StatCounter.TOTAL_INVENTORY: Inventory.objects.aggregate(total=Sum('quantity'))['total'] or 0,
+        StatCounter.TOTAL_DISTRIBUTIONS: ReliefDistribution.objects.count(),
+        StatCounter.PENDING_REQUESTS: ReliefRequest.objects.filter(status='pending').count(),
+    }
+
+
+def rebuild_stats():
+    """
+    Recomputes all counters and stores them. Returns a dict of
+    key -> (old value or None, new value).
+    """
+    changes = {}
+    with transaction.atomic():
+        existing = {
+            counter.key: counter.value
+            for counter in StatCounter.objects.select_for_update()
+        }
+        for key, value in compute_stats().items():
+            StatCounter.objects.update_or_create(key=key, defaults={'value': value})
+            changes[key] = (existing.get(key), value)
+    return changes
+
+
+def get_stats():
+    """
+    Returns the dashboard counters as a dict, reading only the StatCounter table.
+    Rebuilds the table first if any counter is missing.
+    """
+    stats = dict(StatCounter.objects.values_list('key', 'value'))
+    if any(key not in stats for key, _ in StatCounter.KEY_CHOICES):
+        stats = {key: new for key, (old, new) in rebuild_stats().items()}
+    return stats
@@ -0,0 +1,122 @@
+"""
+Login throttling backed by Django's cache framework.
+
+Each limit is a sliding window counter: hits are counted in fixed windows and
+the previous window is weighted by how much of it still overlaps the sliding
+window, which needs two cache keys per identity instead of a timestamp log.
+Checks happen before any database lookup or password hashing.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULTS = {
+    'ENABLED': True,
+    'WINDOW': 300,           # seconds
+    'IP_LIMIT': 30,          # login attempts per IP per window
+    'USERNAME_LIMIT': 5,     # failed logins per username per window
+    'NUM_PROXIES': 0,        # trusted reverse proxies in front of the app (X-Forwarded-For)
+}
+
+STATS_KEYS = ('checked', 'rejected_ip', 'rejected_username')
+
+THROTTLED_MESSAGE = "Too many login attempts. Please wait a few minutes and try again."
+
+
+def get_setting(name):
+    return getattr(settings, 'LOGIN_THROTTLE', {}).get(name, DEFAULTS[name])
+
+
+def client_ip(request):
+    num_proxies = get_setting('NUM_PROXIES')
+    if num_proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= num_proxies:
+            # The entry added by the outermost trusted proxy is the real client
+            return forwarded[-num_proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _key(scope, identity, window_index):
+    digest = hashlib.sha1(identity.encode('utf-8')).hexdigest()
+    return f'login_throttle:{scope}:{digest}:{window_index}'
+
+
+def _count(scope, identity, now=None):
+    """Sliding window estimate of hits for this identity."""
+    window = get_setting('WINDOW')
+    now = time.time() if now is None else now
+    index = int(now // window)
+    counts = cache.get_many([_key(scope, identity, index), _key(scope, identity, index - 1)])
+    current = counts.get(_key(scope, identity, index), 0)
+    previous = counts.get(_key(scope, identity, index - 1), 0)
+    overlap = 1 - (now % window) / window
+    return current + previous * overlap
+
+
+def _hit(scope, identity):
+    window = get_setting('WINDOW')
+    key = _key(scope, identity, int(time.time() // window))
+    # Two windows of TTL: the key is still needed as the "previous" window
+    if not cache.add(key, 1, timeout=window * 2):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=window * 2)
+
+
+def _bump_stat(name):
+    key = f'login_throttle:stats:{name}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def check_login(request, username):
+    """
+    Counts a login attempt and decides whether it may proceed.
+
+    Returns:
+        str: error message to show if the attempt is throttled, otherwise None
+    """
+    if not get_setting('ENABLED'):
+        return None
+
+    _bump_stat('checked')
+    ip = client_ip(request)
+
+    if _count('ip', ip) >= get_setting('IP_LIMIT'):
+        _bump_stat('rejected_ip')
+        return THROTTLED_MESSAGE
+
+    if username and _count('username', username.lower()) >= get_setting('USERNAME_LIMIT'):
+        _bump_stat('rejected_username')
+        return THROTTLED_MESSAGE
+
+    _hit('ip', ip)
+    return None
+
+
+def record_failure(username):
+    """Counts a failed login against the username."""
+    if get_setting('ENABLED') and username:
+        _hit('username', username.lower())
+
+
+def reset_failures(username):
+    """Clears the username's failures after a successful login."""
+    if username:
+        window = get_setting('WINDOW')
+        index = int(time.time() // window)
+        identity = username.lower()
+        cache.delete_many([_key('username', identity, index), _key('username', identity, index - 1)])
+
+
+def throttle_stats():
+    """Hit/reject counters since the cache was last cleared."""
+    values = cache.get_many([f'login_throttle:stats:{name}' for name in STATS_KEYS])
+    return {name: values.get(f'login_throttle:stats:{name}', 0) for name in STATS_KEYS}
@@ -1,26 +1,389 @@
+import logging
 import uuid
 import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from django.conf import settings
-from dotenv import load_dotenv
-from django.contrib.auth.hashers import make_password
+from django.db import close_old_connections, transaction
+from django.contrib.auth.hashers import identify_hasher, make_password
 
-load_dotenv()
+from .models import User, queue_supabase_sync
 
-# Get Supabase configuration from settings or environment
-SUPABASE_URL = getattr(settings, 'SUPABASE_URL', os.getenv("SUPABASE_URL"))
-SUPABASE_KEY = getattr(settings, 'SUPABASE_SERVICE_ROLE_KEY', None) or getattr(settings, 'SUPABASE_KEY', os.getenv("SUPABASE_KEY"))
-SUPABASE_BUCKET = getattr(settings, 'SUPABASE_BUCKET', os.getenv("SUPABASE_BUCKET", "id_proof"))
-SUPABASE_TABLE = getattr(settings, 'SUPABASE_TABLE', os.getenv("SUPABASE_TABLE", "Register"))
+logger = logging.getLogger(__name__)
 
-# Initialize Supabase client
+# Get Supabase configuration from settings (settings.py loads .env)
+SUPABASE_URL = getattr(settings, 'SUPABASE_URL', None)
 # Using service_role key if available to bypass RLS, otherwise use anon key
-from supabase import create_client
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+SUPABASE_KEY = getattr(settings, 'SUPABASE_SERVICE_ROLE_KEY', None) or getattr(settings, 'SUPABASE_KEY', None)
+SUPABASE_BUCKET = getattr(settings, 'SUPABASE_BUCKET', None) or "id_proof"
+SUPABASE_TABLE = getattr(settings, 'SUPABASE_TABLE', None) or "Register"
+
+# "live" talks to Supabase; "fake" uses the in-memory FakeSupabaseClient (offline runs, benchmarks)
+SUPABASE_BACKEND = getattr(settings, 'SUPABASE_BACKEND', "live")
+SUPABASE_TIMEOUT = getattr(settings, 'SUPABASE_TIMEOUT', 10)        # seconds, per HTTP call
+SUPABASE_POOL_SIZE = getattr(settings, 'SUPABASE_POOL_SIZE', 10)    # keep-alive connections per process
+
+# ID proof storage: "supabase" (the default when Supabase is configured) or "local" (MEDIA_ROOT, the offline stand-in)
+ID_PROOF_STORAGE = getattr(settings, 'ID_PROOF_STORAGE', os.getenv("ID_PROOF_STORAGE", "supabase" if SUPABASE_URL else "local"))
+ID_PROOF_UPLOAD_WORKERS = int(getattr(settings, 'ID_PROOF_UPLOAD_WORKERS', os.getenv("ID_PROOF_UPLOAD_WORKERS", "2")))
+
+# Uploads are copied and sent in chunks of this size, never read whole into memory
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Latencies kept per operation for the percentiles in supabase_metrics()
+LATENCY_SAMPLES = 500
+
+# Register table row cache (per process); misses are cached for a shorter time
+SUPABASE_CACHE_SIZE = getattr(settings, 'SUPABASE_CACHE_SIZE', 1024)
+SUPABASE_CACHE_TTL = getattr(settings, 'SUPABASE_CACHE_TTL', 60)
+SUPABASE_CACHE_NEGATIVE_TTL = getattr(settings, 'SUPABASE_CACHE_NEGATIVE_TTL', 15)
+
+# Usernames per `in` query in get_many_from_supabase_table (keeps the URL short)
+IN_QUERY_CHUNK = 100
+
+
+class SupabaseNotConfigured(Exception):
+    pass
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after their TTL.
+
+    `generation` changes on every delete: a value fetched before an
+    invalidation is not stored, so a slow read cannot re-cache stale data.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def get(self, key):
+        """Returns (found, value); a cached miss is (True, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._counts['expired'] += 1
+                entry = None
+            if entry is None:
+                self._counts['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            if entry[1] is None:
+                self._counts['negative_hits'] += 1
+            return True, entry[1]
+
+    def set(self, key, value, ttl, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self.generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            for name in self._counts:
+                self._counts[name] = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts, size=len(self._entries), maxsize=self.maxsize)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+supabase_row_cache = LRUCache(SUPABASE_CACHE_SIZE)
+
+
+# ---------------- SUPABASE CLIENT ----------------
+# Created on first use rather than at import, once per process (gunicorn forks
+# workers after importing the app, and a client must not be shared across a fork).
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def _create_supabase_client():
+    if SUPABASE_BACKEND == "fake":
+        from .fake_supabase import FakeSupabaseClient
+        return FakeSupabaseClient()
+
+    if not (SUPABASE_URL and SUPABASE_KEY):
+        raise SupabaseNotConfigured("Supabase is not configured (SUPABASE_URL / SUPABASE_KEY)")
+
+    import httpx
+    from supabase import ClientOptions, create_client
+
+    timeouts = {
+        'postgrest_client_timeout': SUPABASE_TIMEOUT,
+        'storage_client_timeout': SUPABASE_TIMEOUT,
+    }
+    http_client = httpx.Client(
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT),
+        limits=httpx.Limits(max_connections=SUPABASE_POOL_SIZE, max_keepalive_connections=SUPABASE_POOL_SIZE),
+    )
+    try:
+        # One keep-alive pool shared by the table and storage clients
+        options = ClientOptions(httpx_client=http_client, **timeouts)
+    except TypeError:
+        # Older supabase-py: each sub-client keeps its own (still reused) session
+        http_client.close()
+        options = ClientOptions(**timeouts)
+    return create_client(SUPABASE_URL, SUPABASE_KEY, options=options)
+
+
+def get_supabase():
+    """
+    Returns this process's Supabase client, creating it on first use.
+
+    Raises:
+        SupabaseNotConfigured: if the URL or key is missing (live backend)
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = _create_supabase_client()
+                _client_pid = pid
+    return _client
+
+
+def set_supabase_client(client):
+    """Replaces the process's client (e.g. with a FakeSupabaseClient); None goes back to lazy creation."""
+    global _client, _client_pid
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid() if client is not None else None
+
+
+@contextmanager
+def supabase_call(operation):
+    """
+    Times one Supabase round trip for supabase_metrics():
+
+        with supabase_call("table.select") as client:
+            response = client.table(SUPABASE_TABLE).select("*").execute()
+    """
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield get_supabase()
+        ok = True
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with _metrics_lock:
+            stats = _metrics.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'samples': deque(maxlen=LATENCY_SAMPLES),
+            })
+            stats['calls'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['samples'].append(elapsed_ms)
+
+
+def supabase_metrics():
+    """Per-operation call counts, errors and latency (ms) for this process."""
+    with _metrics_lock:
+        snapshot = {operation: (dict(stats), sorted(stats['samples'])) for operation, stats in _metrics.items()}
+
+    result = {}
+    for operation, (stats, samples) in snapshot.items():
+        result[operation] = {
+            'calls': stats['calls'],
+            'errors': stats['errors'],
+            'avg_ms': round(stats['total_ms'] / stats['calls'], 2),
+            'p50_ms': round(samples[len(samples) // 2], 2),
+            'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            'max_ms': round(stats['max_ms'], 2),
+        }
+    return result
+
+
+def reset_supabase_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+class LocalStorage:
+    """Stores ID proofs under MEDIA_ROOT/<bucket>/ and serves them from MEDIA_URL."""
+
+    def __init__(self, bucket=SUPABASE_BUCKET):
+        self.bucket = bucket or "id_proof"
+
+    def save(self, file_name, path, content_type):
+        directory = os.path.join(settings.MEDIA_ROOT, self.bucket)
+        os.makedirs(directory, exist_ok=True)
+        shutil.copyfile(path, os.path.join(directory, file_name))
+        return f"{settings.MEDIA_URL}{self.bucket}/{file_name}"
+
+
+class SupabaseStorage:
+    """Stores ID proofs in the Supabase Storage bucket."""
+
+    def __init__(self, bucket=SUPABASE_BUCKET):
+        self.bucket = bucket
+
+    def save(self, file_name, path, content_type):
+        # Passing an open file lets the HTTP client stream the body from disk
+        with open(path, "rb") as f, supabase_call("storage.upload") as client:
+            response = client.storage.from_(self.bucket).upload(
+                path=file_name,
+                file=f,
+                file_options={"content-type": content_type, "upsert": "false"}
+            )
+
+        # Check if upload was successful
+        if response is None:
+            raise Exception("Upload returned None response")
+
+        # Check for errors in response
+        if hasattr(response, 'error') and response.error:
+            raise Exception(f"Upload error: {response.error}")
+
+        return self.public_url(file_name)
+
+    def public_url(self, file_name):
+        # Builds the URL locally; it does not call the API
+        public_url_response = get_supabase().storage.from_(self.bucket).get_public_url(file_name)
+        if isinstance(public_url_response, dict):
+            return public_url_response.get('publicUrl', str(public_url_response))
+        return str(public_url_response)
+
+
+STORAGE_BACKENDS = {
+    'local': LocalStorage,
+    'supabase': SupabaseStorage,
+}
+
+
+def get_id_proof_storage():
+    try:
+        return STORAGE_BACKENDS[ID_PROOF_STORAGE]()
+    except KeyError:
+        raise ValueError(f"Unknown ID_PROOF_STORAGE: {ID_PROOF_STORAGE}")
+
+
+def id_proof_file_name(file, username):
+    # Create a unique file name for each upload
+    file_extension = file.name.split('.')[-1].lower()
+    return f"{username}_{uuid.uuid4()}.{file_extension}"
+
+
+def spool_upload(file):
+    """
+    Copies an uploaded file to a temporary file of our own, chunk by chunk.
+
+    Django deletes its own temporary upload files when the request finishes,
+    so anything that outlives the request needs this copy.
+
+    Returns:
+        str: path of the spooled copy (the caller deletes it)
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="id_proof_", delete=False)
+    with spool:
+        for chunk in file.chunks(UPLOAD_CHUNK_SIZE):
+            spool.write(chunk)
+    return spool.name
+
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def _get_upload_executor():
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(
+                max_workers=ID_PROOF_UPLOAD_WORKERS, thread_name_prefix="id-proof-upload"
+            )
+        return _upload_executor
+
+
+def _finish_id_proof_upload(user_id, file_name, path, content_type):
+    try:
+        url = get_id_proof_storage().save(file_name, path, content_type)
+        # update() keeps this from overwriting fields the user changed meanwhile
+        User.objects.filter(userid=user_id).update(id_proof=url)
+        queue_supabase_sync([user_id])
+        logger.info("Stored ID proof for user %s: %s", user_id, file_name)
+        return url
+    except Exception:
+        logger.exception("ID proof upload failed for user %s", user_id)
+        return None
+    finally:
+        os.unlink(path)
+        close_old_connections()
+
+
+def upload_id_proof_async(file, user_id, username):
+    """
+    Hands an ID proof upload to a background thread and returns immediately.
+
+    Once the current transaction commits, still during the request, the file
+    is spooled to disk in chunks (bounded memory) and the upload starts;
+    User.id_proof is filled in when it finishes. A rolled-back registration
+    never spools, so it leaves no temporary file behind.
+
+    Returns:
+        concurrent.futures.Future | None: resolves to the stored URL (or None on
+        failure) once the upload has run; None if there was no file
+    """
+    if not file:
+        return None
+
+    file_name = id_proof_file_name(file, username)
+    content_type = getattr(file, 'content_type', None) or "application/octet-stream"
+
+    result = Future()
+
+    def submit():
+        try:
+            path = spool_upload(file)
+        except OSError:
+            logger.exception("Could not spool the ID proof for user %s", user_id)
+            result.set_result(None)
+            return
+        future = _get_upload_executor().submit(_finish_id_proof_upload, user_id, file_name, path, content_type)
+        future.add_done_callback(lambda done: result.set_result(done.result()))
+
+    transaction.on_commit(submit)
+    return result
 
 
 def upload_to_supabase(file, username):
     """
     Uploads an image to Supabase Storage and returns the public URL.
+
+    Synchronous; registration uses upload_id_proof_async instead.
     
     Args:
         file: Django UploadedFile object
@@ -31,46 +394,17 @@ def upload_to_supabase(file, username):
     """
     if not file:
         return None
-    
-    # Reset file pointer in case it was already read
-    file.seek(0)
-    
-    # Create a unique file name for each upload
-    file_extension = file.name.split('.')[-1]
-    file_name = f"{username}_{uuid.uuid4()}.{file_extension}"
 
-    # Read file bytes
-    file_bytes = file.read()
-    
-    # Reset file pointer after reading (in case it's used elsewhere)
-    file.seek(0)
+    file_name = id_proof_file_name(file, username)
+
+    # Stream to a spool file instead of reading the whole upload into memory
+    path = spool_upload(file)
 
     # Upload to Supabase bucket
     try:
-        # Upload file to Supabase storage
-        response = supabase.storage.from_(SUPABASE_BUCKET).upload(
-            path=file_name,
-            file=file_bytes,
-            file_options={"content-type": file.content_type, "upsert": "false"}
-        )
-
-        # Check if upload was successful
-        if response is None:
-            raise Exception("Upload returned None response")
-        
-        # Check for errors in response
-        if hasattr(response, 'error') and response.error:
-            raise Exception(f"Upload error: {response.error}")
+        storage = SupabaseStorage()
+        public_url = storage.save(file_name, path, file.content_type)
 
-        # Get the public URL
-        public_url_response = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(file_name)
-        
-        # Extract URL from response
-        if isinstance(public_url_response, dict):
-            public_url = public_url_response.get('publicUrl', str(public_url_response))
-        else:
-            public_url = str(public_url_response)
-        
         print(f"✅ Successfully uploaded to Supabase: {file_name}")
         return public_url
 
@@ -81,21 +415,25 @@ def upload_to_supabase(file, username):
         if "already exists" in error_msg.lower() or "duplicate" in error_msg.lower():
             # File already exists, try to get existing URL
             try:
-                existing_url = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(file_name)
+                existing_url = get_supabase().storage.from_(SUPABASE_BUCKET).get_public_url(file_name)
                 print(f"⚠️ File exists, returning existing URL")
                 return str(existing_url) if isinstance(existing_url, dict) else existing_url
             except:
                 pass
         return None
 
+    finally:
+        os.unlink(path)
+
 
 def save_to_supabase_table(username, password, address, contact, id_proof_url=None):
     """
-    Saves registration data to Supabase Register table.
+    Saves registration data to Supabase Register table, one row per call.
+    Registrations are mirrored in batches by register/mirror.py instead.
     
     Args:
         username: User's username
-        password: Plain text password (will be hashed)
+        password: Plain text password (will be hashed) or an existing Django hash
         address: User's address
         contact: User's contact number
         id_proof_url: Optional URL of the uploaded ID proof image
@@ -104,8 +442,12 @@ def save_to_supabase_table(username, password, address, contact, id_proof_url=No
         bool: True if successful, False otherwise
     """
     try:
-        # Hash the password using Django's password hasher
-        hashed_password = make_password(password)
+        # Hash the password using Django's password hasher (unless it already is a Django hash)
+        try:
+            identify_hasher(password)
+            hashed_password = password
+        except ValueError:
+            hashed_password = make_password(password)
         
         # Prepare data for Supabase table
         data = {
@@ -120,7 +462,12 @@ def save_to_supabase_table(username, password, address, contact, id_proof_url=No
             data["id_proof"] = id_proof_url  # Using 'id_proof' as column name matching the model
         
         # Insert into Supabase table
-        response = supabase.table(SUPABASE_TABLE).insert(data).execute()
+        try:
+            with supabase_call("table.insert") as client:
+                response = client.table(SUPABASE_TABLE).insert(data).execute()
+        finally:
+            # Inserted or not (e.g. duplicate), a cached copy or cached miss may now be wrong
+            invalidate_supabase_user(username)
         
         # Check if insertion was successful
         # Supabase returns a PostgrestResponse object with .data attribute
@@ -146,7 +493,10 @@ def save_to_supabase_table(username, password, address, contact, id_proof_url=No
 
 def get_from_supabase_table(username):
     """
-    Retrieves user data from Supabase Register table.
+    Retrieves user data from Supabase Register table, through the row cache.
+
+    Found rows are cached for SUPABASE_CACHE_TTL seconds and misses for
+    SUPABASE_CACHE_NEGATIVE_TTL; failed lookups are not cached.
     
     Args:
         username: Username to search for
@@ -154,20 +504,72 @@ def get_from_supabase_table(username):
     Returns:
         dict: User data if found, None otherwise
     """
+    found, user_data = supabase_row_cache.get(username)
+    if found:
+        return dict(user_data) if user_data else None
+
+    generation = supabase_row_cache.generation
     try:
         # Query Supabase table
-        response = supabase.table(SUPABASE_TABLE).select("*").eq("username", username).execute()
-        
-        # Check if data was found
-        if hasattr(response, 'data') and response.data and len(response.data) > 0:
-            user_data = response.data[0]
-            print(f"✅ Successfully retrieved from Supabase: {username}")
-            return user_data
-        else:
-            print(f"⚠️ No user found in Supabase: {username}")
-            return None
-            
+        with supabase_call("table.select") as client:
+            response = client.table(SUPABASE_TABLE).select("*").eq("username", username).execute()
     except Exception as e:
         error_msg = str(e)
         print(f"❌ Supabase table retrieve error: {error_msg}")
         return None
+
+    # Check if data was found
+    user_data = response.data[0] if getattr(response, 'data', None) else None
+    _cache_supabase_row(username, user_data, generation)
+    return dict(user_data) if user_data else None
+
+
+def get_many_from_supabase_table(usernames):
+    """
+    Batch version of get_from_supabase_table: cached rows are served from the
+    cache and the rest are fetched with one `in` query per IN_QUERY_CHUNK usernames.
+
+    Returns:
+        dict: username -> user data, or None if the user is not in the table
+            (usernames whose lookup failed are left out)
+    """
+    result = {}
+    missing = []
+    for username in dict.fromkeys(usernames):
+        found, user_data = supabase_row_cache.get(username)
+        if found:
+            result[username] = dict(user_data) if user_data else None
+        else:
+            missing.append(username)
+
+    for start in range(0, len(missing), IN_QUERY_CHUNK):
+        chunk = missing[start:start + IN_QUERY_CHUNK]
+        generation = supabase_row_cache.generation
+        try:
+            with supabase_call("table.select_many") as client:
+                response = client.table(SUPABASE_TABLE).select("*").in_("username", chunk).execute()
+        except Exception:
+            logger.exception("Supabase table retrieve failed for %d usernames", len(chunk))
+            continue
+
+        rows = {row.get("username"): row for row in (getattr(response, 'data', None) or [])}
+        for username in chunk:
+            user_data = rows.get(username)
+            _cache_supabase_row(username, user_data, generation)
+            result[username] = dict(user_data) if user_data else None
+    return result
+
+
+def _cache_supabase_row(username, user_data, generation):
+    ttl = SUPABASE_CACHE_TTL if user_data else SUPABASE_CACHE_NEGATIVE_TTL
+    supabase_row_cache.set(username, dict(user_data) if user_data else None, ttl, generation)
+
+
+def invalidate_supabase_user(*usernames):
+    """Drops cached rows (and cached misses) after the Register table was written."""
+    for username in usernames:
+        supabase_row_cache.delete(username)
+
+
+def supabase_cache_stats():
+    return supabase_row_cache.stats()
@@ -1,14 +1,38 @@
 import re
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.conf import settings
-from django.db.models import Q, Count, Sum
-from django.views.decorators.http import require_http_methods
+from django.db import transaction
+from django.db.models import Q, Count
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 
+from .exports import DATASETS, FORMATS, aexport_chunks, export_chunks, export_filename
 from .forms import RegistrationForm, DashboardForm
-from .models import User, Inventory, ReliefDistribution, ReliefRequest, Notification
+from .models import User, Inventory, ReliefDistribution, ReliefRequest, Notification, StatCounter, DailyRollup
+from .distribution import distribute_item, distribute_in_bulk, InsufficientStock
+from .notifications import get_unread_count, invalidate_unread_count, notifications_version
+from .pagination import keyset_paginate
+from .parallel import gather_queries
+from .profiling import clear_profiles, recent_profiles, summarize_profiles
+from .queries import (
+    approved_request_list, family_head_places, filter_distributions, filter_family_heads, household_distributions,
+    household_requests, latest_notifications, low_stock_items, pending_request_list, recent_distributions,
+    recent_family_heads, registered_since, undelivered_requests_in_barangay, unread_notifications, users_with_contact,
+)
+from .reviews import filter_pending_requests, review_requests
+from .rollups import (
+    DIMENSIONS as ROLLUP_DIMENSIONS, METRICS as ROLLUP_METRICS, MAX_SERIES_DAYS, rollups_version, time_series,
+    totals_by,
+)
+from .sse import notification_events, parse_cursor, serialize_notification
+from .stats import get_stats
+from .throttle import check_login, record_failure, reset_failures
+from .utils import upload_id_proof_async
 
 # ---------------- HELPERS ----------------
 def validate_name(name):
@@ -26,10 +50,18 @@ def validate_contact(contact):
     return True
 
 
+def wants_json(request):
+    # AJAX callers ask for JSON instead of a redirect
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('Accept', '')
+    )
+
+
 # ---------------- REGISTER ----------------
 def register_view(request):
     if request.method == "POST":
-        form = RegistrationForm(request.POST)
+        form = RegistrationForm(request.POST, request.FILES)
 
         if form.is_valid():
             firstname = form.cleaned_data["firstname"]
@@ -43,7 +75,7 @@ def register_view(request):
             contact = form.cleaned_data["contact"]
 
             # Check if contact already exists
-            if User.objects.filter(contact=contact).exists():
+            if users_with_contact(contact).exists():
                 messages.error(request, "This contact number is already registered.")
                 return render(request, "register.html", {"form": form})
 
@@ -84,6 +116,9 @@ def register_view(request):
                 role="FamilyHead"
             )
 
+            # Stored in the background; user.id_proof is filled in when the upload finishes
+            upload_id_proof_async(form.cleaned_data.get("id_proof"), user.userid, username)
+
             messages.success(request, "Registration successful!")
             return redirect("register_success", user_id=user.userid)
 
@@ -110,10 +145,16 @@ def login_view(request):
         username = request.POST.get("username")
         password = request.POST.get("password")
 
+        # Reject throttled attempts before any database or hashing work
+        throttled = check_login(request, username)
+        if throttled:
+            return render(request, "login.html", {"error": throttled}, status=429)
+
         # Check if the user exists by username and verify password
         try:
             user = User.objects.get(username=username)
             if user.check_password(password):
+                reset_failures(username)
                 # Store user session
                 request.session["user"] = {
                     "userid": user.userid,
@@ -125,8 +166,10 @@ def login_view(request):
                 else:
                     return redirect("dashboard", user_id=user.userid)
             else:
+                record_failure(username)
                 return render(request, "login.html", {"error": "Invalid username or password."})
         except User.DoesNotExist:
+            record_failure(username)
             return render(request, "login.html", {"error": "Invalid username or password."})
 
     return render(request, "login.html")
@@ -146,12 +189,12 @@ def dashboard_view(request, user_id):
         return redirect("login")
 
     # User distributions
-    user_distributions = ReliefDistribution.objects.filter(user=user).select_related('item')
+    user_distributions = household_distributions(user)
     total_reliefs_received = user_distributions.count()
     relief_types_count = user_distributions.values_list('item__category', flat=True).distinct().count()
     
     # Get user's relief requests
-    user_requests = ReliefRequest.objects.filter(user=user).order_by('-request_date')
+    user_requests = household_requests(user)
     pending_request = user_requests.filter(status='pending').first()
     latest_request = user_requests.first()
 
@@ -200,10 +243,16 @@ def admin_login(request):
         username = request.POST.get("username")
         password = request.POST.get("password")
 
+        # Reject throttled attempts before any database or hashing work
+        throttled = check_login(request, username)
+        if throttled:
+            return render(request, "admin_login_new.html", {"error": throttled}, status=429)
+
         # Admin login check using Django's authentication
         try:
             user = User.objects.get(username=username, role="Admin")
             if user.check_password(password):
+                reset_failures(username)
                 # Use Django's login system
                 from django.contrib.auth import login
                 login(request, user)
@@ -213,8 +262,10 @@ def admin_login(request):
                 }
                 return redirect("admin_dashboard")
             else:
+                record_failure(username)
                 return render(request, "admin_login_new.html", {"error": "Invalid credentials"})
         except User.DoesNotExist:
+            record_failure(username)
             return render(request, "admin_login_new.html", {"error": "Invalid credentials"})
 
     return render(request, "admin_login_new.html")
@@ -261,7 +312,7 @@ def view_only_dashboard(request, user_id):
         return redirect("login")
     
     # Get user's distributions
-    distributions = ReliefDistribution.objects.filter(user=user).select_related('item')
+    distributions = household_distributions(user)
     
     # Calculate statistics
     total_reliefs = distributions.count()
@@ -277,10 +328,51 @@ def view_only_dashboard(request, user_id):
 
 
 # Custom Admin Dashboard View
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse, Http404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
 
+async def load_request_user(request):
+    # request.auser() caches apart from request.user, which templates (context processors) read;
+    # loading request.user serves both the permission check and the render
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+def dashboard_queries(search_query):
+    """The dashboard's independent reads, shared by the sync and async views."""
+    # Get recent users with search (building the search query may itself query, so it happens in here)
+    def recent_users():
+        # Best matches first from the indexed resident search, or the newest
+        return list(recent_family_heads(search_query)[:10])
+
+    return {
+        # Statistics from the maintained counters (no full table scans)
+        'stats': get_stats,
+        'recent_users': recent_users,
+        'unread_notifications': get_unread_count,
+    }
+
+
+def dashboard_context(user, search_query, results):
+    stats = results['stats']
+    return {
+        'admin_user': user,
+        'total_families': stats[StatCounter.TOTAL_FAMILIES],
+        'total_inventory': stats[StatCounter.TOTAL_INVENTORY],
+        'total_distributions': stats[StatCounter.TOTAL_DISTRIBUTIONS],
+        # Pending requests: count actual relief requests with pending status
+        'pending_requests': stats[StatCounter.PENDING_REQUESTS],
+        'recent_users': results['recent_users'],
+        'unread_notifications': results['unread_notifications'],
+        # Get all family heads for display
+        'all_families': User.objects.filter(role='FamilyHead').order_by('-userid'),
+        'search_query': search_query,
+    }
+
+
 @login_required
 def custom_admin_dashboard(request):
     # Only allow admin users
@@ -292,47 +384,30 @@ def custom_admin_dashboard(request):
     # Handle search
     search_query = request.GET.get('search', '')
     
-    # Get statistics
-    total_families = User.objects.filter(role='FamilyHead').count()
-    total_inventory = Inventory.objects.aggregate(total=Sum('quantity'))['total'] or 0
-    total_distributions = ReliefDistribution.objects.count()
-    
-    # Pending requests: count actual relief requests with pending status
-    pending_requests = ReliefRequest.objects.filter(status='pending').count()
-    
-    # Get recent users with search
-    recent_users = User.objects.filter(role='FamilyHead')
-    if search_query:
-        recent_users = recent_users.filter(
-            Q(username__icontains=search_query) |
-            Q(firstname__icontains=search_query) |
-            Q(lastname__icontains=search_query) |
-            Q(contact__icontains=search_query) |
-            Q(address__icontains=search_query)
-        )
-    recent_users = recent_users.order_by('-userid')[:10]
-    
-    # Get unread notifications count
-    unread_notifications = Notification.objects.filter(is_read=False).count()
-    
-    # Get all family heads for display
-    all_families = User.objects.filter(role='FamilyHead').order_by('-userid')
-    
-    context = {
-        'admin_user': request.user,
-        'total_families': total_families,
-        'total_inventory': total_inventory,
-        'total_distributions': total_distributions,
-        'pending_requests': pending_requests,
-        'recent_users': recent_users,
-        'all_families': all_families,
-        'unread_notifications': unread_notifications,
-        'search_query': search_query,
-    }
+    results = {name: query() for name, query in dashboard_queries(search_query).items()}
+    context = dashboard_context(request.user, search_query, results)
     
     return render(request, 'admin_dashboard_new.html', context)
 
 
+# Async version (ASYNC_ADMIN_VIEWS): the reads above run concurrently, see register/parallel.py
+async def custom_admin_dashboard_async(request):
+    user = await load_request_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if not hasattr(user, 'role') or user.role != 'Admin':
+        if not user.is_staff:
+            return redirect('login')
+
+    search_query = request.GET.get('search', '')
+
+    results = await gather_queries(**dashboard_queries(search_query))
+    context = dashboard_context(user, search_query, results)
+
+    # Rendering may still touch the database (context processors), so it runs in the sync worker
+    return await sync_to_async(render)(request, 'admin_dashboard_new.html', context)
+
+
 # ---------------- MANAGE USERS ----------------
 @login_required
 def manage_users_view(request):
@@ -344,53 +419,80 @@ def manage_users_view(request):
     city_filter = request.GET.get('city', '')
     barangay_filter = request.GET.get('barangay', '')
     
-    users = User.objects.filter(role='FamilyHead')
+    # Ranked when searching, newest first otherwise; each row carries its distribution count
+    users, ordering = filter_family_heads(request.GET)
     
-    if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(firstname__icontains=search_query) |
-            Q(lastname__icontains=search_query) |
-            Q(contact__icontains=search_query)
-        )
+    # Keyset pagination; history is loaded on demand by the modal
+    users, has_more, next_cursor = keyset_paginate(users, ordering, request.GET.get('after'))
     
-    if city_filter:
-        users = users.filter(city__iexact=city_filter)
+    next_page_query = None
+    if has_more:
+        query = request.GET.copy()
+        query['after'] = next_cursor
+        next_page_query = query.urlencode()
     
-    if barangay_filter:
-        users = users.filter(barangay__iexact=barangay_filter)
-    
-    # Optimize query with prefetch_related to avoid N+1 problem
-    users = users.prefetch_related('distributions__item', 'distributions__distributed_by').order_by('-userid')
+    # Unfiltered total comes from the stat counters; filtered lists only show the page
+    is_filtered = bool(search_query or city_filter or barangay_filter)
+    total_users = None if is_filtered else get_stats()[StatCounter.TOTAL_FAMILIES]
     
     # Get distinct cities and barangays for dropdowns (case-insensitive)
-    all_cities = User.objects.filter(role='FamilyHead').exclude(city__isnull=True).exclude(city__exact='').values_list('city', flat=True).distinct()
-    all_barangays = User.objects.filter(role='FamilyHead').exclude(barangay__isnull=True).exclude(barangay__exact='').values_list('barangay', flat=True).distinct()
+    all_cities = family_head_places('city')
+    all_barangays = family_head_places('barangay')
     
     # Normalize cities and barangays to title case for display
     cities = sorted(set([city.strip().title() for city in all_cities if city and city.strip()]))
     barangays = sorted(set([barangay.strip().title() for barangay in all_barangays if barangay and barangay.strip()]))
     
-    # Attach distribution data directly to each user object
     for user in users:
-        distributions = user.distributions.all()  # Already prefetched, no extra query
-        user.has_distributions = len(distributions) > 0
-        user.distribution_count = len(distributions)
-        user.all_distributions = list(distributions)
+        user.has_distributions = user.distribution_count > 0
     
     context = {
         'users': users,
+        'total_users': total_users,
+        'has_more': has_more,
+        'next_page_query': next_page_query,
+        'is_first_page': not request.GET.get('after'),
         'search_query': search_query,
         'city_filter': city_filter,
         'barangay_filter': barangay_filter,
         'cities': cities,
         'barangays': barangays,
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
     }
     
     return render(request, 'admin_manage_users.html', context)
 
 
+# ---------------- USER DISTRIBUTION HISTORY (AJAX) ----------------
+@login_required
+def user_distribution_history(request, user_id):
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return JsonResponse({'success': False}, status=403)
+    
+    distributions = household_distributions(user_id).select_related('distributed_by')
+    distributions, has_more, next_cursor = keyset_paginate(
+        distributions, ['distribution_date', 'id'], request.GET.get('after')
+    )
+    
+    data = []
+    for dist in distributions:
+        data.append({
+            'item': dist.item.name,
+            'category': dist.item.category,
+            'quantity': dist.quantity_distributed,
+            'date': timezone.localtime(dist.distribution_date).strftime('%b %d, %Y %H:%M'),
+            'distributedBy': dist.distributed_by.username if dist.distributed_by else 'N/A',
+            'notes': dist.notes or '',
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'distributions': data,
+        'has_more': has_more,
+        'next_cursor': next_cursor,
+    })
+
+
 # ---------------- UPDATE USER ----------------
 @login_required
 def update_user_view(request, user_id):
@@ -451,26 +553,17 @@ def mark_distributed_view(request, user_id):
             quantity = int(request.POST.get('quantity', 1))
             notes = request.POST.get('notes', '')
             
-            item = Inventory.objects.get(id=item_id)
-            
-            if item.quantity >= quantity:
-                # Create distribution record
-                ReliefDistribution.objects.create(
-                    user=user,
-                    item=item,
-                    quantity_distributed=quantity,
-                    distributed_by=request.user,
-                    notes=notes
-                )
-                
-                # Update inventory
-                item.quantity -= quantity
-                item.save()
-                
+            try:
+                # Stock check, decrement and distribution record in one transaction
+                distribute_item(user, item_id, quantity, distributed_by=request.user, notes=notes)
                 messages.success(request, f"Distribution recorded for {user.firstname} {user.lastname}")
                 return redirect('manage_users')
-            else:
+            except InsufficientStock:
                 messages.error(request, "Insufficient inventory quantity.")
+            except Inventory.DoesNotExist:
+                messages.error(request, "Item not found.")
+            except ValueError as e:
+                messages.error(request, str(e))
         
         context = {
             'user': user,
@@ -483,6 +576,68 @@ def mark_distributed_view(request, user_id):
         return redirect('manage_users')
 
 
+# ---------------- BULK DISTRIBUTION ----------------
+@login_required
+def bulk_distribute_view(request):
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return redirect('login')
+    
+    if request.method == "POST":
+        mode = request.POST.get('mode', 'users')
+        item_id = request.POST.get('item_id')
+        notes = request.POST.get('notes', '')
+        relief_request_ids = None
+        error = None
+        
+        try:
+            quantity = int(request.POST.get('quantity', 1))
+            if mode == 'barangay':
+                # Every approved request in the barangay that has not been given relief yet
+                barangay = request.POST.get('barangay', '').strip()
+                approved = list(undelivered_requests_in_barangay(barangay).values_list('id', 'user_id'))
+                relief_request_ids = [request_id for request_id, _ in approved]
+                user_ids = [user_id for _, user_id in approved]
+            else:
+                # User ids as repeated fields and/or comma/space separated text
+                user_ids = [
+                    int(value)
+                    for raw in request.POST.getlist('user_ids')
+                    for value in re.split(r'[\s,]+', raw) if value
+                ]
+        except ValueError:
+            error = "Invalid quantity or user ID."
+        
+        if error is None:
+            try:
+                households = distribute_in_bulk(
+                    user_ids, item_id, quantity,
+                    distributed_by=request.user, notes=notes, relief_request_ids=relief_request_ids
+                )
+                if wants_json(request):
+                    return JsonResponse({'success': True, 'households': households})
+                messages.success(request, f"Distribution recorded for {households} households.")
+                return redirect('view_distributions')
+            except InsufficientStock:
+                error = "Insufficient inventory quantity for all selected households."
+            except Inventory.DoesNotExist:
+                error = "Item not found."
+            except ValueError as e:
+                error = str(e)
+        
+        if wants_json(request):
+            return JsonResponse({'success': False, 'error': error}, status=400)
+        messages.error(request, error)
+    
+    barangays = family_head_places('barangay')
+    
+    context = {
+        'inventory_items': Inventory.objects.filter(quantity__gt=0).order_by('category', 'name'),
+        'barangays': sorted(set(barangay.strip().title() for barangay in barangays if barangay and barangay.strip())),
+    }
+    return render(request, 'admin_bulk_distribute.html', context)
+
+
 # ---------------- MANAGE INVENTORY ----------------
 @login_required
 def manage_inventory_view(request):
@@ -518,7 +673,6 @@ def manage_inventory_view(request):
     context = {
         'inventory_items': inventory_items,
         'categories': categories,
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
     }
     
     return render(request, 'admin_manage_inventory.html', context)
@@ -575,22 +729,36 @@ def view_distributions_view(request):
             return redirect('login')
     
     search_query = request.GET.get('search', '')
-    distributions = ReliefDistribution.objects.select_related('user', 'item', 'distributed_by').all()
-    
-    if search_query:
-        distributions = distributions.filter(
-            Q(user__username__icontains=search_query) |
-            Q(user__firstname__icontains=search_query) |
-            Q(user__lastname__icontains=search_query) |
-            Q(item__name__icontains=search_query)
-        )
+    category_filter = request.GET.get('category', '')
+    
+    # Narrowed by the search, category and date range filters
+    distributions = filter_distributions(request.GET)
+    
+    # Keyset pagination on (distribution_date, id); "has more" comes from fetching one extra row
+    distributions, has_more, next_cursor = keyset_paginate(
+        distributions, ['distribution_date', 'id'], request.GET.get('after')
+    )
+    
+    next_page_query = None
+    if has_more:
+        query = request.GET.copy()
+        query['after'] = next_cursor
+        next_page_query = query.urlencode()
     
-    distributions = distributions.order_by('-distribution_date')
+    first_page_query = request.GET.copy()
+    first_page_query.pop('after', None)
     
     context = {
         'distributions': distributions,
         'search_query': search_query,
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
+        'category_filter': category_filter,
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+        'categories': Inventory.CATEGORY_CHOICES,
+        'has_more': has_more,
+        'next_page_query': next_page_query,
+        'first_page_query': first_page_query.urlencode(),
+        'is_first_page': not request.GET.get('after'),
     }
     
     return render(request, 'admin_distributions.html', context)
@@ -603,78 +771,247 @@ def pending_requests_view(request):
         if not request.user.is_staff:
             return redirect('login')
     
-    # Get pending relief requests
-    pending_requests = ReliefRequest.objects.filter(status='pending').select_related('user').order_by('-request_date')
+    # Get pending relief requests, narrowed by the optional filters
+    status = 200
+    try:
+        pending_requests = pending_request_list(request.GET)
+    except ValueError as e:
+        # Show nothing rather than more than was asked for (and no "review all matching")
+        messages.error(request, str(e))
+        pending_requests = ReliefRequest.objects.none()
+        status = 400
+    
+    barangays = family_head_places('barangay')
     
     context = {
         'pending_requests': pending_requests,
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
+        'relief_types': ReliefRequest.RELIEF_TYPE_CHOICES,
+        'barangays': sorted(set(barangay.strip().title() for barangay in barangays if barangay and barangay.strip())),
+        'relief_type_filter': request.GET.get('relief_type', ''),
+        'barangay_filter': request.GET.get('barangay', ''),
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
     }
     
-    return render(request, 'admin_pending_requests.html', context)
+    return render(request, 'admin_pending_requests.html', context, status=status)
 
 
 # ---------------- ANALYTICS DATA ----------------
+def analytics_queries():
+    """The analytics page's independent reads, shared by the sync and async views."""
+    return {
+        'stats': get_stats,
+        # Category-wise distribution (from the daily rollups, not the distribution log)
+        'category_totals': lambda: totals_by('distribution', 'category'),
+        'cities': lambda: list(DailyRollup.objects.values_list('city', flat=True).distinct().order_by('city')),
+    }
+
+
+def analytics_context(results):
+    stats = results['stats']
+    return {
+        'total_distributed': stats[StatCounter.TOTAL_DISTRIBUTIONS],
+        'total_pending': stats[StatCounter.PENDING_REQUESTS],
+        'total_inventory': stats[StatCounter.TOTAL_INVENTORY],
+        'category_data': [
+            {'item__category': row['category'], 'total': row['total']}
+            for row in results['category_totals']
+        ],
+        'metric_choices': DailyRollup.METRIC_CHOICES,
+        'cities': results['cities'],
+    }
+
+
 @login_required
 def analytics_view(request):
     if not hasattr(request.user, 'role') or request.user.role != 'Admin':
         if not request.user.is_staff:
             return redirect('login')
     
-    # Get distribution statistics
-    total_distributed = ReliefDistribution.objects.count()
-    
-    # Get pending relief requests
-    total_pending = ReliefRequest.objects.filter(status='pending').count()
-    
-    # Get inventory count
-    total_inventory = Inventory.objects.aggregate(total=Sum('quantity'))['total'] or 0
-    
-    # Get category-wise distribution
-    category_data = ReliefDistribution.objects.values('item__category').annotate(
-        total=Count('id')
-    ).order_by('item__category')
-    
-    context = {
-        'total_distributed': total_distributed,
-        'total_pending': total_pending,
-        'total_inventory': total_inventory,
-        'category_data': list(category_data),
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
-    }
+    results = {name: query() for name, query in analytics_queries().items()}
+    context = analytics_context(results)
     
     return render(request, 'admin_analytics.html', context)
 
 
+# Async version (ASYNC_ADMIN_VIEWS)
+async def analytics_view_async(request):
+    user = await load_request_user(request)
+    if not user.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+    if not hasattr(user, 'role') or user.role != 'Admin':
+        if not user.is_staff:
+            return redirect('login')
+
+    results = await gather_queries(**analytics_queries())
+    context = analytics_context(results)
+
+    return await sync_to_async(render)(request, 'admin_analytics.html', context)
+
+
+# ---------------- ANALYTICS TIME SERIES (JSON) ----------------
+def analytics_series_etag(request):
+    # Non-admins get no ETag, so they always reach the view's permission check
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return None
+    latest = rollups_version()
+    # Today's date too: the default "last N days" window moves at midnight
+    return f'{latest.timestamp() if latest else 0}-{timezone.localdate()}'
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=analytics_series_etag)
+def analytics_series(request):
+    """
+    Daily series for the analytics charts, read from the rollup table.
+
+    GET params: metric (distribution/request/approval/denial), days (default 30,
+    at most 366) or start/end (YYYY-MM-DD), group_by (category/city/barangay),
+    value (count/quantity), and category/city/barangay filters.
+    """
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return JsonResponse({'success': False}, status=403)
+
+    metric = request.GET.get('metric', 'distribution')
+    group_by = request.GET.get('group_by') or None
+    value = request.GET.get('value', 'count')
+    if metric not in ROLLUP_METRICS or (group_by and group_by not in ROLLUP_DIMENSIONS) or value not in ('count', 'quantity'):
+        return JsonResponse({'success': False, 'error': 'Invalid metric, group_by or value.'}, status=400)
+
+    try:
+        end = parse_date(request.GET.get('end', '') or '') or timezone.localdate()
+        start = parse_date(request.GET.get('start', '') or '')
+    except ValueError:
+        # Well-formed but impossible, e.g. 2026-99-01
+        return JsonResponse({'success': False, 'error': 'Invalid start or end date.'}, status=400)
+    if not start:
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        start = end - timedelta(days=min(max(days, 1), MAX_SERIES_DAYS) - 1)
+    if start > end or (end - start).days >= MAX_SERIES_DAYS:
+        return JsonResponse({'success': False, 'error': f'Pick a range of at most {MAX_SERIES_DAYS} days.'}, status=400)
+
+    filters = {
+        dimension: request.GET[dimension].strip()
+        for dimension in ROLLUP_DIMENSIONS
+        if request.GET.get(dimension, '').strip()
+    }
+
+    data = time_series(metric, start, end, group_by=group_by, filters=filters, value=value)
+    return JsonResponse({
+        'success': True,
+        'metric': metric,
+        'value': value,
+        'group_by': group_by,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        **data,
+    })
+
+
 # ---------------- REPORTS ----------------
+# (context key, label, length), shortest first
+REGISTRATION_WINDOWS = [
+    ('day', 'Last 24 hours', timedelta(hours=24)),
+    ('week', 'Last 7 days', timedelta(days=7)),
+    ('month', 'Last 30 days', timedelta(days=30)),
+]
+
+
 @login_required
 def reports_view(request):
     if not hasattr(request.user, 'role') or request.user.role != 'Admin':
         if not request.user.is_staff:
             return redirect('login')
     
-    # Get new users
-    new_users = User.objects.filter(
-        role='FamilyHead',
-        userid__gte=User.objects.filter(role='FamilyHead').order_by('-userid').first().userid - 100
-    ).order_by('-userid')[:20]
+    # New family heads per window, overall and per barangay: one range scan of user_role_joined_idx
+    now = timezone.now()
+    recent = registered_since(now - REGISTRATION_WINDOWS[-1][2])
+    window_counts = {
+        key: Count('userid', filter=Q(date_joined__gte=now - length))
+        for key, _, length in REGISTRATION_WINDOWS
+    }
+    registrations_by_barangay = list(
+        recent.values('city', 'barangay').annotate(**window_counts)
+        .order_by(*(f'-{key}' for key, _, _ in reversed(REGISTRATION_WINDOWS)), 'city', 'barangay')
+    )
+    registration_totals = [
+        (label, sum(row[key] for row in registrations_by_barangay))
+        for key, label, _ in REGISTRATION_WINDOWS
+    ]
+    
+    # Latest registrations, newest first (same index, read backwards)
+    new_users = recent.order_by('-date_joined')[:20]
     
     # Get recent distributions
-    recent_distributions = ReliefDistribution.objects.select_related('user', 'item').order_by('-distribution_date')[:20]
+    distributions = recent_distributions()[:20]
     
     # Get low stock items
-    low_stock_items = Inventory.objects.filter(quantity__lte=10).order_by('quantity')
+    low_stock = low_stock_items()
     
     context = {
         'new_users': new_users,
-        'recent_distributions': recent_distributions,
-        'low_stock_items': low_stock_items,
-        'unread_notifications': Notification.objects.filter(is_read=False).count(),
+        'registration_windows': REGISTRATION_WINDOWS,
+        'registration_totals': registration_totals,
+        'registrations_by_barangay': registrations_by_barangay,
+        'recent_distributions': distributions,
+        'low_stock_items': low_stock,
+        'export_datasets': [
+            ('distributions', 'Relief Distributions'),
+            ('requests', 'Relief Requests'),
+            ('residents', 'Residents (Family Heads)'),
+        ],
     }
     
     return render(request, 'admin_reports.html', context)
 
 
+# ---------------- EXPORT (CSV / JSONL) ----------------
+@login_required
+def export_data_view(request, dataset):
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return redirect('login')
+    
+    export_format = request.GET.get('format', 'csv')
+    compress = request.GET.get('gzip') in ('1', 'true', 'on')
+    
+    if dataset not in DATASETS or export_format not in FORMATS:
+        raise Http404("Unknown export.")
+    
+    content_type = 'application/gzip' if compress else FORMATS[export_format][0]
+    # Each server needs its own kind of iterator to stream without buffering the whole export
+    chunks = aexport_chunks if isinstance(request, ASGIRequest) else export_chunks
+    response = StreamingHttpResponse(chunks(dataset, export_format, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(dataset, export_format, compress)}"'
+    return response
+
+
+# ---------------- PROFILING ----------------
+@login_required
+def profiling_view(request):
+    if not request.user.is_staff:
+        return redirect('login')
+    
+    if request.method == "POST":
+        clear_profiles()
+        return redirect('profiling')
+    
+    entries = recent_profiles()
+    context = {
+        'enabled': settings.VIEW_PROFILING['ENABLED'],
+        'buffer_size': settings.VIEW_PROFILING['BUFFER'],
+        'summary': summarize_profiles(entries),
+        'recent': entries[:100],
+    }
+    return render(request, 'admin_profiling.html', context)
+
+
 # ---------------- NOTIFICATIONS ----------------
 @login_required
 def notifications_view(request):
@@ -682,8 +1019,8 @@ def notifications_view(request):
         if not request.user.is_staff:
             return redirect('login')
     
-    notifications = Notification.objects.all().order_by('-created_at')[:50]
-    unread_count = Notification.objects.filter(is_read=False).count()
+    notifications = latest_notifications()[:50]
+    unread_count = get_unread_count()
     
     context = {
         'notifications': notifications,
@@ -697,36 +1034,51 @@ def notifications_view(request):
 @login_required
 def mark_notification_read(request, notification_id):
     if request.method == "POST":
-        try:
-            notification = Notification.objects.get(id=notification_id)
-            notification.is_read = True
-            notification.save()
+        updated = Notification.objects.filter(id=notification_id).update(is_read=True)
+        if updated:
+            invalidate_unread_count()
             return JsonResponse({'success': True})
-        except Notification.DoesNotExist:
-            return JsonResponse({'success': False})
+        return JsonResponse({'success': False})
     return JsonResponse({'success': False})
 
 
 # ---------------- GET NOTIFICATIONS (AJAX) ----------------
+# Polling pages get 304 Not Modified until a notification arrives or one is read
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=lambda request: notifications_version())
 def get_notifications_ajax(request):
-    notifications = Notification.objects.filter(is_read=False).order_by('-created_at')[:10]
-    data = []
-    for notif in notifications:
-        data.append({
-            'id': notif.id,
-            'title': notif.title,
-            'message': notif.message,
-            'type': notif.notification_type,
-            'created_at': notif.created_at.strftime('%Y-%m-%d %H:%M'),
-        })
+    notifications = unread_notifications()[:10]
+    data = [serialize_notification(notif) for notif in notifications]
     
     return JsonResponse({
         'notifications': data,
-        'count': Notification.objects.filter(is_read=False).count()
+        'count': get_unread_count()
     })
 
 
+# ---------------- NOTIFICATION STREAM (SSE) ----------------
+async def notification_stream(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'success': False}, status=403)
+    if not hasattr(user, 'role') or user.role != 'Admin':
+        if not user.is_staff:
+            return JsonResponse({'success': False}, status=403)
+
+    # Under WSGI every open stream would hold a worker; the page polls get_notifications_ajax instead
+    if not isinstance(request, ASGIRequest) or not settings.NOTIFICATION_STREAM['ENABLED']:
+        return JsonResponse({'success': False, 'error': 'Live notifications are not available.'}, status=503)
+
+    # Browsers send Last-Event-ID when they reconnect; the query parameter lets a new page resume too
+    cursor = parse_cursor(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id'))
+    response = StreamingHttpResponse(notification_events(cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx-style proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # ---------------- CREATE RELIEF REQUEST (USER) ----------------
 def create_relief_request(request, user_id):
     # Check if user is logged in via custom session
@@ -759,12 +1111,14 @@ def create_relief_request(request, user_id):
             messages.error(request, "Please provide notes for your relief request.")
             return redirect('dashboard', user_id=user_id)
         
-        ReliefRequest.objects.create(
-            user=user,
-            relief_type=relief_type,
-            notes=notes,
-            status='pending'
-        )
+        # Request and its outbox event are committed together
+        with transaction.atomic():
+            ReliefRequest.objects.create(
+                user=user,
+                relief_type=relief_type,
+                notes=notes,
+                status='pending'
+            )
         messages.success(request, "Your relief request has been submitted successfully!")
         return redirect('dashboard', user_id=user_id)
     
@@ -823,6 +1177,48 @@ def deny_request_view(request, request_id):
     return redirect('pending_requests')
 
 
+# ---------------- BULK APPROVE / DENY (ADMIN) ----------------
+@login_required
+@require_http_methods(["POST"])
+def bulk_review_requests_view(request):
+    if not hasattr(request.user, 'role') or request.user.role != 'Admin':
+        if not request.user.is_staff:
+            return redirect('login')
+    
+    action = request.POST.get('action', '')
+    
+    try:
+        if request.POST.get('scope') == 'filter':
+            # Everything matching the filters currently applied on the pending page
+            relief_requests = filter_pending_requests(request.POST)
+        else:
+            request_ids = [value for value in request.POST.getlist('request_ids') if value.isdigit()]
+            relief_requests = ReliefRequest.objects.filter(id__in=request_ids)
+        
+        updated = review_requests(
+            relief_requests, action, request.user,
+            admin_notes=request.POST.get('admin_notes', '').strip(),
+            relief_given=request.POST.get('relief_given') == 'on',
+        )
+    except ValueError as e:
+        if wants_json(request):
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        messages.error(request, str(e))
+        return redirect('pending_requests')
+    
+    verb = 'approved' if action == 'approve' else 'denied'
+    if wants_json(request):
+        return JsonResponse({
+            'success': True,
+            'updated': updated,
+            'action': verb,
+            'pending_count': get_stats()[StatCounter.PENDING_REQUESTS],
+        })
+    
+    messages.success(request, f"{updated} request(s) {verb}.")
+    return redirect('pending_requests')
+
+
 # ---------------- APPROVED REQUESTS (ADMIN) ----------------
 @login_required
 def approved_requests_view(request):
@@ -830,7 +1226,7 @@ def approved_requests_view(request):
         if not request.user.is_staff:
             return redirect('login')
     
-    approved_requests = ReliefRequest.objects.filter(status='approved').order_by('-reviewed_date')
+    approved_requests = approved_request_list()
     
     context = {
         'approved_requests': approved_requests,